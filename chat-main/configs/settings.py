@@ -165,3 +165,45 @@ AUTH_USER_MODEL = 'chatbot.CustomUser'
 GOOGLE_AI_API_KEY = config('GOOGLE_AI_API_KEY', default='')
 
 os.environ['PYDEVD_WARN_EVALUATION_TIMEOUT'] = '20'
+
+# Reconciliation: processos usados na extração paralela de páginas dos PDFs (1 = serial)
+RECONCILIATION_PARSE_WORKERS = config('RECONCILIATION_PARSE_WORKERS', cast=int, default=1)
+
+# Cache persistente de parse (ParseCacheEntry): limites para a remoção LRU
+RECONCILIATION_PARSE_CACHE_MAX_ENTRIES = config('RECONCILIATION_PARSE_CACHE_MAX_ENTRIES', cast=int, default=500)
+RECONCILIATION_PARSE_CACHE_MAX_BYTES = config('RECONCILIATION_PARSE_CACHE_MAX_BYTES', cast=int, default=200 * 1024 * 1024)
+
+# Importação em streaming (página a página, bulk_create em lotes) para PDFs com pelo menos
+# esta quantidade de páginas; 0 desativa e mantém o parse completo com cache
+RECONCILIATION_STREAMING_MIN_PAGES = config('RECONCILIATION_STREAMING_MIN_PAGES', cast=int, default=0)
+RECONCILIATION_STREAMING_BATCH_SIZE = config('RECONCILIATION_STREAMING_BATCH_SIZE', cast=int, default=500)
+
+# Perfil de layout por CNPJ (estratégia, colunas e impressão digital do cabeçalho) aplicado no parse
+RECONCILIATION_LAYOUT_PROFILES = config('RECONCILIATION_LAYOUT_PROFILES', cast=bool, default=True)
+
+# Backend de extração de texto/palavras dos PDFs: 'pdfplumber' ou 'pdfium' (tabelas sempre via pdfplumber)
+RECONCILIATION_PDF_BACKEND = config('RECONCILIATION_PDF_BACKEND', default='pdfplumber')
+
+# Importação em lote (manage.py import_remittances): processos de parse em paralelo
+RECONCILIATION_IMPORT_WORKERS = config('RECONCILIATION_IMPORT_WORKERS', cast=int, default=2)
+
+# Upload assíncrono: o envio só grava o PDF e cria um ImportJob; o parse roda no worker
+# (manage.py run_import_worker) e a página de upload acompanha o progresso
+RECONCILIATION_ASYNC_IMPORT = config('RECONCILIATION_ASYNC_IMPORT', cast=bool, default=False)
+# Tentativas de um job (cada reserva conta uma); um job parado que já as esgotou é marcado como falho
+RECONCILIATION_IMPORT_MAX_ATTEMPTS = config('RECONCILIATION_IMPORT_MAX_ATTEMPTS', cast=int, default=3)
+
+# Logs: o relatório de cada parse (ParseReport) sai no logger 'reconciliation.services'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'reconciliation': {
+            'handlers': ['console'],
+            'level': config('RECONCILIATION_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
@@ -1,7 +1,8 @@
+import sys
 from pathlib import Path
 from reconciliation.services import parse_pdf
 
-pdf = Path(r"c:\Users\lucia_csx8nlz\Downloads\Relat_1539 (13) (1).PDF")
+pdf = Path(sys.argv[1] if len(sys.argv) > 1 else r"c:\Users\lucia_csx8nlz\Downloads\Relat_1539 (13) (1).PDF")
 header, items = parse_pdf(pdf)
 print("HEADER:", header)
 print("Items:", len(items))
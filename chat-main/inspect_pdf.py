@@ -3,7 +3,7 @@ from pathlib import Path
 import re
 import pdfplumber
 
-PDF_PATH = Path(r"c:\Users\lucia_csx8nlz\Downloads\Relat_1539 (13) (1).PDF")
+PDF_PATH = Path(sys.argv[1] if len(sys.argv) > 1 else r"c:\Users\lucia_csx8nlz\Downloads\Relat_1539 (13) (1).PDF")
 
 if not PDF_PATH.exists():
     print(f"PDF not found: {PDF_PATH}")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PriceCatalog, ProcedurePrice, RemittanceHeader, RemittanceItem
+from .models import ImportJob, PriceCatalog, ProcedurePrice, RemittanceHeader, RemittanceItem, StoredDocument
 
 
 @admin.register(PriceCatalog)
@@ -16,5 +16,20 @@ class ProcedurePriceAdmin(admin.ModelAdmin):
     search_fields = ("codigo", "codigo_original", "descricao", "convenio")
     ordering = ("-id",)
 
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "original_name", "state", "pages_done", "pages_total", "attempts", "created_at", "finished_at")
+    list_filter = ("state",)
+    search_fields = ("original_name", "source_sha256")
+    ordering = ("-id",)
+
+@admin.register(StoredDocument)
+class StoredDocumentAdmin(admin.ModelAdmin):
+    list_display = ("id", "original_name", "sha256", "size", "created_at")
+    search_fields = ("original_name", "sha256")
+    ordering = ("-id",)
+
+
 admin.site.register(RemittanceHeader)
 admin.site.register(RemittanceItem)
\ No newline at end of file
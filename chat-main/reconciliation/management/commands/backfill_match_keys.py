@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reconciliation.models import ProcedurePrice, RemittanceItem
+from reconciliation.normalization import MATCH_KEY_FIELDS, match_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche as chaves normalizadas (codigo_norm, convenio_norm, categoria_norm, hospital_cnpj_norm) "
+        "de RemittanceItem e ProcedurePrice, em lotes por faixa de id. Só grava as linhas que mudaram."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Linhas por lote (padrão: 5000).')
+        parser.add_argument('--only', choices=['items', 'prices'], help='Processa só itens ou só preços.')
+        parser.add_argument('--dry-run', action='store_true', help='Só conta as linhas que seriam atualizadas.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        targets = {
+            # modelo -> campos (codigo, convenio, categoria, cnpj) na ordem de match_keys
+            'items': (RemittanceItem, ('codigo', 'convenio', 'categoria', 'header__cnpj')),
+            'prices': (ProcedurePrice, ('codigo', 'convenio', 'categoria', 'hospital_cnpj')),
+        }
+        for label, (model, sources) in targets.items():
+            if options['only'] and options['only'] != label:
+                continue
+            scanned, updated = self._backfill(model, sources, batch_size, options['dry_run'])
+            prefix = '[dry-run] ' if options['dry_run'] else ''
+            self.stdout.write(self.style.SUCCESS(f'{prefix}{model.__name__}: {scanned} lidos, {updated} atualizados.'))
+
+    def _backfill(self, model, sources: tuple[str, ...], batch_size: int, dry_run: bool) -> tuple[int, int]:
+        scanned = updated = 0
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', *sources, *MATCH_KEY_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+            changed = []
+            for row in rows:
+                keys = match_keys(*row[1:5])
+                if keys != tuple(row[5:]):
+                    changed.append(model(id=row[0], **dict(zip(MATCH_KEY_FIELDS, keys))))
+            if changed and not dry_run:
+                with transaction.atomic():
+                    model.objects.bulk_update(changed, list(MATCH_KEY_FIELDS), batch_size=1000)
+            updated += len(changed)
+        return scanned, updated
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reconciliation.models import RemittanceItem
+from reconciliation.services import parse_service_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche RemittanceItem.data_atendimento a partir do texto da data (ano da competência do "
+        "header quando ausente), em lotes por faixa de id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Itens por lote (padrão: 5000).')
+        parser.add_argument('--all', action='store_true',
+                            help='Recalcula todos os itens, não só os que ainda não têm data_atendimento.')
+        parser.add_argument('--dry-run', action='store_true', help='Só conta os itens que seriam atualizados.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        qs = RemittanceItem.objects.exclude(data='')
+        if not options['all']:
+            qs = qs.filter(data_atendimento__isnull=True)
+
+        updated = unparsed = scanned = 0
+        last_id = 0
+        while True:
+            # paginação por id (keyset): cada lote é uma varredura de faixa da PK
+            rows = list(
+                qs.filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'data', 'header__competencia')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+            changed = []
+            for item_id, text, competencia in rows:
+                value = parse_service_date(text, competencia or '')
+                if value is None:
+                    unparsed += 1
+                    continue
+                changed.append(RemittanceItem(id=item_id, data_atendimento=value))
+            if changed and not options['dry_run']:
+                with transaction.atomic():
+                    RemittanceItem.objects.bulk_update(changed, ['data_atendimento'], batch_size=1000)
+            updated += len(changed)
+            self.stdout.write(f'  até id {last_id}: {updated} atualizados')
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{scanned} itens lidos, {updated} com data_atendimento, {unparsed} sem data reconhecível.'
+        ))
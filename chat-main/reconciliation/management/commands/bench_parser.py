@@ -0,0 +1,173 @@
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reconciliation.services import (
+    PARSER_VERSION,
+    PdfLayout,
+    extract_pdf_dataframe,
+    parse_items_from_tables,
+    parse_items_from_text,
+    parse_items_from_words,
+    parse_pdf,
+)
+from reconciliation.synthetic import CORPUS_DIR
+
+GOLDEN_FILE = CORPUS_DIR / 'golden.json'
+
+# Cada estratégia recebe um PdfLayout novo (sem memo de páginas) e devolve os itens
+STRATEGIES = {
+    'tables': lambda layout: parse_items_from_tables(extract_pdf_dataframe(layout)),
+    'words': parse_items_from_words,
+    'text': parse_items_from_text,
+    'parse_pdf': lambda layout: parse_pdf(layout, workers=1, use_profile=False)[1],
+}
+GOLDEN_STRATEGIES = ('tables', 'words', 'text')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o parse de PDFs por estratégia (parse_items_from_tables/_words/_text e parse_pdf): "
+        "páginas/s, itens/s e pico de memória Python (tracemalloc). Sem caminhos, usa o corpus "
+        "de referência; --check compara a saída de parse_pdf e a contagem de itens de cada estratégia "
+        "com o golden.json do corpus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Arquivos PDF ou diretórios (padrão: corpus de referência).')
+        parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções por estratégia; vale o menor tempo.')
+        parser.add_argument('--backend', choices=['pdfplumber', 'pdfium'], default=None,
+                            help='Backend de texto (padrão: RECONCILIATION_PDF_BACKEND).')
+        parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+        parser.add_argument('--check', action='store_true', help='Falha se parse_pdf divergir do golden.json.')
+        parser.add_argument('--write-golden', action='store_true', help='Regrava o golden.json a partir do corpus.')
+
+    def _files(self, paths: list[str]) -> list[Path]:
+        files: list[Path] = []
+        for p in paths or [str(CORPUS_DIR)]:
+            path = Path(p)
+            if path.is_dir():
+                files.extend(sorted(path.glob('*.pdf')))
+            elif path.exists():
+                files.append(path)
+            else:
+                self.stderr.write(self.style.WARNING(f'Arquivo não encontrado: {path}'))
+        if not files:
+            raise CommandError('Nenhum PDF para medir.')
+        return files
+
+    def _measure(self, pdf_path: Path, strategy: str, repeat: int, backend: str | None) -> dict:
+        fn = STRATEGIES[strategy]
+        best = None
+        items = []
+        for _ in range(max(1, repeat)):
+            with PdfLayout(pdf_path, backend=backend) as layout:
+                start = time.perf_counter()
+                items = fn(layout)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        # pico de memória numa execução separada (tracemalloc distorce o tempo)
+        tracemalloc.start()
+        try:
+            with PdfLayout(pdf_path, backend=backend) as layout:
+                fn(layout)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {'seconds': round(best, 4), 'items': len(items), 'peak_mb': round(peak / (1024 * 1024), 2)}
+
+    @staticmethod
+    def _snapshot(pdf_path: Path) -> dict:
+        header, items = parse_pdf(pdf_path, workers=1, use_profile=False, backend='pdfplumber')
+        # itens por estratégia isolada: cada layout do corpus exercita ao menos uma delas
+        counts = {}
+        for strategy in GOLDEN_STRATEGIES:
+            with PdfLayout(pdf_path, backend='pdfplumber') as layout:
+                counts[strategy] = len(STRATEGIES[strategy](layout))
+        return {'header': asdict(header), 'strategy_items': counts, 'items': [asdict(it) for it in items]}
+
+    def _check_golden(self, files: list[Path]) -> int:
+        if not GOLDEN_FILE.exists():
+            raise CommandError(f'{GOLDEN_FILE} não existe; gere com --write-golden.')
+        golden = json.loads(GOLDEN_FILE.read_text(encoding='utf-8'))
+        divergent = 0
+        for pdf_path in files:
+            expected = golden.get(pdf_path.name)
+            if expected is None:
+                continue
+            current = self._snapshot(pdf_path)
+            if current == expected:
+                self.stdout.write(self.style.SUCCESS(f'OK  {pdf_path.name}'))
+                continue
+            divergent += 1
+            bad = [i for i, (a, b) in enumerate(zip(current['items'], expected['items'])) if a != b]
+            self.stdout.write(self.style.WARNING(
+                f"DIF {pdf_path.name}: {len(current['items'])} itens (golden {len(expected['items'])}), "
+                f"cabeçalho {'igual' if current['header'] == expected['header'] else 'diferente'}, "
+                f"itens por estratégia {current['strategy_items']} (golden {expected.get('strategy_items')}), "
+                f"primeiros itens divergentes {bad[:5]}"
+            ))
+        return divergent
+
+    def handle(self, *args, **options):
+        files = self._files(options['paths'])
+
+        if options['write_golden']:
+            golden = {pdf_path.name: self._snapshot(pdf_path) for pdf_path in files}
+            GOLDEN_FILE.write_text(json.dumps(golden, ensure_ascii=False, indent=1) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'{GOLDEN_FILE} regravado ({len(golden)} arquivos).'))
+            return
+
+        results = []
+        totals = {s: {'seconds': 0.0, 'pages': 0, 'items': 0, 'peak_mb': 0.0} for s in options['strategies']}
+        for pdf_path in files:
+            with PdfLayout(pdf_path) as layout:
+                pages = len(layout.page_numbers)
+            entry = {'file': pdf_path.name, 'pages': pages, 'strategies': {}}
+            for strategy in options['strategies']:
+                m = self._measure(pdf_path, strategy, options['repeat'], options['backend'])
+                secs = m['seconds'] or 1e-9
+                m['pages_per_s'] = round(pages / secs, 2)
+                m['items_per_s'] = round(m['items'] / secs, 2)
+                entry['strategies'][strategy] = m
+                tot = totals[strategy]
+                tot['seconds'] += m['seconds']
+                tot['pages'] += pages
+                tot['items'] += m['items']
+                tot['peak_mb'] = max(tot['peak_mb'], m['peak_mb'])
+                self.stdout.write(
+                    f"{pdf_path.name:<28} {strategy:<10} {m['seconds']:>8.3f}s {m['pages_per_s']:>9.1f} pág/s "
+                    f"{m['items_per_s']:>10.1f} itens/s {m['peak_mb']:>8.2f} MB ({m['items']} itens)"
+                )
+            results.append(entry)
+
+        for tot in totals.values():
+            secs = tot['seconds'] or 1e-9
+            tot['seconds'] = round(tot['seconds'], 4)
+            tot['pages_per_s'] = round(tot['pages'] / secs, 2)
+            tot['items_per_s'] = round(tot['items'] / secs, 2)
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'parser_version': PARSER_VERSION,
+            'backend': options['backend'] or 'default',
+            'repeat': options['repeat'],
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'files': results,
+            'totals': totals,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}"))
+
+        if options['check'] and self._check_golden(files):
+            raise CommandError('Saída do parse diverge do golden.json.')
@@ -0,0 +1,75 @@
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation.services import PdfLayout, detect_professionals_by_page, parse_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a saída do parse (cabeçalho, ParsedItem e profissionais por página) entre os "
+        "backends pdfplumber e pdfium para os PDFs informados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Arquivos PDF ou diretórios com PDFs.')
+        parser.add_argument('--show', type=int, default=5, help='Quantidade de itens divergentes exibidos por arquivo.')
+        parser.add_argument('--strict', action='store_true', help='Falha (exit != 0) se algum arquivo divergir.')
+
+    def _parse(self, pdf_path: Path, backend: str):
+        start = time.perf_counter()
+        with PdfLayout(pdf_path, backend=backend) as layout:
+            header, items = parse_pdf(layout, workers=1, use_profile=False)
+            profs = detect_professionals_by_page(layout)
+        return header, items, profs, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        files: list[Path] = []
+        for p in options['paths']:
+            path = Path(p)
+            if path.is_dir():
+                files.extend(sorted(path.glob('*.pdf')))
+            elif path.exists():
+                files.append(path)
+            else:
+                self.stderr.write(self.style.WARNING(f'Arquivo não encontrado: {path}'))
+        if not files:
+            raise CommandError('Nenhum PDF para comparar.')
+
+        divergent = 0
+        for pdf_path in files:
+            h1, items1, profs1, t1 = self._parse(pdf_path, 'pdfplumber')
+            h2, items2, profs2, t2 = self._parse(pdf_path, 'pdfium')
+
+            diffs = []
+            for idx in range(max(len(items1), len(items2))):
+                a = asdict(items1[idx]) if idx < len(items1) else {}
+                b = asdict(items2[idx]) if idx < len(items2) else {}
+                changed = {k: (a.get(k), b.get(k)) for k in set(a) | set(b) if a.get(k) != b.get(k)}
+                if changed:
+                    diffs.append((idx, changed))
+
+            same = not diffs and h1 == h2 and profs1 == profs2
+            summary = (
+                f'{pdf_path.name}: pdfplumber {len(items1)} itens em {t1:.2f}s | '
+                f'pdfium {len(items2)} itens em {t2:.2f}s'
+            )
+            if same:
+                self.stdout.write(self.style.SUCCESS(f'OK  {summary}'))
+                continue
+
+            divergent += 1
+            self.stdout.write(self.style.WARNING(f'DIF {summary} | {len(diffs)} itens divergentes'))
+            if h1 != h2:
+                self.stdout.write(f'    cabeçalho: {asdict(h1)} != {asdict(h2)}')
+            if profs1 != profs2:
+                self.stdout.write(f'    profissionais por página divergem: {profs1} != {profs2}')
+            for idx, changed in diffs[:options['show']]:
+                fields_txt = ', '.join(f'{k}: {v[0]!r} -> {v[1]!r}' for k, v in sorted(changed.items()))
+                self.stdout.write(f'    item {idx}: {fields_txt}')
+
+        self.stdout.write(f'{len(files) - divergent}/{len(files)} arquivos com saída idêntica.')
+        if divergent and options['strict']:
+            raise CommandError(f'{divergent} arquivo(s) com saída divergente entre os backends.')
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation.synthetic import CORPUS_DIR, StatementSpec, generate_corpus, generate_statement
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera demonstrativos de repasse sintéticos em PDF (páginas, profissionais, tabela com grade "
+        "ou colapsada, linhas corridas, datas/códigos ausentes). Com --corpus regrava o corpus de referência."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Arquivo PDF de saída.')
+        parser.add_argument('--pages', type=int, default=4)
+        parser.add_argument('--professionals', type=int, default=2)
+        parser.add_argument('--rows-per-page', type=int, default=25)
+        parser.add_argument('--ruled', action='store_true', help='Desenha a grade da tabela (padrão: colunas só alinhadas).')
+        parser.add_argument('--flow', action='store_true',
+                            help='Linhas corridas, sem colunas alinhadas (só o parser de texto lê).')
+        parser.add_argument('--missing-dates', type=float, default=0.0, help='Fração de linhas sem data (0..1).')
+        parser.add_argument('--missing-codes', type=float, default=0.0, help='Fração de linhas sem código (0..1).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--corpus', action='store_true', help=f'Regrava os PDFs do corpus em {CORPUS_DIR}.')
+
+    def handle(self, *args, **options):
+        if options['corpus']:
+            for statement in generate_corpus():
+                self.stdout.write(f'{statement.path} ({statement.spec.pages} páginas, {len(statement.rows)} linhas)')
+            self.stdout.write(self.style.SUCCESS('Corpus regravado; atualize o golden com bench_parser --write-golden.'))
+            return
+        if not options['path']:
+            raise CommandError('Informe o arquivo de saída ou use --corpus.')
+        for name in ('missing_dates', 'missing_codes'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f'--{name.replace("_", "-")} deve estar entre 0 e 1.')
+
+        spec = StatementSpec(
+            pages=options['pages'],
+            professionals=options['professionals'],
+            rows_per_page=options['rows_per_page'],
+            ruled=options['ruled'],
+            flow=options['flow'],
+            missing_dates=options['missing_dates'],
+            missing_codes=options['missing_codes'],
+            seed=options['seed'],
+        )
+        statement = generate_statement(Path(options['path']), spec)
+        self.stdout.write(self.style.SUCCESS(
+            f'{statement.path}: {spec.pages} páginas, {len(statement.rows)} linhas, '
+            f'{min(spec.professionals, spec.pages)} profissionais'
+        ))
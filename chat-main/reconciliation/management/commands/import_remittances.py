@@ -0,0 +1,134 @@
+import glob
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reconciliation.models import RemittanceHeader
+from reconciliation.services import (
+    discard_unused_document,
+    file_sha256,
+    import_parsed_document,
+    parse_documents,
+    peek_header,
+    store_document,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa em lote os demonstrativos PDF de um diretório ou glob: parse em processos paralelos, "
+        "gravação atômica por arquivo e pulo de arquivos já importados (SHA-256 ou número do repasse)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Diretórios, arquivos PDF ou padrões glob (ex.: "extratos/2025-08/*.pdf").')
+        parser.add_argument('--recursive', action='store_true', help='Busca PDFs também nos subdiretórios.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processos de parse (padrão: RECONCILIATION_IMPORT_WORKERS).')
+        parser.add_argument('--dry-run', action='store_true', help='Só lista o que seria importado ou pulado.')
+
+    def _collect(self, patterns: list[str], recursive: bool) -> list[Path]:
+        files: dict[Path, None] = {}
+        for pattern in patterns:
+            path = Path(pattern)
+            if path.is_dir():
+                candidates = path.rglob('*') if recursive else path.glob('*')
+            elif path.exists():
+                candidates = [path]
+            else:
+                candidates = [Path(p) for p in glob.glob(pattern, recursive=recursive)]
+                if not candidates:
+                    self.stderr.write(self.style.WARNING(f'Nada encontrado para: {pattern}'))
+            for c in sorted(candidates):
+                if c.is_file() and c.suffix.lower() == '.pdf':
+                    files[c.resolve()] = None
+        return list(files)
+
+    def _pending(self, files: list[Path]) -> tuple[list[tuple[Path, str]], list[tuple[Path, str]]]:
+        """Separa (arquivo, sha256) a importar dos pulados, com o motivo."""
+        pending: list[tuple[Path, str]] = []
+        skipped: list[tuple[Path, str]] = []
+        hashes: dict[str, Path] = {}
+        repasses: dict[str, Path] = {}
+        for pdf_path in files:
+            digest = file_sha256(pdf_path)
+            if digest in hashes:
+                skipped.append((pdf_path, f'mesmo conteúdo de {hashes[digest].name}'))
+                continue
+            if RemittanceHeader.objects.filter(source_sha256=digest).exists():
+                skipped.append((pdf_path, 'arquivo já importado'))
+                continue
+            try:
+                repasse = peek_header(pdf_path).repasse_numero
+            except Exception as exc:  # PDF ilegível: reportado no parse
+                repasse = ''
+                self.stderr.write(self.style.WARNING(f'{pdf_path.name}: cabeçalho não lido ({exc})'))
+            if repasse:
+                if repasse in repasses:
+                    skipped.append((pdf_path, f'repasse {repasse} repetido ({repasses[repasse].name})'))
+                    continue
+                if RemittanceHeader.objects.filter(repasse_numero=repasse).exists():
+                    skipped.append((pdf_path, f'repasse {repasse} já registrado'))
+                    continue
+                repasses[repasse] = pdf_path
+            hashes[digest] = pdf_path
+            pending.append((pdf_path, digest))
+        return pending, skipped
+
+    def _persist(self, pdf_path: Path, digest: str, doc) -> tuple[list, float]:
+        start = time.perf_counter()
+        stored = store_document(pdf_path, sha256=digest)
+        try:
+            with transaction.atomic():
+                hdrs = import_parsed_document(doc, document=stored)
+        finally:
+            discard_unused_document(stored)
+        return hdrs, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        files = self._collect(options['paths'], options['recursive'])
+        if not files:
+            raise CommandError('Nenhum PDF encontrado.')
+
+        started = time.perf_counter()
+        pending, skipped = self._pending(files)
+        for pdf_path, reason in skipped:
+            self.stdout.write(f'SKIP {pdf_path.name}: {reason}')
+        if options['dry_run']:
+            for pdf_path, _ in pending:
+                self.stdout.write(f'NOVO {pdf_path.name}')
+            self.stdout.write(f'{len(pending)} a importar, {len(skipped)} pulados.')
+            return
+
+        workers = options['workers'] or getattr(settings, 'RECONCILIATION_IMPORT_WORKERS', 1) or 1
+        workers = max(1, min(workers, len(pending) or 1))
+        imported = failed = items_total = 0
+
+        digests = dict(pending)
+        for pdf_path, doc, parse_s, error in parse_documents(digests, workers=workers):
+            try:
+                if error is not None:
+                    raise error
+                hdrs, save_s = self._persist(pdf_path, digests[pdf_path], doc)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f'ERRO {pdf_path.name}: {exc}'))
+                continue
+            imported += 1
+            items_total += len(doc.items)
+            pages = doc.report.pages if doc.report else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'OK   {pdf_path.name}: {len(hdrs)} demonstrativo(s), {len(doc.items)} itens, {pages} páginas | '
+                f'parse {parse_s:.2f}s, gravação {save_s:.2f}s'
+            ))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{imported} importados, {len(skipped)} pulados, {failed} com erro; '
+            f'{items_total} itens em {elapsed:.1f}s ({workers} processo(s)).'
+        )
+        if failed:
+            raise CommandError(f'{failed} arquivo(s) não importado(s).')
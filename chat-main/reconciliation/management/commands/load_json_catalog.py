@@ -5,24 +5,7 @@ import json
 from pathlib import Path
 
 from reconciliation.models import PriceCatalog, ProcedurePrice
-
-
-def _digits(s: str) -> str:
-    return ''.join(ch for ch in str(s or '') if ch.isdigit())
-
-
-def _norm_text(s: str) -> str:
-    return ' '.join(str(s or '').strip().split())
-
-
-def _norm_categoria(s: str) -> str:
-    txt = (s or '').strip().upper()
-    if 'ENF' in txt:
-        return 'Enfermaria'
-    if 'APT' in txt or 'APART' in txt:
-        return 'Apartamento'
-    # Title-case fallback
-    return (s or '').strip().title()
+from reconciliation.normalization import norm_categoria, norm_digits, norm_spaces, norm_text
 
 
 class Command(BaseCommand):
@@ -74,15 +57,15 @@ class Command(BaseCommand):
 
         for obj in data:
             fields = obj.get('fields') or {}
-            convenio = _norm_text(fields.get('convenio') or '')
-            hospital_nome = _norm_text(fields.get('hospital_clinica') or '')
-            categoria = _norm_categoria(fields.get('acomodacao') or '')
+            convenio = norm_spaces(fields.get('convenio') or '')
+            hospital_nome = norm_spaces(fields.get('hospital_clinica') or '')
+            categoria = norm_categoria(fields.get('acomodacao') or '')
             codigo_original = str(fields.get('codigo_tuss') or '').strip()
-            codigo = _digits(codigo_original)
+            codigo = norm_digits(codigo_original)
             descricao = fields.get('descricao') or ''
             preco = parse_decimal(fields.get('valor_referencia'))
 
-            key = (codigo, convenio.lower(), categoria, hospital_nome.lower())
+            key = (codigo, norm_text(convenio), categoria, norm_text(hospital_nome))
             prev = best.get(key)
             if (prev is None) or (preco is not None and preco < prev['preco']):
                 best[key] = {
@@ -111,6 +94,9 @@ class Command(BaseCommand):
             )
             for v in best.values()
         ]
+        # bulk_create não passa pelo save(): preencher as chaves normalizadas aqui
+        for price in to_create:
+            price.fill_match_keys()
         with transaction.atomic():
             ProcedurePrice.objects.bulk_create(to_create, batch_size=500)
 
@@ -6,18 +6,10 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from reconciliation.models import PriceCatalog, ProcedurePrice
+from reconciliation.normalization import norm_code, norm_digits
 from decimal import Decimal, InvalidOperation
 
 
-def norm_code(code: str | None) -> str:
-    if not code:
-        return ""
-    s = str(code)
-    # Keep only digits for normalized lookup
-    digits = ''.join(ch for ch in s if ch.isdigit())
-    return digits or s.strip()
-
-
 def parse_money_any(val: Any) -> Decimal:
     """Parse a money value that may come in pt-BR (1.234,56), en-US (1,234.56),
     plain numbers (98.45) or strings with currency symbols. Returns a Decimal.
@@ -156,7 +148,7 @@ class Command(BaseCommand):
                 convenio = pick(row, 'convenio') or ''
                 categoria = pick(row, 'categoria') or ''
                 hosp_cnpj_raw = pick(row, 'hospital_cnpj') or ''
-                hosp_cnpj = ''.join(ch for ch in str(hosp_cnpj_raw) if ch.isdigit())
+                hosp_cnpj = norm_digits(hosp_cnpj_raw)
                 hosp_nome = pick(row, 'hospital_nome') or ''
                 funcao = pick(row, 'funcao') or ''
                 preco_val = pick(row, 'preco')
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from reconciliation.models import RemittanceHeader, StoredDocument
+from reconciliation.services import discard_unused_document, file_sha256, store_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Liga os headers importados antes do armazenamento por conteúdo ao StoredDocument do seu PDF "
+        "(um arquivo por conteúdo, em media/documents/). Opcionalmente apaga as cópias antigas por header."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-legacy', action='store_true',
+                            help='Apaga o arquivo em media/remittances/ de cada header já ligado a um documento.')
+        parser.add_argument('--prune', action='store_true',
+                            help='Remove documentos armazenados que nenhum header ou ImportJob referencia.')
+        parser.add_argument('--dry-run', action='store_true', help='Só mostra o que seria feito.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        linked = missing = 0
+        hashes: dict[str, str] = {}
+        qs = RemittanceHeader.objects.filter(document__isnull=True).exclude(original_file='').exclude(original_file=None)
+        for hdr in qs.order_by('id'):
+            path = Path(hdr.original_file.path)
+            try:
+                digest = hdr.source_sha256 or file_sha256(path)
+            except OSError as e:
+                missing += 1
+                self.stderr.write(self.style.WARNING(f'Header {hdr.id}: arquivo indisponível ({e}). Pulando.'))
+                continue
+            hashes.setdefault(digest, path.name)
+            if dry_run:
+                linked += 1
+                continue
+            stored = store_document(path, name=path.name, sha256=digest)
+            RemittanceHeader.objects.filter(id=hdr.id).update(document=stored, source_sha256=stored.sha256)
+            linked += 1
+        self.stdout.write(f'{linked} header(s) ligados a {len(hashes)} documento(s); {missing} sem arquivo.')
+
+        if options['delete_legacy']:
+            removed = 0
+            legacy = RemittanceHeader.objects.filter(document__isnull=False).exclude(original_file='').exclude(original_file=None)
+            for hdr in legacy.order_by('id'):
+                removed += 1
+                if not dry_run:
+                    hdr.original_file.delete(save=False)
+                    RemittanceHeader.objects.filter(id=hdr.id).update(original_file='')
+            self.stdout.write(f'{removed} cópia(s) antigas removidas.')
+
+        if options['prune']:
+            pruned = 0
+            for stored in StoredDocument.objects.filter(headers__isnull=True, import_jobs__isnull=True).distinct():
+                if dry_run or discard_unused_document(stored):
+                    pruned += 1
+            self.stdout.write(f'{pruned} documento(s) sem referência removidos.')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry-run: nada foi alterado.'))
@@ -0,0 +1,54 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation.models import RemittanceHeader
+from reconciliation.services import reconcile_headers
+
+
+class Command(BaseCommand):
+    help = (
+        "Concilia em lote os itens dos demonstrativos com o catálogo de preços (mesma consulta SQL "
+        "da tela consolidada) e mostra o resumo; opcionalmente grava as linhas em CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--competencia', type=str, help='Somente headers desta competência (ex.: 08/2025).')
+        parser.add_argument('--ids', type=str, help='IDs de headers separados por vírgula.')
+        parser.add_argument('--catalog', type=int, help='ID do catálogo (padrão: o mais recente).')
+        parser.add_argument('--csv', type=str, help='Arquivo CSV para as linhas conciliadas.')
+
+    def handle(self, *args, **options):
+        headers = RemittanceHeader.objects.all()
+        if options.get('competencia'):
+            headers = headers.filter(competencia=options['competencia'])
+        if options.get('ids'):
+            try:
+                ids = [int(x) for x in options['ids'].split(',') if x.strip()]
+            except ValueError:
+                raise CommandError('IDs inválidos.')
+            headers = headers.filter(id__in=ids)
+        if not headers.exists():
+            raise CommandError('Nenhum demonstrativo encontrado.')
+
+        start = time.perf_counter()
+        try:
+            result = reconcile_headers(headers, catalog=options.get('catalog'))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        s = result.summary
+        self.stdout.write(
+            f"Catálogo: {s['catalog']} | {s['total']} itens: {s['matched']} com preço, {s['diff']} com diferença, "
+            f"{s['missing']} sem preço | diferença absoluta {s['diff_value_abs']}, produzido sem preço "
+            f"{s['missing_produced']} ({elapsed:.2f}s)"
+        )
+        if options.get('csv'):
+            fieldnames = list(result.rows[0]) if result.rows else ['status']
+            with open(options['csv'], 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.DictWriter(fh, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(result.rows)
+            self.stdout.write(self.style.SUCCESS(f"{len(result.rows)} linhas gravadas em {options['csv']}"))
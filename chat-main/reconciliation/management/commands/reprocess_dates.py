@@ -1,17 +1,34 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from pathlib import Path
 
 from reconciliation.models import RemittanceHeader, RemittanceItem
-from reconciliation.services import parse_pdf
+from reconciliation.services import (
+    PARSER_VERSION,
+    build_remittance_items,
+    file_sha256,
+    items_for_headers,
+    pages_by_professional,
+    parse_documents,
+)
 
 
 class Command(BaseCommand):
-    help = "Reprocessa PDFs originais para atualizar datas dos itens (e demais campos caso necessário)."
+    help = (
+        "Reprocessa PDFs originais para atualizar datas dos itens (e demais campos caso necessário). "
+        "Cada arquivo é parseado uma única vez para todos os seus headers (um por profissional)."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument('--all', action='store_true', help='Reprocessa todos os headers, não apenas os que possuem itens sem data.')
         parser.add_argument('--ids', type=str, help='Lista de IDs de headers separados por vírgula para reprocessar.')
+        parser.add_argument('--parser-version', type=str,
+                            help='Somente headers importados com esta versão do parser ("none" = sem versão registrada).')
+        parser.add_argument('--outdated', action='store_true',
+                            help=f'Somente headers importados com versão diferente da atual ({PARSER_VERSION}).')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processos de parse (padrão: RECONCILIATION_IMPORT_WORKERS).')
 
     def handle(self, *args, **options):
         qs = RemittanceHeader.objects.all()
@@ -22,47 +39,70 @@ class Command(BaseCommand):
                 self.stderr.write(self.style.ERROR('IDs inválidos.'))
                 return
             qs = qs.filter(id__in=ids)
-        elif not options.get('all'):
+        version = options.get('parser_version')
+        if version is not None:
+            qs = qs.filter(parser_version='' if version.lower() == 'none' else version)
+        if options.get('outdated'):
+            qs = qs.exclude(parser_version=PARSER_VERSION)
+        if not (options.get('ids') or options.get('all') or version is not None or options.get('outdated')):
             # Somente com itens sem data
             qs = qs.filter(items__data__exact='').distinct()
 
-        total = qs.count()
+        headers = list(qs.select_related('document').order_by('id'))
+        total = len(headers)
         if total == 0:
             self.stdout.write(self.style.WARNING('Nenhum header para reprocessar.'))
             return
 
-        processed = 0
-        for hdr in qs.iterator():
-            if not hdr.original_file:
+        # Agrupa os headers pelo conteúdo do PDF (headers antigos têm cada um sua cópia do arquivo)
+        files: dict[str, list[RemittanceHeader]] = {}
+        paths: dict[Path, str] = {}
+        for hdr in headers:
+            if not hdr.source_file:
                 self.stderr.write(self.style.WARNING(f'Header {hdr.id} sem arquivo original. Pulando.'))
                 continue
-            pdf_path = Path(hdr.original_file.path)
+            pdf_path = Path(hdr.source_file.path)
             try:
-                parsed_header, items = parse_pdf(pdf_path)
-                # Mantemos os dados do header existente; apenas substituímos os itens
-                with transaction.atomic():
+                digest = hdr.source_sha256 or file_sha256(pdf_path)
+            except OSError as e:
+                self.stderr.write(self.style.WARNING(f'Header {hdr.id}: arquivo indisponível ({e}). Pulando.'))
+                continue
+            if digest not in files:
+                files[digest] = []
+                paths[pdf_path] = digest
+            files[digest].append(hdr)
+
+        workers = options['workers'] or getattr(settings, 'RECONCILIATION_IMPORT_WORKERS', 1) or 1
+        self.stdout.write(f'{total} headers em {len(files)} arquivo(s), {workers} processo(s).')
+
+        processed = 0
+        for pdf_path, doc, secs, error in parse_documents(paths, workers=workers):
+            digest = paths[pdf_path]
+            group = files[digest]
+            if error is not None:
+                ids_txt = ', '.join(str(h.id) for h in group)
+                self.stderr.write(self.style.ERROR(f'Falha ao reprocessar headers {ids_txt}: {error}'))
+                continue
+            assigned = items_for_headers(doc, group)
+            page_groups = pages_by_professional(doc)
+            report = doc.report.as_dict() if doc.report else None
+            with transaction.atomic():
+                for hdr in group:
+                    items = assigned.get(hdr.id)
+                    if items is None:
+                        self.stderr.write(self.style.WARNING(
+                            f'Header {hdr.id}: profissional "{hdr.profissional_nome}" não encontrado no PDF. Mantido.'
+                        ))
+                        continue
+                    # Mantemos os dados do header existente; apenas substituímos os itens
                     RemittanceItem.objects.filter(header=hdr).delete()
-                    RemittanceItem.objects.bulk_create([
-                        RemittanceItem(
-                            header=hdr,
-                            atendimento=i.atendimento,
-                            conta=i.conta,
-                            paciente=i.paciente,
-                            convenio=i.convenio,
-                            categoria=i.categoria,
-                            data=i.data,
-                            codigo=i.codigo,
-                            procedimento=i.procedimento,
-                            funcao=i.funcao,
-                            quantidade=i.quantidade,
-                            valor_produzido=i.valor_produzido,
-                            imposto=i.imposto,
-                            valor_liquido=i.valor_liquido,
-                        ) for i in items
-                    ])
-                processed += 1
-                self.stdout.write(self.style.SUCCESS(f'Reprocessado header {hdr.id} ({len(items)} itens).'))
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(f'Falha ao reprocessar header {hdr.id}: {e}'))
+                    RemittanceItem.objects.bulk_create(build_remittance_items(hdr, items))
+                    RemittanceHeader.objects.filter(id=hdr.id).update(
+                        parser_version=PARSER_VERSION, parse_report=report, source_sha256=digest,
+                        pages=page_groups.get((hdr.profissional_nome, hdr.especialidade), hdr.pages),
+                    )
+                    processed += 1
+                    self.stdout.write(self.style.SUCCESS(f'Reprocessado header {hdr.id} ({len(items)} itens).'))
+            self.stdout.write(f'  {pdf_path.name}: parse em {secs:.2f}s')
 
         self.stdout.write(self.style.SUCCESS(f'Concluído. {processed}/{total} headers reprocessados.'))
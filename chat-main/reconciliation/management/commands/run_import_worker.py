@@ -0,0 +1,62 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reconciliation.models import ImportJob
+from reconciliation.services import claim_import_job, requeue_stale_import_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de importações (ImportJob) criada pelo upload assíncrono. Vários workers "
+        "podem rodar em paralelo: cada job é reservado por um único worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa os jobs pendentes e sai.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos entre consultas à fila vazia.')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Encerra após N jobs (0 = sem limite).')
+        parser.add_argument('--stale-after', type=int, default=900,
+                            help='Devolve à fila jobs em execução sem progresso há N segundos (0 desativa); '
+                                 'os que esgotaram RECONCILIATION_IMPORT_MAX_ATTEMPTS são marcados como falhos.')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        processed = 0
+        self.stdout.write(f'Worker {worker} aguardando jobs...')
+        while True:
+            close_old_connections()
+            if options['stale_after']:
+                requeued = requeue_stale_import_jobs(options['stale_after'])
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'{requeued} job(s) parados devolvidos à fila.'))
+
+            job = claim_import_job(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            start = time.perf_counter()
+            token = job.claim_token
+            job = run_import_job(job)
+            elapsed = time.perf_counter() - start
+            processed += 1
+            if job.claim_token != token:
+                self.stdout.write(self.style.WARNING(
+                    f'PERDIDO job {job.id} {job.original_name}: reserva perdida (job devolvido à fila); resultado descartado'
+                ))
+            elif job.state == ImportJob.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f'OK   job {job.id} {job.original_name}: {len(job.header_ids)} demonstrativo(s), '
+                    f'{job.pages_total} páginas em {elapsed:.2f}s'
+                ))
+            else:
+                self.stderr.write(self.style.ERROR(f'ERRO job {job.id} {job.original_name}: {job.error}'))
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+        self.stdout.write(f'{processed} job(s) processado(s).')
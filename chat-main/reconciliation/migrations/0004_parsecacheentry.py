@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0003_remove_procedureprice_reconciliat_codigo_b21950_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParseCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('parser_version', models.CharField(max_length=32)),
+                ('payload', models.JSONField()),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('sha256', 'parser_version')},
+            },
+        ),
+    ]
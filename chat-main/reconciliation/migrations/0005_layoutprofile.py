@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0004_parsecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cnpj', models.CharField(max_length=32, unique=True)),
+                ('parser_version', models.CharField(max_length=32)),
+                ('strategy', models.CharField(choices=[('tables', 'Tabelas'), ('words', 'Palavras'), ('text', 'Texto')], max_length=16)),
+                ('header_fingerprint', models.CharField(blank=True, max_length=64)),
+                ('column_bounds', models.JSONField(blank=True, default=list)),
+                ('hits', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
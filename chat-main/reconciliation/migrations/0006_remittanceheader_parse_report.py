@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0005_layoutprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remittanceheader',
+            name='parse_report',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
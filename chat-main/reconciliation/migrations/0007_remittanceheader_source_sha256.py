@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0006_remittanceheader_parse_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remittanceheader',
+            name='source_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
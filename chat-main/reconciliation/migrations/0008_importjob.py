@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0007_remittanceheader_source_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('state', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Processando'), ('done', 'Concluído'), ('failed', 'Falhou')], default='queued', max_length=16)),
+                ('source_file', models.FileField(upload_to='import_jobs/')),
+                ('original_name', models.CharField(blank=True, max_length=256)),
+                ('source_sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('pages_done', models.PositiveIntegerField(default=0)),
+                ('pages_total', models.PositiveIntegerField(default=0)),
+                ('header_ids', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=128)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'created_at'], name='reconciliat_state_9c5800_idx')],
+            },
+        ),
+    ]
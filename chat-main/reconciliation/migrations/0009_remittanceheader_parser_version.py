@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0008_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remittanceheader',
+            name='parser_version',
+            field=models.CharField(blank=True, db_index=True, max_length=32),
+        ),
+    ]
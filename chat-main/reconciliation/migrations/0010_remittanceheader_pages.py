@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0009_remittanceheader_parser_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remittanceheader',
+            name='pages',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0010_remittanceheader_pages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to='documents/')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('original_name', models.CharField(blank=True, max_length=256)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='importjob',
+            name='source_file',
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='document',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='import_jobs', to='reconciliation.storeddocument'),
+        ),
+        migrations.AddField(
+            model_name='remittanceheader',
+            name='document',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='headers', to='reconciliation.storeddocument'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:19
+
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+def backfill_data_atendimento(apps, schema_editor):
+    # itens já importados: data_atendimento a partir do texto da data (ver backfill_service_dates)
+    from reconciliation.services import parse_service_date
+
+    RemittanceItem = apps.get_model('reconciliation', 'RemittanceItem')
+    qs = RemittanceItem.objects.exclude(data='').order_by('id')
+    last_id = 0
+    while True:
+        rows = list(qs.filter(id__gt=last_id).values_list('id', 'data', 'header__competencia')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        changed = []
+        for item_id, text, competencia in rows:
+            value = parse_service_date(text, competencia or '')
+            if value is not None:
+                changed.append(RemittanceItem(id=item_id, data_atendimento=value))
+        RemittanceItem.objects.bulk_update(changed, ['data_atendimento'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0011_storeddocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remittanceitem',
+            name='data_atendimento',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_data_atendimento, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+# modelo -> campos (codigo, convenio, categoria, cnpj) na ordem de match_keys (ver backfill_match_keys)
+MATCH_KEY_SOURCES = {
+    'RemittanceItem': ('codigo', 'convenio', 'categoria', 'header__cnpj'),
+    'ProcedurePrice': ('codigo', 'convenio', 'categoria', 'hospital_cnpj'),
+}
+
+
+def backfill_match_keys(apps, schema_editor):
+    # linhas já existentes: sem isto as colunas ficam '' e todo item casa com todo preço
+    from reconciliation.normalization import MATCH_KEY_FIELDS, match_keys
+
+    for model_name, sources in MATCH_KEY_SOURCES.items():
+        model = apps.get_model('reconciliation', model_name)
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', *sources)[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            changed = [model(id=row[0], **dict(zip(MATCH_KEY_FIELDS, match_keys(*row[1:])))) for row in rows]
+            model.objects.bulk_update(changed, list(MATCH_KEY_FIELDS), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0012_remittanceitem_data_atendimento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procedureprice',
+            name='categoria_norm',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='procedureprice',
+            name='codigo_norm',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='procedureprice',
+            name='convenio_norm',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='procedureprice',
+            name='hospital_cnpj_norm',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='remittanceitem',
+            name='categoria_norm',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='remittanceitem',
+            name='codigo_norm',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='remittanceitem',
+            name='convenio_norm',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='remittanceitem',
+            name='hospital_cnpj_norm',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='procedureprice',
+            index=models.Index(fields=['catalog', 'codigo_norm', 'convenio_norm', 'categoria_norm', 'hospital_cnpj_norm'], name='reconciliat_catalog_5ad51c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remittanceitem',
+            index=models.Index(fields=['codigo_norm', 'convenio_norm', 'categoria_norm'], name='reconciliat_codigo__1dac8c_idx'),
+        ),
+        migrations.RunPython(backfill_match_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0013_procedureprice_categoria_norm_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
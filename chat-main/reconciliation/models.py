@@ -1,5 +1,21 @@
 from django.db import models
 
+from .normalization import MATCH_KEY_FIELDS, match_keys
+
+
+class StoredDocument(models.Model):
+    """PDF armazenado uma única vez, endereçado pelo SHA-256 do conteúdo
+    (media/documents/ab/abcd....pdf). Todos os headers de um mesmo demonstrativo apontam para ele."""
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='documents/', max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    original_name = models.CharField(max_length=256, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.original_name or self.file.name} ({self.sha256[:12]})"
+
 
 class RemittanceHeader(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -14,11 +30,29 @@ class RemittanceHeader(models.Model):
     profissional_nome = models.CharField(max_length=256, blank=True)
     especialidade = models.CharField(max_length=128, blank=True)
 
+    # PDF de origem (compartilhado entre os headers do mesmo arquivo)
+    document = models.ForeignKey(StoredDocument, on_delete=models.PROTECT, related_name='headers', null=True, blank=True)
+    # Cópia por header, de importações anteriores ao StoredDocument (ver migrate_stored_documents)
     original_file = models.FileField(upload_to='remittances/', blank=True, null=True)
+    # SHA-256 do PDF de origem (importação em lote pula arquivos já importados)
+    source_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    # PARSER_VERSION usado na importação (vazio: importado antes do versionamento)
+    parser_version = models.CharField(max_length=32, blank=True, db_index=True)
+    # Páginas do PDF (1-based) deste profissional; o reprocessamento lê só essas páginas
+    pages = models.JSONField(default=list, blank=True)
+    # Relatório do parse (tempos por etapa, estratégia, contadores de fallback/backfill)
+    parse_report = models.JSONField(null=True, blank=True)
 
     def __str__(self) -> str:
         return f"REPASSE {self.repasse_numero} - {self.competencia} - {self.profissional_nome}"
 
+    @property
+    def source_file(self):
+        """Arquivo do PDF de origem: o documento compartilhado ou a cópia antiga do header."""
+        if self.document_id:
+            return self.document.file
+        return self.original_file
+
 
 class RemittanceItem(models.Model):
     header = models.ForeignKey(RemittanceHeader, on_delete=models.CASCADE, related_name='items')
@@ -29,6 +63,8 @@ class RemittanceItem(models.Model):
     convenio = models.CharField(max_length=128, blank=True)
     categoria = models.CharField(max_length=64, blank=True)
     data = models.CharField(max_length=32, blank=True)
+    # data acima como date (ano da competência quando o PDF traz só dd/mm); filtros e aging usam este campo
+    data_atendimento = models.DateField(null=True, blank=True, db_index=True)
     codigo = models.CharField(max_length=64, blank=True)
     procedimento = models.CharField(max_length=512, blank=True)
     funcao = models.CharField(max_length=128, blank=True)
@@ -37,9 +73,32 @@ class RemittanceItem(models.Model):
     imposto = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     valor_liquido = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
 
+    # Chaves de casamento com ProcedurePrice (reconciliation.normalization); CNPJ vem do header
+    codigo_norm = models.CharField(max_length=64, blank=True)
+    convenio_norm = models.CharField(max_length=128, blank=True)
+    categoria_norm = models.CharField(max_length=64, blank=True)
+    hospital_cnpj_norm = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["codigo_norm", "convenio_norm", "categoria_norm"]),
+        ]
+
     def __str__(self) -> str:
         return f"{self.data} {self.paciente} {self.codigo} {self.procedimento}"
 
+    def fill_match_keys(self, hospital_cnpj: str | None = None) -> None:
+        if hospital_cnpj is None:
+            hospital_cnpj = self.header.cnpj if self.header_id else ''
+        keys = match_keys(self.codigo, self.convenio, self.categoria, hospital_cnpj)
+        for name, value in zip(MATCH_KEY_FIELDS, keys):
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.fill_match_keys()
+        _extend_update_fields(kwargs, ('codigo', 'convenio', 'categoria'))
+        super().save(*args, **kwargs)
+
 
 # -------------------- Price catalog for reconciliation --------------------
 class PriceCatalog(models.Model):
@@ -78,10 +137,17 @@ class ProcedurePrice(models.Model):
 
     metadata = models.JSONField(blank=True, null=True)
 
+    # Chaves de casamento com RemittanceItem (reconciliation.normalization), preenchidas no save
+    codigo_norm = models.CharField(max_length=64, blank=True)
+    convenio_norm = models.CharField(max_length=128, blank=True)
+    categoria_norm = models.CharField(max_length=64, blank=True)
+    hospital_cnpj_norm = models.CharField(max_length=32, blank=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["codigo", "convenio", "hospital_cnpj", "categoria"]),
             models.Index(fields=["catalog", "codigo", "convenio", "hospital_cnpj", "categoria"]),
+            models.Index(fields=["catalog", "codigo_norm", "convenio_norm", "categoria_norm", "hospital_cnpj_norm"]),
         ]
         unique_together = (
             ("catalog", "codigo", "convenio", "hospital_cnpj", "categoria", "vigencia_inicio", "vigencia_fim"),
@@ -92,3 +158,105 @@ class ProcedurePrice(models.Model):
         hosp = f" @{self.hospital_cnpj}" if self.hospital_cnpj else ""
         cat = f" [{self.categoria}]" if self.categoria else ""
         return f"{self.codigo}{conv}{cat}{hosp} - {self.descricao[:50]}"
+
+    def fill_match_keys(self) -> None:
+        keys = match_keys(self.codigo, self.convenio, self.categoria, self.hospital_cnpj)
+        for name, value in zip(MATCH_KEY_FIELDS, keys):
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.fill_match_keys()
+        _extend_update_fields(kwargs, ('codigo', 'convenio', 'categoria', 'hospital_cnpj'))
+        super().save(*args, **kwargs)
+
+
+def _extend_update_fields(kwargs: dict, sources: tuple[str, ...]) -> None:
+    """save(update_fields=...) que altera um campo de origem também grava as chaves normalizadas."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and set(update_fields) & set(sources):
+        kwargs['update_fields'] = list(dict.fromkeys([*update_fields, *MATCH_KEY_FIELDS]))
+
+
+# -------------------- Cache de resultados de parse --------------------
+class ParseCacheEntry(models.Model):
+    """Resultado serializado de parse_pdf, indexado pelo SHA-256 do PDF e pela versão do parser."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    sha256 = models.CharField(max_length=64)
+    parser_version = models.CharField(max_length=32)
+    payload = models.JSONField()
+    size_bytes = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (("sha256", "parser_version"),)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} (parser {self.parser_version})"
+
+
+class LayoutProfile(models.Model):
+    """Layout aprendido por hospital (CNPJ do demonstrativo), aplicado direto no parse
+    enquanto a impressão digital do cabeçalho coincidir."""
+    STRATEGY_CHOICES = [
+        ("tables", "Tabelas"),
+        ("words", "Palavras"),
+        ("text", "Texto"),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    cnpj = models.CharField(max_length=32, unique=True)
+    parser_version = models.CharField(max_length=32)
+    strategy = models.CharField(max_length=16, choices=STRATEGY_CHOICES)
+    header_fingerprint = models.CharField(max_length=64, blank=True)
+    # [[x_esquerda, x_direita, campo], ...] do modo palavras
+    column_bounds = models.JSONField(default=list, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.cnpj} ({self.strategy})"
+
+
+class ImportJob(models.Model):
+    """Importação de demonstrativo em segundo plano (upload assíncrono), executada pelo
+    comando run_import_worker; a página de upload consulta o andamento via JSON."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATE_CHOICES = [
+        (QUEUED, "Na fila"),
+        (RUNNING, "Processando"),
+        (DONE, "Concluído"),
+        (FAILED, "Falhou"),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default=QUEUED)
+    # PDF enviado (armazenado uma vez por conteúdo)
+    document = models.ForeignKey(StoredDocument, on_delete=models.PROTECT, related_name='import_jobs')
+    original_name = models.CharField(max_length=256, blank=True)
+    source_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+
+    pages_done = models.PositiveIntegerField(default=0)
+    pages_total = models.PositiveIntegerField(default=0)
+    # IDs dos RemittanceHeader criados (um por profissional)
+    header_ids = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=128, blank=True)
+    # Token da reserva atual: o worker só grava o resultado enquanto o job ainda tiver o seu token
+    claim_token = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "created_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.original_name or self.document.file.name} ({self.state})"
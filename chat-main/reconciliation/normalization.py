@@ -0,0 +1,50 @@
+"""Normalização das chaves de casamento entre itens do demonstrativo e preços do catálogo.
+
+As mesmas funções preenchem as colunas ``*_norm`` de RemittanceItem e ProcedurePrice (na
+importação, no save e no comando backfill_match_keys) e são usadas por views, services e
+loaders: um item e um preço casam quando as colunas normalizadas são iguais.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+
+def norm_digits(s) -> str:
+    """Somente os dígitos (CNPJ, códigos TUSS)."""
+    return ''.join(ch for ch in str(s or '') if ch.isdigit())
+
+
+def norm_spaces(s) -> str:
+    """Sem espaços nas pontas e com espaços internos colapsados (texto para exibição)."""
+    return ' '.join(str(s or '').split())
+
+
+def norm_text(s) -> str:
+    """Chave de texto: espaços colapsados e minúsculas (convênio, hospital)."""
+    return norm_spaces(s).lower()
+
+
+def norm_code(s) -> str:
+    """Código do procedimento: só dígitos; sem nenhum dígito, o texto original aparado."""
+    digits = norm_digits(s)
+    return digits or str(s or '').strip()
+
+
+def norm_categoria(s) -> str:
+    """Acomodação canônica: Enfermaria/Apartamento pelas abreviações usuais, demais em title-case."""
+    txt = norm_spaces(s)
+    upper = txt.upper()
+    if 'ENF' in upper:
+        return 'Enfermaria'
+    if 'APT' in upper or 'APART' in upper:
+        return 'Apartamento'
+    return txt.title()
+
+
+@lru_cache(maxsize=16384)
+def match_keys(codigo, convenio, categoria, hospital_cnpj) -> tuple[str, str, str, str]:
+    """(codigo_norm, convenio_norm, categoria_norm, hospital_cnpj_norm) dos valores brutos."""
+    return norm_code(codigo), norm_text(convenio), norm_categoria(categoria), norm_digits(hospital_cnpj)
+
+
+MATCH_KEY_FIELDS = ('codigo_norm', 'convenio_norm', 'categoria_norm', 'hospital_cnpj_norm')
@@ -1,15 +1,48 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, astuple, dataclass, field, fields
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import Iterable, List, Tuple
-
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import numpy as np
 import pandas as pd
 import pdfplumber
 import re
+import sys
+import tempfile
+import time
 import unicodedata
+import uuid
+
+from .normalization import MATCH_KEY_FIELDS, match_keys
 
 # Models serão importados dentro de funções que persistem dados para permitir uso de parse_* sem Django settings
 
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str, default):
+    """Lê um setting do Django quando configurado; caso contrário usa o default."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
+
 
 def _norm(s: str | None) -> str:
     return " ".join(str(s).split()) if s is not None else ""
@@ -84,81 +117,133 @@ def _find_date(text: str) -> str:
 monetary_re = re.compile(r"\b\d{1,3}(?:\.\d{3})*,\d{2}\b")
 
 
+# ---- Tokenização de linha ---------------------------------------------------
+_TOKEN_RE = re.compile(r"\S+")
+_QUANTITY_TOKEN_RE = re.compile(r"\d{1,2}(?:\.\d{1,2})?")
+_TRAILING_QTY_RE = re.compile(r"(\d{1,3})(?:\s*)$")
+
+# Linhas distintas mantidas no cache de tokenização
+LINE_TOKEN_CACHE_SIZE = 8192
+
+
+@dataclass(frozen=True)
+class LineToken:
+    text: str
+    start: int
+    # 'date' | 'money' | 'quantity' | 'code' (candidato: 5 a 12 dígitos) | 'text'
+    kind: str
+    digits: str = ''
+
+
+@dataclass(frozen=True)
+class LineTokens:
+    """Linha classificada uma única vez: tokens com posição, data, valores e quantidade."""
+    text: str
+    tokens: tuple[LineToken, ...]
+    date: str
+    # valores monetários (pt-BR) na ordem em que aparecem
+    amounts: tuple[str, ...]
+    # token numérico imediatamente antes do antepenúltimo valor (produzido)
+    quantity: str
+    # todos os dígitos da linha
+    digits: str
+
+    def code_candidate(self, excludes: set[str] | frozenset[str] = frozenset()) -> str:
+        """Token com 5 a 12 dígitos após a data (ou na linha toda), preferindo o mais longo."""
+        tokens = self.tokens
+        if self.date:
+            di = next((i for i, tok in enumerate(tokens) if tok.text == self.date), -1)
+            if di != -1:
+                tokens = tokens[di + 1:]
+        candidates = [
+            tok.digits for tok in tokens
+            if tok.kind == 'code' and tok.text not in excludes and tok.digits not in excludes
+        ]
+        candidates.sort(key=lambda x: (-len(x)))
+        return candidates[0] if candidates else ''
+
+    def slice_between(self, code: str, amount: str) -> str | None:
+        """Texto entre a primeira ocorrência do código e a última do valor (procedimento)."""
+        try:
+            left = self.text.index(code) + len(code)
+        except ValueError:
+            return None
+        return _norm(self.text[left:self.text.rfind(amount)])
+
+
+def _token_kind(tok: str) -> tuple[str, str]:
+    # sem dígitos não pode ser data, valor, quantidade nem código
+    if not any(ch.isdigit() for ch in tok):
+        return 'text', ''
+    if DATE_DMY_RE.search(tok) or DATE_YMD_RE.search(tok):
+        return 'date', ''
+    if monetary_re.fullmatch(tok):
+        return 'money', ''
+    # quantities tend to be small integers or x,xx
+    if _QUANTITY_TOKEN_RE.fullmatch(tok.replace(',', '.').replace('\xa0', '').strip()):
+        return 'quantity', ''
+    # Work with digits-only to avoid tokens like '2º' e afins
+    digits = ''.join(ch for ch in tok if ch.isdigit())
+    if 5 <= len(digits) <= 12:
+        return 'code', digits
+    return 'text', ''
+
+
+@lru_cache(maxsize=LINE_TOKEN_CACHE_SIZE)
+def tokenize_line(text: str) -> LineTokens:
+    """Classifica cada token da linha (data, valor, quantidade, candidato a código, texto).
+    O resultado é imutável e memorizado por texto de linha, de modo que os vários
+    fallbacks que examinam a mesma linha não repetem o trabalho de regex.
+    """
+    tokens = []
+    for m in _TOKEN_RE.finditer(text):
+        kind, digits = _token_kind(m.group())
+        tokens.append(LineToken(m.group(), m.start(), kind, digits))
+    amounts = tuple(monetary_re.findall(text))
+    quantity = ''
+    if len(amounts) >= 3:
+        # qty: token before produzido
+        pre = text.rsplit(amounts[-3], 1)[0]
+        mqty = _TRAILING_QTY_RE.search(pre.strip())
+        if mqty:
+            quantity = mqty.group(1)
+    return LineTokens(
+        text=text,
+        tokens=tuple(tokens),
+        date=_find_date(text),
+        amounts=amounts,
+        quantity=quantity,
+        digits=''.join(ch for ch in text if ch.isdigit()),
+    )
+
+
 def parse_line_fallback(text: str, *, excludes: Iterable[str] | None = None) -> dict[str, str | float | None]:
     """Best-effort extraction from a flat line: date, code, procedure, qty and amounts.
     Returns a possibly partial dict with keys among: data, codigo, procedimento, quantidade, valor_produzido, imposto, valor_liquido.
     """
     res: dict[str, str | float | None] = {}
     excludes_set = { _norm(e) for e in (excludes or []) if _norm(e) }
+    line = tokenize_line(text)
     # date
-    d = _find_date(text)
-    if d:
-        res['data'] = d
+    if line.date:
+        res['data'] = line.date
     # amounts: take the last three as produzido, imposto, liquido
-    amts = monetary_re.findall(text)
+    amts = line.amounts
     if len(amts) >= 3:
         res['valor_produzido'] = _ptbr_to_decimal(amts[-3])
         res['imposto'] = _ptbr_to_decimal(amts[-2])
         res['valor_liquido'] = _ptbr_to_decimal(amts[-1])
-        # qty: token before produzido
-        pre = text.rsplit(amts[-3], 1)[0]
-        mqty = re.search(r"(\d{1,3})(?:\s*)$", pre.strip())
-        if mqty:
-            res['quantidade'] = _ptbr_to_decimal(mqty.group(1))
+        if line.quantity:
+            res['quantidade'] = _ptbr_to_decimal(line.quantity)
     # code: choose a token with digits after date, excluding atendimento/conta and obvious non-codes
-    parts = text.split()
-    code = ''
-    if 'data' in res:
-        try:
-            di = parts.index(res['data'])
-        except ValueError:
-            di = -1
-    else:
-        di = -1
-    span = parts[di+1:] if di != -1 else parts
-
-    def looks_like_date(tok: str) -> bool:
-        return bool(DATE_DMY_RE.search(tok) or DATE_YMD_RE.search(tok))
-
-    def looks_like_money(tok: str) -> bool:
-        return bool(monetary_re.fullmatch(tok))
-
-    def is_quantity_like(tok: str) -> bool:
-        # quantities tend to be small integers or x,xx
-        t = tok.replace(',', '.').replace('\xa0', '').strip()
-        return bool(re.fullmatch(r"\d{1,2}(?:\.\d{1,2})?", t))
-
-    candidates: List[str] = []
-    for tok in span:
-        t = _norm(tok)
-        if not t:
-            continue
-        if t in excludes_set:
-            continue
-        if looks_like_date(t) or looks_like_money(t) or is_quantity_like(t):
-            continue
-        if any(ch.isdigit() for ch in t):
-            # Work with digits-only to avoid tokens like '2º' e afins
-            digits_only = ''.join(ch for ch in t if ch.isdigit())
-            if 5 <= len(digits_only) <= 12 and digits_only not in excludes_set:
-                candidates.append(digits_only)
-    # Prefer longer numeric-ish tokens (procedure codes) but cap at 12
-    candidates = [c for c in candidates if len(c) <= 12]
-    candidates.sort(key=lambda x: (-len(x)))
-    if candidates:
-        code = candidates[0]
+    code = line.code_candidate(excludes_set)
     if code:
         res['codigo'] = code
     # procedimento: between code and last amount
     if code and len(amts) >= 1:
-        rightmost = amts[-1]
-        try:
-            left = text.index(code) + len(code)
-            right = text.rfind(rightmost)
-            proc = _norm(text[left:right])
+        proc = line.slice_between(code, amts[-1])
+        if proc is not None:
             res['procedimento'] = proc
-        except ValueError:
-            pass
     return res
 
 
@@ -173,7 +258,11 @@ class ParsedHeader:
     especialidade: str = ""
 
 
-@dataclass
+# Campos de baixa cardinalidade internados em ParsedItem
+_INTERNED_FIELDS = ('convenio', 'categoria', 'funcao')
+
+
+@dataclass(slots=True)
 class ParsedItem:
     atendimento: str = ""
     conta: str = ""
@@ -190,51 +279,490 @@ class ParsedItem:
     valor_liquido: float | None = None
     page: int = 0
 
+    def __post_init__(self):
+        # poucos valores distintos por demonstrativo: cada linha passa a apontar para a mesma string
+        for name in _INTERNED_FIELDS:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
+
+_ITEM_FIELDS = [f.name for f in fields(ParsedItem)]
+_ITEM_GETTER = attrgetter(*_ITEM_FIELDS)
+
+
+@dataclass
+class ParseReport:
+    """Tempos por etapa e contadores de um parse (gravado em RemittanceHeader.parse_report)."""
+    backend: str = ""
+    pages: int = 0
+    rows_scanned: int = 0
+    # estratégia vencedora: tables | words | text (ou streaming)
+    strategy: str = ""
+    profile_applied: bool = False
+    fallback_rows: int = 0
+    items: int = 0
+    dates_from_signature: int = 0
+    dates_from_lines: int = 0
+    undated_items: int = 0
+    cached: bool = False
+    total_seconds: float = 0.0
+    # etapa -> segundos (acumulado)
+    stages: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0.0) + time.perf_counter() - start, 4)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# Relatório do parse em andamento (contadores incrementados pelos parsers de baixo nível)
+_ACTIVE_REPORT: ContextVar[ParseReport | None] = ContextVar('reconciliation_parse_report', default=None)
+
+
+def _report_count(name: str, n: int = 1) -> None:
+    report = _ACTIVE_REPORT.get()
+    if report is not None:
+        setattr(report, name, getattr(report, name) + n)
+
+
+@contextmanager
+def _report_stage(name: str) -> Iterator[None]:
+    report = _ACTIVE_REPORT.get()
+    if report is None:
+        yield
+        return
+    with report.stage(name):
+        yield
+
+
+@dataclass
+class ParsedDocument:
+    """Resultado completo do parse de um PDF, pronto para persistência."""
+    header: ParsedHeader
+    items: list[ParsedItem]
+    # página -> (profissional_nome, especialidade), conforme detect_professionals_by_page
+    page_professionals: dict[int, tuple[str, str]] = field(default_factory=dict)
+    report: ParseReport | None = None
 
-def extract_pdf_dataframe(pdf_path: Path) -> pd.DataFrame:
+
+@dataclass
+class LayoutHint:
+    """Perfil de layout de um hospital (ver LayoutProfile): estratégia vencedora, impressão
+    digital do cabeçalho e fronteiras x das colunas (modo palavras)."""
+    strategy: str
+    header_fingerprint: str = ""
+    column_bounds: list = field(default_factory=list)
+
+
+# ---- Layout compartilhado do documento ----------------------------------------
+# Parâmetros de extract_words usados pelo cabeçalho/profissionais e pelo parser por palavras
+HEADER_WORDS_KW = {'x_tolerance': 3, 'y_tolerance': 3}
+ITEM_WORDS_KW = {'x_tolerance': 2, 'y_tolerance': 2, 'keep_blank_chars': False}
+
+# Abaixo disso o custo de subir processos supera o ganho da extração paralela
+PARALLEL_MIN_PAGES = 8
+
+# Backends de extração: pdfplumber (tudo) ou pdfium (texto e palavras; tabelas seguem no pdfplumber)
+PDF_BACKENDS = ('pdfplumber', 'pdfium')
+# Tolerâncias usadas pelo extract_text do pdfplumber, reproduzidas no texto montado pelo pdfium
+TEXT_WORDS_KW = {'x_tolerance': 3, 'y_tolerance': 3}
+
+
+def _words_key(page_no: int, kwargs: dict) -> tuple:
+    return (page_no, tuple(sorted(kwargs.items())))
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int, text_layer: bool = True) -> list[tuple[int, dict]]:
+    """Extrai (em um processo do pool) palavras, texto e tabelas das páginas [start, stop).
+    text_layer=False extrai só as tabelas (palavras/texto vêm do pdfium no processo principal).
+    """
+    out: list[tuple[int, dict]] = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_no in range(start, stop):
+            page = pdf.pages[page_no - 1]
+            data = {
+                'width': float(page.width),
+                'tables': page.extract_tables() or [],
+            }
+            if text_layer:
+                data.update({
+                    'header_words': page.extract_words(**HEADER_WORDS_KW) or [],
+                    'item_words': page.extract_words(**ITEM_WORDS_KW) or [],
+                    'text': page.extract_text() or '',
+                })
+            out.append((page_no, data))
+            # libera os objetos de layout da página já extraída
+            page.close()
+    return out
+
+
+def _pdfium_page_chars(pdf, page_no: int) -> list[dict]:
+    """Caracteres da página (pypdfium2) no formato do pdfplumber: text, x0, x1, top, bottom."""
+    page = pdf[page_no - 1]
+    textpage = page.get_textpage()
+    try:
+        height = float(page.get_height())
+        n = textpage.count_chars()
+        text = textpage.get_text_range()
+        if len(text) != n:
+            # pares substitutos (UTF-16) desalinham índices: lê caractere a caractere
+            text = ''.join(textpage.get_text_range(i, 1) or ' ' for i in range(n))
+        chars = []
+        for i, ch in enumerate(text):
+            if ch in '\r\n':
+                continue
+            left, bottom, right, top = textpage.get_charbox(i, loose=True)
+            chars.append({'text': ch, 'x0': left, 'x1': right, 'top': height - top, 'bottom': height - bottom})
+        return chars
+    finally:
+        textpage.close()
+        page.close()
+
+
+def _cluster_tops(objs: list[dict], tolerance: float) -> list[list[dict]]:
+    """Agrupa objetos em linhas pelo 'top' (mesma regra de cluster_objects do pdfplumber)."""
+    tops = sorted({o['top'] for o in objs})
+    cluster_of: dict[float, int] = {}
+    cluster = -1
+    last = None
+    for t in tops:
+        if last is None or t > last + tolerance:
+            cluster += 1
+        cluster_of[t] = cluster
+        last = t
+    lines: list[list[dict]] = [[] for _ in range(cluster + 1)]
+    for o in objs:
+        lines[cluster_of[o['top']]].append(o)
+    return lines
+
+
+def _chars_to_words(chars: list[dict], x_tolerance: float = 3, y_tolerance: float = 3,
+                    keep_blank_chars: bool = False) -> list[dict]:
+    """Equivalente ao extract_words do pdfplumber (texto horizontal, esquerda para direita)."""
+    words: list[dict] = []
+
+    def flush(word: list[dict]) -> None:
+        if word:
+            words.append({
+                'text': ''.join(c['text'] for c in word),
+                'x0': min(c['x0'] for c in word),
+                'x1': max(c['x1'] for c in word),
+                'top': min(c['top'] for c in word),
+                'bottom': max(c['bottom'] for c in word),
+            })
+
+    for line in _cluster_tops(chars, y_tolerance):
+        word: list[dict] = []
+        for ch in sorted(line, key=lambda c: c['x0']):
+            if not keep_blank_chars and ch['text'].isspace():
+                flush(word)
+                word = []
+            elif word and (ch['x0'] < word[-1]['x0'] or ch['x0'] > word[-1]['x1'] + x_tolerance
+                           or ch['top'] > word[-1]['top'] + y_tolerance):
+                flush(word)
+                word = [ch]
+            else:
+                word.append(ch)
+        flush(word)
+    return words
+
+
+def _words_to_text(words: list[dict], y_tolerance: float = 3) -> str:
+    """Texto da página a partir das palavras: uma linha por faixa de 'top', palavras separadas por espaço."""
+    lines = _cluster_tops(words, y_tolerance)
+    return '\n'.join(' '.join(w['text'] for w in sorted(line, key=lambda w: w['x0'])) for line in lines if line)
+
+
+class PdfLayout:
+    """Abre o PDF uma única vez e memoriza, por página, o resultado de
+    extract_words/extract_text/extract_tables.
+
+    Todas as estratégias de parse, a leitura do cabeçalho e a detecção de
+    profissionais recebem o mesmo PdfLayout, de modo que cada página é
+    extraída no máximo uma vez por combinação de parâmetros.
+
+    ``pages`` restringe o documento a um subconjunto de páginas (1-based), p.ex. as
+    páginas de um profissional no reprocessamento; o cabeçalho continua vindo da página 1.
+    """
+
+    def __init__(self, pdf_path: Path | str, backend: str | None = None, pages: Iterable[int] | None = None):
+        self.path = Path(pdf_path)
+        self._pdf = pdfplumber.open(self.path)
+        self._subset: list[int] | None = None
+        if pages is not None:
+            self._subset = sorted({int(p) for p in pages if 1 <= int(p) <= len(self._pdf.pages)})
+        # texto/palavras via pdfium quando selecionado (default: settings.RECONCILIATION_PDF_BACKEND)
+        self.backend = backend or _setting('RECONCILIATION_PDF_BACKEND', 'pdfplumber')
+        if self.backend not in PDF_BACKENDS:
+            raise ValueError(f'backend de PDF desconhecido: {self.backend}')
+        self._pdfium = None
+        self._chars: dict[int, list[dict]] = {}
+        self._words: dict[tuple, list[dict]] = {}
+        self._text: dict[int, str] = {}
+        self._tables: dict[int, list] = {}
+        self._widths: dict[int, float] = {}
+        # progress(páginas_lidas, total): chamado quando a extração avança para uma página nova
+        self.progress: Callable[[int, int], None] | None = None
+        self._pages_seen = 0
+
+    def _advance(self, page_no: int) -> None:
+        done = page_no if self._subset is None else bisect_right(self._subset, page_no)
+        if done > self._pages_seen:
+            self._pages_seen = done
+            if self.progress is not None:
+                self.progress(done, len(self.page_numbers))
+
+    def __enter__(self) -> "PdfLayout":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._pdfium is not None:
+            self._pdfium.close()
+            self._pdfium = None
+
+    def _pdfium_doc(self):
+        if self._pdfium is None:
+            import pypdfium2
+            self._pdfium = pypdfium2.PdfDocument(str(self.path))
+        return self._pdfium
+
+    def _pdfium_chars(self, page_no: int) -> list[dict] | None:
+        """Caracteres da página via pdfium; None se o pdfium falhar (segue com pdfplumber)."""
+        if page_no not in self._chars:
+            try:
+                self._chars[page_no] = _pdfium_page_chars(self._pdfium_doc(), page_no)
+            except Exception:
+                self.backend = 'pdfplumber'
+                return None
+        return self._chars[page_no]
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages)
+
+    @property
+    def page_numbers(self) -> Sequence[int]:
+        """Números de página (1-based) na ordem do documento (ou do subconjunto selecionado)."""
+        if self._subset is not None:
+            return self._subset
+        return range(1, self.page_count + 1)
+
+    def page(self, page_no: int):
+        return self._pdf.pages[page_no - 1]
+
+    def width(self, page_no: int) -> float:
+        if page_no not in self._widths:
+            self._widths[page_no] = float(self.page(page_no).width)
+        return self._widths[page_no]
+
+    def words(self, page_no: int, **kwargs) -> list[dict]:
+        key = _words_key(page_no, kwargs)
+        if key not in self._words:
+            self._advance(page_no)
+            chars = self._pdfium_chars(page_no) if self.backend == 'pdfium' else None
+            if chars is not None:
+                self._words[key] = _chars_to_words(chars, **kwargs)
+            else:
+                self._words[key] = self.page(page_no).extract_words(**kwargs) or []
+        return self._words[key]
+
+    def text(self, page_no: int) -> str:
+        if page_no not in self._text:
+            self._advance(page_no)
+            if self.backend == 'pdfium' and self._pdfium_chars(page_no) is not None:
+                self._text[page_no] = _words_to_text(self.words(page_no, **TEXT_WORDS_KW))
+            else:
+                self._text[page_no] = self.page(page_no).extract_text() or ''
+        return self._text[page_no]
+
+    def tables(self, page_no: int) -> list:
+        if page_no not in self._tables:
+            self._advance(page_no)
+            self._tables[page_no] = self.page(page_no).extract_tables() or []
+        return self._tables[page_no]
+
+    def has_rulings(self, page_no: int) -> bool:
+        """Se a página tem traços/retângulos vetoriais. Sem eles o extract_tables (estratégia
+        de linhas) não encontra tabela; com o pdfium a checagem não monta o layout do pdfplumber."""
+        if self.backend == 'pdfium':
+            try:
+                import pypdfium2.raw as pdfium_c
+                page = self._pdfium_doc()[page_no - 1]
+                try:
+                    return any(True for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)))
+                finally:
+                    page.close()
+            except Exception:
+                pass
+        return bool(self.page(page_no).edges)
+
+    def release(self, page_no: int) -> None:
+        """Descarta as extrações memorizadas da página e os objetos de layout do pdfplumber."""
+        for key in [k for k in self._words if k[0] == page_no]:
+            del self._words[key]
+        self._text.pop(page_no, None)
+        self._tables.pop(page_no, None)
+        self._widths.pop(page_no, None)
+        self._chars.pop(page_no, None)
+        if self._pdf is not None:
+            self.page(page_no).close()
+
+    def prefetch(self, workers: int, chunk_size: int | None = None) -> None:
+        """Extrai todas as páginas em paralelo (ProcessPoolExecutor) e preenche a memória.
+
+        As páginas são divididas em faixas contíguas; os resultados são mesclados
+        por número de página, então os passos com estado (fill-down de datas,
+        propagação de profissional) continuam percorrendo o documento em ordem.
+        """
+        pages = [p for p in self.page_numbers if p not in self._tables]
+        if workers <= 1 or len(pages) < PARALLEL_MIN_PAGES:
+            return
+        if not chunk_size:
+            # ~4 faixas por worker equilibra páginas pesadas sem excesso de overhead
+            chunk_size = max(2, -(-len(pages) // (workers * 4)))
+        ranges: list[tuple[int, int]] = []
+        for i in range(0, len(pages), chunk_size):
+            # faixas [start, stop) contíguas: subconjuntos de páginas podem ter lacunas
+            chunk = pages[i:i + chunk_size]
+            start = prev = chunk[0]
+            for p in chunk[1:]:
+                if p != prev + 1:
+                    ranges.append((start, prev + 1))
+                    start = p
+                prev = p
+            ranges.append((start, prev + 1))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            text_layer = self.backend != 'pdfium'
+            futures = [
+                ex.submit(_extract_page_range, str(self.path), start, stop, text_layer)
+                for start, stop in ranges
+            ]
+            for fut in futures:
+                for page_no, data in fut.result():
+                    self._advance(page_no)
+                    self._widths[page_no] = data['width']
+                    self._tables[page_no] = data['tables']
+                    if text_layer:
+                        self._words[_words_key(page_no, HEADER_WORDS_KW)] = data['header_words']
+                        self._words[_words_key(page_no, ITEM_WORDS_KW)] = data['item_words']
+                        self._text[page_no] = data['text']
+
+
+@contextmanager
+def open_layout(source: PdfLayout | Path | str, backend: str | None = None) -> Iterator[PdfLayout]:
+    """Reaproveita um PdfLayout já aberto ou abre um novo (fechado ao sair)."""
+    if isinstance(source, PdfLayout):
+        yield source
+        return
+    with PdfLayout(source, backend=backend) as layout:
+        yield layout
+
+
+def _page_table_rows(layout: PdfLayout, page_index: int) -> list[dict]:
+    """Linhas (dicts page/table/cN) das tabelas de uma página, com texto normalizado."""
+    rows = []
+    for t_index, table in enumerate(layout.tables(page_index)):
+        for row in table or []:
+            cells = [
+                _norm(cell) if cell is not None else ''
+                for cell in row
+            ]
+            rows.append({
+                'page': page_index,
+                'table': t_index,
+                **{f'c{i}': cells[i] if i < len(cells) else '' for i in range(max(15, len(cells)))}
+            })
+    return rows
+
+
+def extract_pdf_dataframe(pdf_path: Path | PdfLayout) -> pd.DataFrame:
     """Extract tables into a flat DataFrame with page/table indexes.
     Uses pdfplumber default table detection; normalizes cell text.
     """
     rows = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_index, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            for t_index, table in enumerate(tables):
-                for row in table or []:
-                    cells = [
-                        _norm(cell) if cell is not None else ''
-                        for cell in row
-                    ]
-                    rows.append({
-                        'page': page_index,
-                        'table': t_index,
-                        **{f'c{i}': cells[i] if i < len(cells) else '' for i in range(max(15, len(cells)))}
-                    })
+    with open_layout(pdf_path) as layout:
+        for page_index in layout.page_numbers:
+            rows.extend(_page_table_rows(layout, page_index))
     return pd.DataFrame(rows)
 
 
+# Colunas c0..c19 consideradas pelo parser de tabelas
+TABLE_MAX_COLS = 20
+_TABLE_COLS = [f'c{j}' for j in range(TABLE_MAX_COLS)]
+
+
+def _map_unique(values: np.ndarray, fn) -> np.ndarray:
+    """Aplica fn (Series -> Series) uma vez por valor distinto e devolve no formato de values."""
+    codes, uniques = pd.factorize(values.ravel())
+    mapped = fn(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return mapped[codes].reshape(values.shape)
+
+
+def _table_cells(df: pd.DataFrame, ncols: int = TABLE_MAX_COLS) -> np.ndarray:
+    """Células c0..c{ncols-1} como matriz de strings normalizadas (ausentes/NaN viram '')."""
+    raw = df.reindex(columns=_TABLE_COLS[:ncols]).fillna('').astype(str).to_numpy(dtype=object)
+    return _map_unique(raw, lambda s: s.str.split().str.join(' '))
+
+
+def _norm_match_series(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de _norm_match: espaços colapsados, sem acentos, minúsculas."""
+    s = s.str.split().str.join(' ').str.normalize('NFKD')
+    return s.str.replace(r'[\u0300-\u036f]', '', regex=True).str.lower()
+
+
 def _tables_look_collapsed(df: pd.DataFrame) -> bool:
     """Heurística: muitas linhas com apenas a primeira coluna preenchida indicam extração "achatada".
     Considera 'colapsado' se >70% das linhas têm texto apenas em c0.
     """
     if df.empty:
         return False
-    total = len(df)
-    collapsed = 0
-    for _, r in df.iterrows():
-        vals = [ _norm(r.get(f'c{i}', '')) for i in range(10) ]
-        if vals and vals[0] and all(not v for v in vals[1:]):
-            collapsed += 1
-    return (collapsed / total) >= 0.7
+    filled = _table_cells(df, 10) != ''
+    collapsed = filled[:, 0] & ~filled[:, 1:].any(axis=1)
+    return bool(collapsed.sum() / len(df) >= 0.7)
 
 
-def parse_header_from_words(pdf_path: Path) -> ParsedHeader:
+def parse_header_from_words(pdf_path: Path | PdfLayout) -> ParsedHeader:
     """Fallback simples: usa palavras da primeira página para capturar o cabeçalho."""
+    with open_layout(pdf_path) as layout:
+        words = layout.words(1, **HEADER_WORDS_KW)
+        text = " ".join(w.get('text', '') for w in words)
+    return _header_from_text(text)
+
+
+# Fração superior da primeira página onde ficam REPASSE/TERCEIRO/COMPETÊNCIA/CNPJ
+HEADER_BAND_RATIO = 0.25
+
+
+def peek_header(pdf_path: Path | str) -> ParsedHeader:
+    """Leitura rápida do cabeçalho: somente a faixa superior da primeira página, sem tabelas.
+    Usada na checagem de repasse duplicado antes do parse completo. Se o número do
+    repasse não estiver na faixa, lê as palavras da primeira página inteira.
+    """
     with pdfplumber.open(pdf_path) as pdf:
         page = pdf.pages[0]
-        words = page.extract_words(x_tolerance=3, y_tolerance=3) or []
-        text = " ".join(w.get('text', '') for w in words)
+        band = page.crop((0, 0, page.width, page.height * HEADER_BAND_RATIO))
+        words = band.extract_words(**HEADER_WORDS_KW) or []
+        hdr = _header_from_text(" ".join(w.get('text', '') for w in words))
+        if not hdr.repasse_numero:
+            words = page.extract_words(**HEADER_WORDS_KW) or []
+            hdr = _header_from_text(" ".join(w.get('text', '') for w in words))
+    return hdr
+
 
+def _header_from_text(text: str) -> ParsedHeader:
     hdr = ParsedHeader()
     # Heurísticas simples
     m = re.search(r"REPASSE:\s*(\d+)", text)
@@ -275,523 +803,827 @@ def parse_header_from_words(pdf_path: Path) -> ParsedHeader:
     return hdr
 
 
-def detect_professionals_by_page(pdf_path: Path) -> dict[int, tuple[str, str]]:
+def _professional_from_words(words: list[dict]) -> tuple[str, str] | None:
+    """(profissional_nome, especialidade) quando a página traz o cabeçalho do profissional."""
+    text = " ".join(w.get('text', '') for w in words)
+    # Reutiliza regex do header
+    m = re.search(r"\b([A-ZÁÉÍÓÚÂÊÔÃÕÇ][\wÁÉÍÓÚÂÊÔÃÕÇ\s]+)\s+Especialidade:\s+([A-Za-z\sÁÉÍÓÚâêôãõç/]+)\b", text)
+    if not m:
+        return None
+    prof = m.group(1).strip()
+    esp = m.group(2).strip()
+    # Remover possíveis sobras do cabeçalho da tabela
+    stop_tokens = [
+        'Atendimento', 'Conta', 'Paciente', 'Convênio', 'Convenio', 'Categoria', 'Data', 'Código', 'Codigo', 'Procedimento', 'Função', 'Funcao', 'Quantidade', 'Qtd'
+    ]
+    cut_idx = len(esp)
+    for tok in stop_tokens:
+        k = esp.find(tok)
+        if k != -1:
+            cut_idx = min(cut_idx, k)
+    esp = esp[:cut_idx].strip()
+    return prof, esp
+
+
+def detect_professionals_by_page(pdf_path: Path | PdfLayout) -> dict[int, tuple[str, str]]:
     """Mapeia por página: (profissional_nome, especialidade). Propaga último conhecido para páginas sem cabeçalho explícito."""
     result: dict[int, tuple[str, str]] = {}
     last_prof: tuple[str, str] | None = None
-    with pdfplumber.open(pdf_path) as pdf:
-        for idx, page in enumerate(pdf.pages, start=1):
-            words = page.extract_words(x_tolerance=3, y_tolerance=3) or []
-            text = " ".join(w.get('text', '') for w in words)
-            # Reutiliza regex do header
-            m = re.search(r"\b([A-ZÁÉÍÓÚÂÊÔÃÕÇ][\wÁÉÍÓÚÂÊÔÃÕÇ\s]+)\s+Especialidade:\s+([A-Za-z\sÁÉÍÓÚâêôãõç/]+)\b", text)
-            if m:
-                prof = m.group(1).strip()
-                esp = m.group(2).strip()
-                # Remover possíveis sobras do cabeçalho da tabela
-                stop_tokens = [
-                    'Atendimento', 'Conta', 'Paciente', 'Convênio', 'Convenio', 'Categoria', 'Data', 'Código', 'Codigo', 'Procedimento', 'Função', 'Funcao', 'Quantidade', 'Qtd'
-                ]
-                cut_idx = len(esp)
-                for tok in stop_tokens:
-                    k = esp.find(tok)
-                    if k != -1:
-                        cut_idx = min(cut_idx, k)
-                esp = esp[:cut_idx].strip()
-                last_prof = (prof, esp)
+    with open_layout(pdf_path) as layout:
+        for idx in layout.page_numbers:
+            prof = _professional_from_words(layout.words(idx, **HEADER_WORDS_KW))
+            if prof:
+                last_prof = prof
+            if last_prof:
                 result[idx] = last_prof
-            else:
-                if last_prof:
-                    result[idx] = last_prof
     return result
 
 
-def parse_items_from_tables(df: pd.DataFrame) -> list[ParsedItem]:
-    """Parse items using flexible header detection and synonym-based mapping.
-    This version supports multiple header/footer blocks across the document.
+# Synonyms mapping (normalized, no accents, lower) para detectar colunas de cabeçalho
+HEADER_SYNONYMS: dict[str, list[str]] = {
+    'data': ['data', 'dt'],
+    'paciente': ['paciente', 'nome do paciente', 'nome'],
+    'convenio': ['convenio', 'convênio', 'plano'],
+    'categoria': ['categoria', 'setor'],
+    'codigo': ['codigo', 'código', 'cod', 'cd'],
+    'procedimento': ['procedimento', 'descricao', 'descrição', 'servico', 'serviço', 'exame'],
+    'funcao': ['funcao', 'função', 'func.'],
+    'quantidade': ['qtd', 'quantidade', 'qtde', 'qte'],
+    'valor_produzido': ['produzido', 'valor produzido', 'vlr prod', 'valor bruto', 'bruto', 'total'],
+    'imposto': ['imposto', 'taxa', 'retencao', 'retenção'],
+    'valor_liquido': ['liquido', 'líquido', 'valor liquido', 'valor líquido', 'vlr liq', 'a pagar'],
+    'atendimento': ['atendimento'],
+    'conta': ['conta'],
+}
+# Qualificadores no início do título definem a coluna: 'Dt.Atendimento' é data e
+# 'Cód. Procedimento' é código, embora o sinônimo mais longo seja outro campo
+HEADER_LEADING_KEYS = ('data', 'codigo')
+
+
+def _norm_match(s: str) -> str:
+    return _strip_accents(_norm(s)).lower()
+
+
+class SynonymMatcher:
+    """Casador de sinônimos compilado uma única vez a partir de uma tabela {campo: [sinônimos]}.
+
+    Os sinônimos são normalizados como as células (_norm_match) e reunidos em uma
+    única regex de alternação; best_key varre o texto uma vez (lookahead, capturando
+    também ocorrências sobrepostas) e devolve o campo do sinônimo mais longo
+    encontrado, desempatando pela ordem da tabela. Um sinônimo de leading_keys que abre o
+    texto (seguido de fim, espaço ou pontuação) vence os demais.
     """
-    items: list[ParsedItem] = []
-
-    if df.empty:
-        return items
 
-    # Synonyms mapping (normalized, no accents, lower)
-    synonyms: dict[str, list[str]] = {
-        'data': ['data', 'dt'],
-        'paciente': ['paciente', 'nome do paciente', 'nome'],
-        'convenio': ['convenio', 'convênio', 'plano'],
-        'categoria': ['categoria', 'setor'],
-        'codigo': ['codigo', 'código', 'cod', 'cd'],
-        'procedimento': ['procedimento', 'descricao', 'descrição', 'servico', 'serviço', 'exame'],
-        'funcao': ['funcao', 'função', 'func.'],
-        'quantidade': ['qtd', 'quantidade', 'qtde', 'qte'],
-        'valor_produzido': ['produzido', 'valor produzido', 'vlr prod', 'valor bruto', 'bruto', 'total'],
-        'imposto': ['imposto', 'taxa', 'retencao', 'retenção'],
-        'valor_liquido': ['liquido', 'líquido', 'valor liquido', 'valor líquido', 'vlr liq', 'a pagar'],
-        'atendimento': ['atendimento'],
-        'conta': ['conta'],
-    }
+    def __init__(self, table: dict[str, list[str]], leading_keys: Iterable[str] = ()):
+        self._leading = frozenset(leading_keys)
+        self._key_of: dict[str, tuple[int, str]] = {}
+        for rank, (key, synonyms) in enumerate(table.items()):
+            for syn in synonyms:
+                self._key_of.setdefault(_norm_match(syn), (rank, key))
+        body = '|'.join(re.escape(k) for k in sorted(self._key_of, key=len, reverse=True))
+        # Qualquer sinônimo como substring (pontuação de linha de cabeçalho)
+        self.any_re = re.compile(body)
+        self._scan_re = re.compile(f'(?=({body}))')
+        self.best_key = lru_cache(maxsize=8192)(self._best_key)
+
+    def _best_key(self, text: str) -> str | None:
+        """text já normalizado com _norm_match."""
+        best: tuple[bool, int, int] | None = None
+        best_key = None
+        for m in self._scan_re.finditer(text):
+            syn = m.group(1)
+            rank, key = self._key_of[syn]
+            leading = (
+                m.start() == 0 and key in self._leading
+                and not text[len(syn):len(syn) + 1].isalnum()
+            )
+            cand = (leading, len(syn), -rank)
+            if best is None or cand > best:
+                best, best_key = cand, key
+        return best_key
+
+
+HEADER_MATCHER = SynonymMatcher(HEADER_SYNONYMS, HEADER_LEADING_KEYS)
+
+
+# Termos que encerram um bloco de itens na tabela
+TABLE_FOOTER_WORDS = ['resultado', 'resumo', 'total geral', 'totais', 'ass', 'assinatura', 'total (']
+_TABLE_FOOTER_RE = re.compile('|'.join(re.escape(w) for w in TABLE_FOOTER_WORDS))
+
+_NUMERIC_KEYS = ['quantidade', 'valor_produzido', 'imposto', 'valor_liquido']
+
+
+class _TableBlockParser:
+    """Máquina de estados do parser de tabelas.
+
+    Procura uma linha de cabeçalho (>= 3 colunas reconhecidas), consome as linhas de
+    dados até um rodapé ou mais de duas linhas vazias e volta a procurar o próximo
+    cabeçalho. O estado (mapa de colunas e última data do bloco) é mantido entre
+    chamadas, então as linhas podem ser alimentadas página a página.
+    """
 
-    def normalize_for_match(s: str) -> str:
-        return _strip_accents(_norm(s)).lower()
+    def __init__(self):
+        self.col_map: dict[int, str] | None = None
+        self.last_date = ''
+        self.empty_rows = 0
 
+    @staticmethod
     def is_footer(row_text: str) -> bool:
-        row_text_n = normalize_for_match(row_text)
-        return any(w in row_text_n for w in ['resultado', 'resumo', 'total geral', 'totais', 'ass', 'assinatura', 'total ('])
-
-    # (parse_line_fallback now defined at module level)
+        return bool(_TABLE_FOOTER_RE.search(_norm_match(row_text)))
 
+    @staticmethod
     def score_header_row(values: list[str]) -> tuple[int, list[str]]:
-        cols = [normalize_for_match(v) for v in values]
-        score = 0
-        for col in cols:
-            for _, keys in synonyms.items():
-                if any(k in col for k in keys):
-                    score += 1
-                    break
+        cols = [_norm_match(v) for v in values]
+        score = sum(1 for col in cols if HEADER_MATCHER.best_key(col))
         return score, cols
 
-    i = 0
-    max_rows = len(df)
-    # Walk the whole DataFrame detecting header blocks repeatedly
-    while i < max_rows:
-        r = df.iloc[i]
-        values = [_norm(r.get(f'c{j}', '')) for j in range(20)]
-        score, header_cols = score_header_row(values)
-        if score < 3:
-            i += 1
-            continue
-
-        # Build column map for this block
+    @staticmethod
+    def build_col_map(header_cols: list[str]) -> dict[int, str]:
         col_map: dict[int, str] = {}
         for col_idx, col in enumerate(header_cols):
-            best_key = None
-            best_match_len = 0
-            for key, keys in synonyms.items():
-                for k in keys:
-                    if k in col and len(k) > best_match_len:
-                        best_key = key
-                        best_match_len = len(k)
+            best_key = HEADER_MATCHER.best_key(col)
             if best_key:
                 col_map[col_idx] = best_key
+        return col_map
+
+    def feed(self, row_vals: list[str], page: int) -> ParsedItem | None:
+        """Processa uma linha (valores c0..c19 normalizados) e devolve o item, se houver."""
+        if self.col_map is None:
+            score, header_cols = self.score_header_row(row_vals)
+            if score >= 3:
+                # Build column map for this block
+                self.col_map = self.build_col_map(header_cols)
+                # Keep last seen date within this block to fill down missing dates
+                self.last_date = ''
+                self.empty_rows = 0
+            return None
+
+        row_text_all = ' '.join(row_vals)
+        if not row_text_all.strip():
+            self.empty_rows += 1
+            # give some slack for blank separators within a block
+            if self.empty_rows > 2:
+                self.col_map = None
+            return None
+        self.empty_rows = 0
+
+        if self.is_footer(row_text_all):
+            # End of current block; look for next header
+            self.col_map = None
+            return None
+        return self._row_item(row_vals, row_text_all, page)
+
+    def _row_item(self, row_vals: list[str], row_text_all: str, page: int) -> ParsedItem | None:
+        col_map = self.col_map or {}
+        data_dict: dict[str, str] = {}
+        for j, val in enumerate(row_vals):
+            if j in col_map and val is not None:
+                data_dict[col_map[j]] = _norm(val)
+
+        # If no explicit 'data', try to extract by regex from the row text
+        if not data_dict.get('data'):
+            d = _find_date(row_text_all)
+            if d:
+                data_dict['data'] = d
+
+        # Fill down last seen date if still missing
+        if data_dict.get('data'):
+            self.last_date = data_dict['data']  # type: ignore
+        elif self.last_date:
+            data_dict['data'] = self.last_date
+        return self.complete_item(col_map, data_dict, row_vals, row_text_all, page)
+
+    @staticmethod
+    def complete_item(col_map: dict[int, str], data_dict: dict, row_vals: list[str], row_text_all: str,
+                      page: int, numbers: tuple | None = None) -> ParsedItem | None:
+        """Completa código/procedimento (fallbacks por regex) e valores e monta o item.
+        numbers: (quantidade, produzido, imposto, líquido) já convertidos, quando disponíveis.
+        """
+        if not data_dict.get('codigo'):
+            _report_count('fallback_rows')
+        # If still missing critical fields, try fallback from full text
+        if not (data_dict.get('codigo') or data_dict.get('procedimento')):
+            numbers = None
+            fb = parse_line_fallback(row_text_all, excludes=[data_dict.get('atendimento',''), data_dict.get('conta','')])
+            for k in ['data','codigo','procedimento']:
+                if k in fb and fb[k]:
+                    data_dict[k] = fb[k]  # type: ignore
+            # numeric fields from fallback
+            for k in _NUMERIC_KEYS:
+                if k in fb and fb[k] is not None and data_dict.get(k) in (None, '',):
+                    data_dict[k] = fb[k]  # type: ignore
+        # Even if we have procedimento, try to fill missing codigo from the line
+        if not data_dict.get('codigo'):
+            fb2 = parse_line_fallback(row_text_all, excludes=[data_dict.get('atendimento',''), data_dict.get('conta','')])
+            if 'codigo' in fb2 and fb2['codigo']:
+                data_dict['codigo'] = fb2['codigo']  # type: ignore
+        # If still missing, use table positions: look for a numeric-ish token between Data and Procedimento/Quantidade/Valores
+        if not data_dict.get('codigo'):
+            try:
+                # find column indexes for landmarks
+                idx_data = next((idx for idx, key in col_map.items() if key == 'data'), None)
+                # prefer to stop at procedimento, otherwise at first of quantidade/valores
+                idx_stop = None
+                for k in ['procedimento', 'quantidade', 'valor_produzido', 'imposto', 'valor_liquido']:
+                    idx_stop = next((idx for idx, key in col_map.items() if key == k), idx_stop)
+                    if idx_stop is not None:
+                        break
+                start = (idx_data + 1) if idx_data is not None else 0
+                end = idx_stop if idx_stop is not None else len(row_vals)
+                candidates = []
+                for c in row_vals[start:end]:
+                    t = _norm(c)
+                    if not t:
+                        continue
+                    # a code is typically a plain number (maybe with dots) with at least 5 digits overall
+                    digits = tokenize_line(t).digits
+                    if len(digits) >= 5 and len(digits) <= 12 and digits not in {data_dict.get('atendimento',''), data_dict.get('conta','')}:
+                        candidates.append(digits)
+                if candidates:
+                    # choose the most digit-rich (and longer) candidate
+                    candidates.sort(key=lambda x: (-len(x)))
+                    data_dict['codigo'] = candidates[0]
+            except Exception:
+                pass
+        # Guard: avoid equating codigo to atendimento/conta
+        if data_dict.get('codigo') and data_dict.get('codigo') in {data_dict.get('atendimento'), data_dict.get('conta')}:
+            data_dict['codigo'] = ''
+
+        if numbers is None:
+            numbers = tuple(_ptbr_to_decimal(data_dict.get(k)) for k in _NUMERIC_KEYS)
+        q, vp, imp, vl = numbers
+        # Fallback calculations to avoid None where possible
+        if vl is None and vp is not None and imp is not None:
+            vl = vp - imp
+        if imp is None and vp is not None and vl is not None:
+            imp = vp - vl
+
+        # Heuristic: require at least código or procedimento, and at least one numeric value among quantidade/produzido/liquido
+        has_code_or_proc = bool(data_dict.get('codigo') or data_dict.get('procedimento'))
+        any_numeric = any(v is not None for v in [q, vp, imp, vl])
+        if not has_code_or_proc or not any_numeric:
+            return None
+
+        return ParsedItem(
+            atendimento=data_dict.get('atendimento', ''),
+            conta=data_dict.get('conta', ''),
+            paciente=data_dict.get('paciente', ''),
+            convenio=data_dict.get('convenio', ''),
+            categoria=data_dict.get('categoria', ''),
+            data=data_dict.get('data', ''),
+            codigo=data_dict.get('codigo', ''),
+            procedimento=data_dict.get('procedimento', ''),
+            funcao=data_dict.get('funcao', ''),
+            quantidade=q,
+            valor_produzido=vp,
+            imposto=imp,
+            valor_liquido=vl,
+            page=page,
+        )
 
-        # Advance to first data row after header
-        i += 1
-        # Keep last seen date within this block to fill down missing dates
-        last_date: str = ""
-        empty_rows = 0
-        while i < max_rows:
-            rr = df.iloc[i]
-            row_vals = [_norm(rr.get(f'c{j}', '')) for j in range(20)]
-            row_text_all = ' '.join(row_vals)
-            if not row_text_all.strip():
-                empty_rows += 1
-                # give some slack for blank separators within a block
-                if empty_rows <= 2:
-                    i += 1
-                    continue
-                else:
-                    break
-            empty_rows = 0
-
-            if is_footer(row_text_all):
-                # End of current block; move past footer and look for next header
-                i += 1
-                break
 
-            data_dict: dict[str, str] = {}
-            for j, val in enumerate(row_vals):
-                if j in col_map and val is not None:
-                    data_dict[col_map[j]] = _norm(val)
-
-            # If no explicit 'data', try to extract by regex from the row text
-            if not data_dict.get('data'):
-                d = _find_date(row_text_all)
-                if d:
-                    data_dict['data'] = d
-
-            # Fill down last seen date if still missing
-            if data_dict.get('data'):
-                last_date = data_dict['data']  # type: ignore
-            elif last_date:
-                data_dict['data'] = last_date
-
-            # If still missing critical fields, try fallback from full text
-            if not (data_dict.get('codigo') or data_dict.get('procedimento')):
-                fb = parse_line_fallback(row_text_all, excludes=[data_dict.get('atendimento',''), data_dict.get('conta','')])
-                for k in ['data','codigo','procedimento']:
-                    if k in fb and fb[k]:
-                        data_dict[k] = fb[k]  # type: ignore
-                # numeric fields from fallback
-                for k in ['quantidade','valor_produzido','imposto','valor_liquido']:
-                    if k in fb and fb[k] is not None and data_dict.get(k) in (None, '',):
-                        data_dict[k] = fb[k]  # type: ignore
-            # Even if we have procedimento, try to fill missing codigo from the line
-            if not data_dict.get('codigo'):
-                fb2 = parse_line_fallback(row_text_all, excludes=[data_dict.get('atendimento',''), data_dict.get('conta','')])
-                if 'codigo' in fb2 and fb2['codigo']:
-                    data_dict['codigo'] = fb2['codigo']  # type: ignore
-            # If still missing, use table positions: look for a numeric-ish token between Data and Procedimento/Quantidade/Valores
-            if not data_dict.get('codigo'):
-                try:
-                    # find column indexes for landmarks
-                    idx_data = next((idx for idx, key in col_map.items() if key == 'data'), None)
-                    # prefer to stop at procedimento, otherwise at first of quantidade/valores
-                    stop_keys = {'procedimento', 'quantidade', 'valor_produzido', 'imposto', 'valor_liquido'}
-                    idx_stop = None
-                    for k in ['procedimento', 'quantidade', 'valor_produzido', 'imposto', 'valor_liquido']:
-                        idx_stop = next((idx for idx, key in col_map.items() if key == k), idx_stop)
-                        if idx_stop is not None:
-                            break
-                    start = (idx_data + 1) if idx_data is not None else 0
-                    end = idx_stop if idx_stop is not None else len(row_vals)
-                    candidates = []
-                    for c in row_vals[start:end]:
-                        t = _norm(c)
-                        if not t:
-                            continue
-                        # a code is typically a plain number (maybe with dots) with at least 5 digits overall
-                        digits = ''.join(ch for ch in t if ch.isdigit())
-                        if len(digits) >= 5 and len(digits) <= 12 and digits not in {data_dict.get('atendimento',''), data_dict.get('conta','')}:
-                            candidates.append(digits)
-                    if candidates:
-                        # choose the most digit-rich (and longer) candidate
-                        candidates.sort(key=lambda x: (-len(x)))
-                        data_dict['codigo'] = candidates[0]
-                except Exception:
-                    pass
-            # Guard: avoid equating codigo to atendimento/conta
-            if data_dict.get('codigo') and data_dict.get('codigo') in {data_dict.get('atendimento'), data_dict.get('conta')}:
-                data_dict['codigo'] = ''
-
-            q = _ptbr_to_decimal(data_dict.get('quantidade'))
-            vp = _ptbr_to_decimal(data_dict.get('valor_produzido'))
-            imp = _ptbr_to_decimal(data_dict.get('imposto'))
-            vl = _ptbr_to_decimal(data_dict.get('valor_liquido'))
-            # Fallback calculations to avoid None where possible
-            if vl is None and vp is not None and imp is not None:
-                vl = vp - imp
-            if imp is None and vp is not None and vl is not None:
-                imp = vp - vl
-
-            # Heuristic: require at least código or procedimento, and at least one numeric value among quantidade/produzido/liquido
-            has_code_or_proc = bool(data_dict.get('codigo') or data_dict.get('procedimento'))
-            any_numeric = any(v is not None for v in [q, vp, imp, vl])
-            if not has_code_or_proc or not any_numeric:
-                i += 1
-                continue
+def _segment_table_blocks(is_header: np.ndarray, is_empty: np.ndarray, is_footer: np.ndarray) -> list[tuple[int, np.ndarray]]:
+    """Divide as linhas em blocos (linha de cabeçalho, índices das linhas de dados).
 
-            items.append(ParsedItem(
-                atendimento=data_dict.get('atendimento', ''),
-                conta=data_dict.get('conta', ''),
-                paciente=data_dict.get('paciente', ''),
-                convenio=data_dict.get('convenio', ''),
-                categoria=data_dict.get('categoria', ''),
-                data=data_dict.get('data', ''),
-                codigo=data_dict.get('codigo', ''),
-                procedimento=data_dict.get('procedimento', ''),
-                funcao=data_dict.get('funcao', ''),
-                quantidade=q,
-                valor_produzido=vp,
-                imposto=imp,
-                valor_liquido=vl,
-                page=int(rr.get('page', 0) or 0),
-            ))
-
-            i += 1
-
-        # Continue outer while to hunt for next header
-        continue
+    Mesma regra de _TableBlockParser.feed, mas percorrendo apenas os eventos
+    (cabeçalhos candidatos, linhas vazias e rodapés) em vez de cada linha.
+    """
+    n = len(is_header)
+    header_idx = np.flatnonzero(is_header)
+    stop_idx = np.flatnonzero(is_empty | is_footer)
+    blocks: list[tuple[int, np.ndarray]] = []
+    i = 0
+    while i < n:
+        # Procurando cabeçalho
+        h = np.searchsorted(header_idx, i)
+        if h >= len(header_idx):
+            break
+        head = int(header_idx[h])
+        parts: list[np.ndarray] = []
+        i = head + 1
+        while i < n:
+            k = np.searchsorted(stop_idx, i)
+            j = int(stop_idx[k]) if k < len(stop_idx) else n
+            parts.append(np.arange(i, j))
+            if j >= n:
+                i = n
+                break
+            if is_footer[j] and not is_empty[j]:
+                i = j + 1
+                break
+            # linhas vazias consecutivas: até 2 são toleradas dentro do bloco
+            run = 0
+            while j + run < n and is_empty[j + run]:
+                run += 1
+                if run > 2:
+                    break
+            if run > 2:
+                i = j + run
+                break
+            i = j + run
+        blocks.append((head, np.concatenate(parts) if parts else np.arange(0)))
+    return blocks
 
-    return items
 
+def parse_items_from_tables(df: pd.DataFrame) -> list[ParsedItem]:
+    """Parse items using flexible header detection and synonym-based mapping.
+    This version supports multiple header/footer blocks across the document.
 
-def parse_items_from_text(pdf_path: Path) -> list[ParsedItem]:
-    """Fallback: parse lines of text splitting by multiple spaces; best-effort mapping.
-    Works for statements where tables aren't detected but columns are visually aligned.
+    Trabalha sobre as colunas inteiras: pontuação de cabeçalho, linhas vazias,
+    rodapés, datas e valores são calculados de forma vetorizada; apenas linhas
+    sem código passam pelos fallbacks por regex linha a linha.
     """
     items: list[ParsedItem] = []
-    date_re = re.compile(r"\b(\d{2}/\d{2}(?:/\d{2,4})?)\b")
 
-    def looks_like_footer(line: str) -> bool:
-        n = _strip_accents(line.lower())
-        return any(k in n for k in ['resultado', 'resumo', 'total geral', 'totais', 'assinatura'])
+    if df.empty:
+        return items
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for pi, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ''
-            lines = [l for l in text.splitlines() if l.strip()]
-            seen_header = False
-            last_date = ''
-            for line in lines:
-                ln = _strip_accents(line.lower())
-                if not seen_header and all(k in ln for k in ['paciente', 'convenio', 'procedimento']):
-                    seen_header = True
-                    last_date = ''  # reset at new header
-                    continue
-                if not seen_header:
-                    continue
-                if looks_like_footer(line):
-                    last_date = ''  # end of block
-                    break
-                parts = re.split(r"\s{2,}", line.strip())
-                if len(parts) < 6:
-                    continue
-                # Map from the right: ... Qtd, Produzido, Imposto, Liquido
-                qtd = _ptbr_to_decimal(parts[-4]) if len(parts) >= 4 else None
-                produzido = _ptbr_to_decimal(parts[-3]) if len(parts) >= 3 else None
-                imposto = _ptbr_to_decimal(parts[-2]) if len(parts) >= 2 else None
-                liquido = _ptbr_to_decimal(parts[-1]) if len(parts) >= 1 else None
-
-                left = parts[:-4]
-                if not left:
-                    continue
-                # Try to capture Atendimento and Conta from the beginning of the left segment
-                left_join = ' '.join(left)
-                atendimento = ''
-                conta = ''
-                m_ac = re.match(r"\s*(\d{4,})\s+(\d{4,})\s+(.*)$", left_join)
-                if m_ac:
-                    atendimento = m_ac.group(1)
-                    conta = m_ac.group(2)
-                    # replace left with the remainder to avoid confusing code/procedure extraction
-                    left = [m_ac.group(3)]
-                else:
-                    # Some layouts only have Atendimento leading the row
-                    m_a = re.match(r"\s*(\d{4,})\s+(.*)$", left_join)
-                    if m_a:
-                        atendimento = m_a.group(1)
-                        left = [m_a.group(2)]
-                # Try find date (robusto)
-                data = ''
-                for p in left:
-                    data = _find_date(p)
-                    if data:
-                        break
-                # Fill down last seen date if still missing
-                if data:
-                    last_date = data
-                elif last_date:
-                    data = last_date
-
-                # Try find code (token with any digit and short-ish)
-                codigo = ''
-                excludes = {atendimento, conta}
-                for p in left:
-                    t = _norm(p)
-                    if not t or t in excludes:
-                        continue
-                    if any(ch.isdigit() for ch in t) and len(t) <= 12:
-                        codigo = t
-                        break
-                if codigo and codigo in excludes:
-                    codigo = ''
-
-                # Procedure: take the longest chunk
-                procedimento = max(left, key=len) if left else ''
-
-                if not (codigo or procedimento) or not any(v is not None for v in [qtd, produzido, imposto, liquido]):
-                    continue
-
-                items.append(ParsedItem(
-                    atendimento=atendimento,
-                    conta=conta,
-                    data=data,
-                    codigo=codigo,
-                    procedimento=procedimento,
-                    quantidade=qtd,
-                    valor_produzido=produzido,
-                    imposto=imposto,
-                    valor_liquido=liquido,
-                    page=pi,
-                ))
+    _report_count('rows_scanned', len(df))
+    cells = _table_cells(df)
+    texts = np.array([' '.join(row) for row in cells.tolist()], dtype=object)
+    pages = pd.to_numeric(df['page'], errors='coerce').fillna(0).astype(int).to_numpy() if 'page' in df else np.zeros(len(df), dtype=int)
+
+    # Máscaras por linha (normalização e busca de sinônimos feitas uma vez por valor distinto)
+    match_cells = _map_unique(cells, _norm_match_series)
+    is_empty = (cells == '').all(axis=1)
+    is_header = _map_unique(match_cells, lambda s: s.str.contains(HEADER_MATCHER.any_re)).astype(bool).sum(axis=1) >= 3
+    is_footer = _map_unique(texts, lambda s: _norm_match_series(s).str.contains(_TABLE_FOOTER_RE)).astype(bool)
+
+    decimal_cache: dict[str, float | None] = {}
+
+    def to_decimal(v: str) -> float | None:
+        if v not in decimal_cache:
+            decimal_cache[v] = _ptbr_to_decimal(v)
+        return decimal_cache[v]
+
+    for head, rows in _segment_table_blocks(is_header, is_empty, is_footer):
+        if not len(rows):
+            continue
+        col_map = _TableBlockParser.build_col_map(list(match_cells[head]))
+        # Última coluna mapeada para cada campo prevalece (como no preenchimento do dict por linha)
+        key_col: dict[str, int] = {}
+        for j, key in col_map.items():
+            key_col[key] = j
+        block = cells[rows]
+
+        # Datas: coluna explícita, regex na linha quando vazia e fill-down dentro do bloco
+        dates = pd.Series(block[:, key_col['data']] if 'data' in key_col else [''] * len(rows), dtype=object)
+        missing = (dates == '').to_numpy()
+        if missing.any():
+            dates[missing] = [_find_date(t) for t in texts[rows[missing]]]
+        filled = dates.replace('', np.nan).ffill().fillna('').to_numpy(dtype=object)
+
+        codes = block[:, key_col['codigo']] if 'codigo' in key_col else np.full(len(rows), '', dtype=object)
+        numeric_cols = [block[:, key_col[k]] if k in key_col else None for k in _NUMERIC_KEYS]
+
+        for n, r in enumerate(rows):
+            row_vals = list(block[n])
+            data_dict = {key: row_vals[j] for key, j in key_col.items()}
+            if filled[n]:
+                data_dict['data'] = filled[n]
+            if codes[n]:
+                # Linha completa: valores convertidos por coluna, sem fallback por regex
+                numbers = tuple(to_decimal(col[n]) if col is not None else None for col in numeric_cols)
+            else:
+                numbers = None
+            it = _TableBlockParser.complete_item(col_map, data_dict, row_vals, texts[r], int(pages[r]), numbers)
+            if it is not None:
+                items.append(it)
 
     return items
 
 
-def parse_items_from_words(pdf_path: Path) -> list[ParsedItem]:
-    """Fallback using word positions: detect header columns by synonyms and split lines by x-positions."""
+def _table_header_fingerprints(df: pd.DataFrame) -> list[str]:
+    """Impressões digitais (células normalizadas) das linhas de cabeçalho da tabela, em ordem."""
+    if df.empty:
+        return []
+    match_cells = _map_unique(_table_cells(df), _norm_match_series)
+    is_header = _map_unique(match_cells, lambda s: s.str.contains(HEADER_MATCHER.any_re)).astype(bool).sum(axis=1) >= 3
+    return [
+        hashlib.sha1('|'.join(match_cells[i]).rstrip('|').encode('utf-8')).hexdigest()
+        for i in np.flatnonzero(is_header)
+    ]
+
+
+def _text_looks_like_footer(line: str) -> bool:
+    n = _strip_accents(line.lower())
+    return any(k in n for k in ['resultado', 'resumo', 'total geral', 'totais', 'assinatura'])
+
+
+def _text_is_header(line: str) -> bool:
+    ln = _strip_accents(line.lower())
+    return all(k in ln for k in ['paciente', 'convenio', 'procedimento'])
+
+
+def _text_header_fingerprint(text: str) -> str:
+    """Impressão digital da primeira linha de cabeçalho do texto da página ('' se não houver)."""
+    for line in text.splitlines():
+        if line.strip() and _text_is_header(line):
+            return hashlib.sha1(_norm_match(line).encode('utf-8')).hexdigest()
+    return ''
+
+
+# Vão entre palavras (fração da altura da linha) a partir do qual o texto separa colunas
+TEXT_COLUMN_GAP_RATIO = 0.45
+
+
+def _column_text(words: list[dict]) -> str:
+    """Texto da página para o parser de texto: palavras da mesma coluna separadas por um espaço
+    e colunas por dois. O extract_text do pdfplumber (e o texto montado do pdfium) junta tudo
+    com um espaço só, e o parser de texto divide as colunas por dois ou mais espaços.
+    """
+    out = []
+    for line in _cluster_lines(words, y_tol=2.0):
+        parts = [line[0]['text']]
+        for prev, w in zip(line, line[1:]):
+            height = float(w.get('bottom', 0)) - float(w.get('top', 0))
+            gap = float(w.get('x0', 0)) - float(prev.get('x1', 0))
+            parts.append('  ' if gap >= TEXT_COLUMN_GAP_RATIO * height else ' ')
+            parts.append(w['text'])
+        out.append(''.join(parts))
+    return '\n'.join(out)
+
+
+def _page_column_text(layout: PdfLayout, page_no: int) -> str:
+    return _column_text(layout.words(page_no, **ITEM_WORDS_KW))
+
+
+def _text_page_items(text: str, pi: int, carry_date: str = '') -> tuple[list[ParsedItem], str]:
+    """Itens de uma página pelo texto corrido. carry_date é a data assumida ao encontrar o
+    cabeçalho (o modo streaming repassa a última data da página anterior).
+    Retorna (itens, última data vista).
+    """
     items: list[ParsedItem] = []
+    lines = [l for l in text.splitlines() if l.strip()]
+    seen_header = False
+    last_date = ''
+    for line in lines:
+        if not seen_header and _text_is_header(line):
+            seen_header = True
+            last_date = carry_date  # reset at new header
+            continue
+        if not seen_header:
+            continue
+        _report_count('rows_scanned')
+        if _text_looks_like_footer(line):
+            last_date = ''  # end of block
+            break
+        parts = re.split(r"\s{2,}", line.strip())
+        if len(parts) < 6:
+            continue
+        # Map from the right: ... Qtd, Produzido, Imposto, Liquido
+        qtd = _ptbr_to_decimal(parts[-4]) if len(parts) >= 4 else None
+        produzido = _ptbr_to_decimal(parts[-3]) if len(parts) >= 3 else None
+        imposto = _ptbr_to_decimal(parts[-2]) if len(parts) >= 2 else None
+        liquido = _ptbr_to_decimal(parts[-1]) if len(parts) >= 1 else None
+
+        left = parts[:-4]
+        if not left:
+            continue
+        # Try to capture Atendimento and Conta from the beginning of the left segment
+        left_join = ' '.join(left)
+        atendimento = ''
+        conta = ''
+        m_ac = re.match(r"\s*(\d{4,})\s+(\d{4,})\s+(.*)$", left_join)
+        if m_ac:
+            atendimento = m_ac.group(1)
+            conta = m_ac.group(2)
+            # replace left with the remainder to avoid confusing code/procedure extraction
+            left = [m_ac.group(3)]
+        else:
+            # Some layouts only have Atendimento leading the row
+            m_a = re.match(r"\s*(\d{4,})\s+(.*)$", left_join)
+            if m_a:
+                atendimento = m_a.group(1)
+                left = [m_a.group(2)]
+        # Try find date (robusto)
+        data = ''
+        for p in left:
+            data = _find_date(p)
+            if data:
+                break
+        # Fill down last seen date if still missing
+        if data:
+            last_date = data
+        elif last_date:
+            data = last_date
+
+        # Try find code (token with any digit and short-ish)
+        codigo = ''
+        excludes = {atendimento, conta}
+        for p in left:
+            t = _norm(p)
+            if not t or t in excludes:
+                continue
+            if any(ch.isdigit() for ch in t) and len(t) <= 12:
+                codigo = t
+                break
+        if codigo and codigo in excludes:
+            codigo = ''
 
-    synonyms: dict[str, list[str]] = {
-        'data': ['data', 'dt'],
-        'paciente': ['paciente', 'nome do paciente', 'nome'],
-        'convenio': ['convenio', 'convênio', 'plano'],
-        'categoria': ['categoria', 'setor'],
-        'codigo': ['codigo', 'código', 'cod', 'cd'],
-        'procedimento': ['procedimento', 'descricao', 'descrição', 'servico', 'serviço', 'exame'],
-        'funcao': ['funcao', 'função', 'func.'],
-        'quantidade': ['qtd', 'quantidade', 'qtde', 'qte'],
-        'valor_produzido': ['produzido', 'valor produzido', 'vlr prod', 'valor bruto', 'bruto', 'total'],
-        'imposto': ['imposto', 'taxa', 'retencao', 'retenção'],
-        'valor_liquido': ['liquido', 'líquido', 'valor liquido', 'valor líquido', 'vlr liq', 'a pagar'],
-        'atendimento': ['atendimento'],
-        'conta': ['conta'],
-    }
+        # Procedure: take the longest chunk
+        procedimento = max(left, key=len) if left else ''
 
-    def norm_text(s: str) -> str:
-        return _strip_accents(_norm(s)).lower()
-
-    def cluster_lines(words: List[dict], y_tol: float = 2.0) -> List[List[dict]]:
-        """Group words into lines by proximity of 'top' coordinate."""
-        if not words:
-            return []
-        words_sorted = sorted(words, key=lambda w: (w.get('top', 0), w.get('x0', 0)))
-        lines: List[List[dict]] = []
-        current: List[dict] = []
-        current_top: float = None  # type: ignore
-        for w in words_sorted:
-            top = float(w.get('top', 0))
-            if current_top is None or abs(top - current_top) <= y_tol:
-                current.append(w)
-                if current_top is None:
-                    current_top = top
-            else:
-                lines.append(sorted(current, key=lambda x: x.get('x0', 0)))
-                current = [w]
+        if not (codigo or procedimento) or not any(v is not None for v in [qtd, produzido, imposto, liquido]):
+            continue
+
+        items.append(ParsedItem(
+            atendimento=atendimento,
+            conta=conta,
+            data=data,
+            codigo=codigo,
+            procedimento=procedimento,
+            quantidade=qtd,
+            valor_produzido=produzido,
+            imposto=imposto,
+            valor_liquido=liquido,
+            page=pi,
+        ))
+    return items, last_date
+
+
+def parse_items_from_text(pdf_path: Path | PdfLayout) -> list[ParsedItem]:
+    """Fallback: parse lines of text splitting by multiple spaces; best-effort mapping.
+    Works for statements where tables aren't detected but columns are visually aligned.
+    """
+    items: list[ParsedItem] = []
+    with open_layout(pdf_path) as layout:
+        for pi in layout.page_numbers:
+            page_items, _ = _text_page_items(_page_column_text(layout, pi), pi)
+            items.extend(page_items)
+    return items
+
+
+def _cluster_lines(words: List[dict], y_tol: float = 2.0) -> List[List[dict]]:
+    """Group words into lines by proximity of 'top' coordinate."""
+    if not words:
+        return []
+    words_sorted = sorted(words, key=lambda w: (w.get('top', 0), w.get('x0', 0)))
+    lines: List[List[dict]] = []
+    current: List[dict] = []
+    current_top: float = None  # type: ignore
+    for w in words_sorted:
+        top = float(w.get('top', 0))
+        if current_top is None or abs(top - current_top) <= y_tol:
+            current.append(w)
+            if current_top is None:
                 current_top = top
-        if current:
+        else:
             lines.append(sorted(current, key=lambda x: x.get('x0', 0)))
-        return lines
-
-    def score_header(line_words: List[dict]) -> Tuple[int, dict]:
-        score = 0
-        col_hits: dict[float, str] = {}
-        for w in line_words:
-            t = norm_text(w.get('text', ''))
-            for key, keys in synonyms.items():
-                if any(k in t for k in keys):
-                    score += 1
-                    # map by x0 (left position)
-                    x0 = float(w.get('x0', 0.0))
-                    if key not in col_hits.values():
-                        col_hits[x0] = key
+            current = [w]
+            current_top = top
+    if current:
+        lines.append(sorted(current, key=lambda x: x.get('x0', 0)))
+    return lines
+
+
+def _score_header_words(line_words: List[dict]) -> Tuple[int, dict]:
+    score = 0
+    col_hits: dict[float, str] = {}
+    for w in line_words:
+        key = HEADER_MATCHER.best_key(_norm_match(w.get('text', '')))
+        if key:
+            score += 1
+            # map by x0 (left position)
+            x0 = float(w.get('x0', 0.0))
+            if key not in col_hits.values():
+                col_hits[x0] = key
+    return score, col_hits
+
+
+def _build_boundaries(col_hits: dict, page_width: float) -> List[Tuple[float, float, str]]:
+    # returns list of (x_left, x_right, key) in order
+    if not col_hits:
+        return []
+    cols_sorted = sorted(((float(x), key) for x, key in col_hits.items()), key=lambda x: x[0])
+    bounds: List[Tuple[float, float, str]] = []
+    for i, (x, key) in enumerate(cols_sorted):
+        left = x - 1
+        right = (cols_sorted[i + 1][0] + x) / 2 if i + 1 < len(cols_sorted) else page_width + 10
+        bounds.append((left, right, key))
+    return bounds
+
+
+def _words_line_fingerprint(line_words: List[dict]) -> str:
+    """Impressão digital do texto normalizado de uma linha (cabeçalho do perfil de layout)."""
+    text = ' '.join(_norm_match(w.get('text', '')) for w in line_words)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _find_words_header(lines: List[List[dict]], page_width: float) -> tuple[int, List[Tuple[float, float, str]]]:
+    """Linha de cabeçalho com maior pontuação (>= 3 colunas) e as fronteiras x das colunas."""
+    header_idx = -1
+    boundaries: List[Tuple[float, float, str]] = []
+    best_score = -1
+    # find header line with best score
+    for idx, line in enumerate(lines):
+        score, col_hits = _score_header_words(line)
+        if score > best_score and score >= 3:
+            best_score = score
+            header_idx = idx
+            boundaries = _build_boundaries(col_hits, page_width)
+    return header_idx, boundaries
+
+
+def _words_page_items(words: list[dict], page_width: float, pi: int, carry_date: str = '',
+                      hint: LayoutHint | None = None) -> tuple[list[ParsedItem], str]:
+    """Itens de uma página a partir das posições das palavras. carry_date é a data
+    inicial do bloco (o modo streaming repassa a última data da página anterior).
+    Com hint (perfil do hospital), a linha cuja impressão digital coincide é usada como
+    cabeçalho com as fronteiras salvas; sem coincidência, detecta normalmente.
+    Retorna (itens, última data vista).
+    """
+    items: list[ParsedItem] = []
+    lines = _cluster_lines(words, y_tol=2.0)
+    header_idx = -1
+    boundaries: List[Tuple[float, float, str]] = []
+    if hint is not None and hint.column_bounds:
+        header_idx = next((i for i, line in enumerate(lines) if _words_line_fingerprint(line) == hint.header_fingerprint), -1)
+        if header_idx != -1:
+            boundaries = [(float(l), float(r), k) for l, r, k in hint.column_bounds]
+    if header_idx == -1:
+        header_idx, boundaries = _find_words_header(lines, page_width)
+    if header_idx == -1 or not boundaries:
+        return items, carry_date
+
+    # parse data lines after header
+    last_date = carry_date
+    for line in lines[header_idx + 1:]:
+        _report_count('rows_scanned')
+        # Keep full line text to enable robust fallbacks independent of column boundaries
+        full_line_text = ' '.join(_norm(w.get('text', '')) for w in line if _norm(w.get('text', '')))
+        texts_by_key: dict[str, List[str]] = {b[2]: [] for b in boundaries}
+        for w in line:
+            x = float(w.get('x0', 0.0))
+            t = _norm(w.get('text', ''))
+            for left, right, key in boundaries:
+                if left <= x < right:
+                    texts_by_key[key].append(t)
                     break
-        return score, col_hits
-
-    def build_boundaries(col_hits: dict, page_width: float) -> List[Tuple[float, float, str]]:
-        # returns list of (x_left, x_right, key) in order
-        if not col_hits:
-            return []
-        cols_sorted = sorted(((float(x), key) for x, key in col_hits.items()), key=lambda x: x[0])
-        bounds: List[Tuple[float, float, str]] = []
-        for i, (x, key) in enumerate(cols_sorted):
-            left = x - 1
-            right = (cols_sorted[i + 1][0] + x) / 2 if i + 1 < len(cols_sorted) else page_width + 10
-            bounds.append((left, right, key))
-        return bounds
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for pi, page in enumerate(pdf.pages, start=1):
-            words = page.extract_words(x_tolerance=2, y_tolerance=2, keep_blank_chars=False) or []
-            lines = cluster_lines(words, y_tol=2.0)
-            header_idx = -1
-            boundaries: List[Tuple[float, float, str]] = []
-            best_score = -1
-            # find header line with best score
-            for idx, line in enumerate(lines):
-                score, col_hits = score_header(line)
-                if score > best_score and score >= 3:
-                    best_score = score
-                    header_idx = idx
-                    boundaries = build_boundaries(col_hits, page.width)
-            if header_idx == -1 or not boundaries:
-                continue
-
-            # parse data lines after header
+        # Build row dict
+        row = {k: ' '.join(v).strip() for k, v in texts_by_key.items()}
+        # Skip if empty
+        if not any(row.values()):
+            continue
+        # Footer detection
+        row_text_all = ' '.join(row.values())
+        if any(tok in _norm_match(row_text_all) for tok in ['resultado', 'resumo', 'total geral', 'totais', 'assinatura']):
             last_date = ''
-            for line in lines[header_idx + 1:]:
-                # Keep full line text to enable robust fallbacks independent of column boundaries
-                full_line_text = ' '.join(_norm(w.get('text', '')) for w in line if _norm(w.get('text', '')))
-                texts_by_key: dict[str, List[str]] = {b[2]: [] for b in boundaries}
-                for w in line:
-                    x = float(w.get('x0', 0.0))
-                    t = _norm(w.get('text', ''))
-                    for left, right, key in boundaries:
-                        if left <= x < right:
-                            texts_by_key[key].append(t)
-                            break
-                # Build row dict
-                row = {k: ' '.join(v).strip() for k, v in texts_by_key.items()}
-                # Skip if empty
-                if not any(row.values()):
-                    continue
-                # Footer detection
-                row_text_all = ' '.join(row.values())
-                if any(tok in norm_text(row_text_all) for tok in ['resultado', 'resumo', 'total geral', 'totais', 'assinatura']):
-                    last_date = ''
-                    break
-                # Try to extract date if missing
-                if not row.get('data'):
-                    d = _find_date(full_line_text or row_text_all)
-                    if d:
-                        row['data'] = d
-                # Try to extract missing codigo from full line
-                if not row.get('codigo'):
-                    fb = parse_line_fallback(full_line_text or row_text_all, excludes=[row.get('atendimento',''), row.get('conta','')])
-                    if 'codigo' in fb and fb['codigo']:
-                        row['codigo'] = fb['codigo']  # type: ignore
-                # Guard: avoid codigo equal to atendimento/conta
-                if row.get('codigo') and row.get('codigo') in {row.get('atendimento'), row.get('conta')}:
-                    row['codigo'] = ''
-                # Fill down last seen date if still missing
-                if row.get('data'):
-                    last_date = row['data']  # type: ignore
-                elif last_date:
-                    row['data'] = last_date
-
-                # Heuristic validity
-                has_code_or_proc = bool(row.get('codigo') or row.get('procedimento'))
-                q = _ptbr_to_decimal(row.get('quantidade'))
-                vp = _ptbr_to_decimal(row.get('valor_produzido'))
-                imp = _ptbr_to_decimal(row.get('imposto'))
-                vl = _ptbr_to_decimal(row.get('valor_liquido'))
-                # Fallbacks
-                if vl is None and vp is not None and imp is not None:
-                    vl = vp - imp
-                if imp is None and vp is not None and vl is not None:
-                    imp = vp - vl
-                any_numeric = any(v is not None for v in [q, vp, imp, vl])
-                if not has_code_or_proc or not any_numeric:
-                    continue
-
-                items.append(ParsedItem(
-                    atendimento=row.get('atendimento', ''),
-                    conta=row.get('conta', ''),
-                    paciente=row.get('paciente', ''),
-                    convenio=row.get('convenio', ''),
-                    categoria=row.get('categoria', ''),
-                    data=row.get('data', ''),
-                    codigo=row.get('codigo', ''),
-                    procedimento=row.get('procedimento', ''),
-                    funcao=row.get('funcao', ''),
-                    quantidade=q,
-                    valor_produzido=vp,
-                    imposto=imp,
-                    valor_liquido=vl,
-                    page=pi,
-                ))
+            break
+        # Try to extract date if missing
+        if not row.get('data'):
+            d = _find_date(full_line_text or row_text_all)
+            if d:
+                row['data'] = d
+        # Try to extract missing codigo from full line
+        if not row.get('codigo'):
+            _report_count('fallback_rows')
+            fb = parse_line_fallback(full_line_text or row_text_all, excludes=[row.get('atendimento',''), row.get('conta','')])
+            if 'codigo' in fb and fb['codigo']:
+                row['codigo'] = fb['codigo']  # type: ignore
+        # Guard: avoid codigo equal to atendimento/conta
+        if row.get('codigo') and row.get('codigo') in {row.get('atendimento'), row.get('conta')}:
+            row['codigo'] = ''
+        # Fill down last seen date if still missing
+        if row.get('data'):
+            last_date = row['data']  # type: ignore
+        elif last_date:
+            row['data'] = last_date
+
+        # Heuristic validity
+        has_code_or_proc = bool(row.get('codigo') or row.get('procedimento'))
+        q = _ptbr_to_decimal(row.get('quantidade'))
+        vp = _ptbr_to_decimal(row.get('valor_produzido'))
+        imp = _ptbr_to_decimal(row.get('imposto'))
+        vl = _ptbr_to_decimal(row.get('valor_liquido'))
+        # Fallbacks
+        if vl is None and vp is not None and imp is not None:
+            vl = vp - imp
+        if imp is None and vp is not None and vl is not None:
+            imp = vp - vl
+        any_numeric = any(v is not None for v in [q, vp, imp, vl])
+        if not has_code_or_proc or not any_numeric:
+            continue
 
+        items.append(ParsedItem(
+            atendimento=row.get('atendimento', ''),
+            conta=row.get('conta', ''),
+            paciente=row.get('paciente', ''),
+            convenio=row.get('convenio', ''),
+            categoria=row.get('categoria', ''),
+            data=row.get('data', ''),
+            codigo=row.get('codigo', ''),
+            procedimento=row.get('procedimento', ''),
+            funcao=row.get('funcao', ''),
+            quantidade=q,
+            valor_produzido=vp,
+            imposto=imp,
+            valor_liquido=vl,
+            page=pi,
+        ))
+    return items, last_date
+
+
+def parse_items_from_words(pdf_path: Path | PdfLayout, hint: LayoutHint | None = None) -> list[ParsedItem]:
+    """Fallback using word positions: detect header columns by synonyms and split lines by x-positions."""
+    items: list[ParsedItem] = []
+    with open_layout(pdf_path) as layout:
+        for pi in layout.page_numbers:
+            page_items, _ = _words_page_items(layout.words(pi, **ITEM_WORDS_KW), layout.width(pi), pi, hint=hint)
+            items.extend(page_items)
     return items
 
 
-def import_hospital_pdf(pdf_path: str, file_field=None) -> list:
-    """Importa o PDF criando um RemittanceHeader por profissional detectado.
-    Retorna a lista de headers criados.
+def parse_document(pdf_path: Path | PdfLayout, *, workers: int | None = None, backend: str | None = None,
+                   use_profile: bool | None = None) -> ParsedDocument:
+    """Parse completo (cabeçalho, itens e profissional por página) sobre um único PdfLayout.
+    O ParseReport do parse acompanha o documento e é registrado no log.
+    use_profile como em parse_pdf (False dispensa o banco).
     """
-    from .models import RemittanceHeader, RemittanceItem
-    pdfp = Path(pdf_path)
-    header, items = parse_pdf(pdfp)
-
-    # Detectar profissional por página e agrupar itens
-    page_prof = detect_professionals_by_page(pdfp)
-    # Propagar último prof conhecido caso alguma página não tenha
-    if not page_prof:
-        # fallback: usa o header global para todos
-        page_prof = {}
+    report = ParseReport()
+    with open_layout(pdf_path, backend) as layout:
+        header, items = parse_pdf(layout, workers=workers, use_profile=use_profile, report=report)
+        with report.stage('professionals'):
+            page_prof = detect_professionals_by_page(layout)
+        name = layout.path.name
+    _log_parse_report(name, report)
+    return ParsedDocument(header=header, items=items, page_professionals=page_prof, report=report)
+
+
+def _log_parse_report(name: str, report: ParseReport) -> None:
+    data = report.as_dict()
+    logger.info(
+        'parse_report %s',
+        json.dumps({'file': name, **data}, ensure_ascii=False, separators=(',', ':')),
+        extra={'parse_report': data, 'pdf_name': name},
+    )
+
+
+# Campos de ParsedItem gravados em RemittanceItem (page fica de fora: é o último campo)
+_PERSISTED_ITEM_FIELDS = _ITEM_FIELDS[:-1]
+
+
+_DATE_FIELD_INDEX = _ITEM_FIELDS.index('data')
+_CODIGO_FIELD_INDEX = _ITEM_FIELDS.index('codigo')
+_CONVENIO_FIELD_INDEX = _ITEM_FIELDS.index('convenio')
+_CATEGORIA_FIELD_INDEX = _ITEM_FIELDS.index('categoria')
+_SERVICE_DATE_RE = re.compile(r"\s*(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?(?!\d)")
+_COMPETENCIA_RE = re.compile(r"(\d{1,2})/(\d{4})")
+
+
+@lru_cache(maxsize=8192)
+def parse_service_date(text: str | None, competencia: str = '') -> date | None:
+    """Data do atendimento ('dd/mm', 'dd/mm/yy' ou 'dd/mm/yyyy') como date.
+    Sem ano, usa o da competência ('MM/AAAA'); mês posterior ao da competência é do ano
+    anterior (o atendimento precede o repasse). None se inválida ou sem ano para inferir.
+    """
+    m = _SERVICE_DATE_RE.match(text or '')
+    if not m:
+        return None
+    day, month, year = int(m.group(1)), int(m.group(2)), m.group(3)
+    if year:
+        y = int(year) + (2000 if len(year) == 2 else 0)
+    else:
+        comp = _COMPETENCIA_RE.search(competencia or '')
+        if not comp:
+            return None
+        y = int(comp.group(2)) - (1 if month > int(comp.group(1)) else 0)
+    try:
+        return date(y, month, day)
+    except ValueError:
+        return None
+
+
+def build_remittance_items(header, items: Iterable[ParsedItem]) -> list:
+    """RemittanceItem (ainda não salvos) do header, a partir dos ParsedItem.
+    Ponto único de conversão item parseado -> modelo usado por importações e reprocessamentos;
+    preenche data_atendimento com o ano da competência do header e as chaves normalizadas.
+    """
+    from .models import RemittanceItem
+
+    rows = map(_ITEM_GETTER, items)
+    names = _PERSISTED_ITEM_FIELDS
+    competencia = getattr(header, 'competencia', '') or ''
+    cnpj = getattr(header, 'cnpj', '') or ''
+    code_i, conv_i, cat_i = _CODIGO_FIELD_INDEX, _CONVENIO_FIELD_INDEX, _CATEGORIA_FIELD_INDEX
+    return [
+        RemittanceItem(
+            header=header,
+            data_atendimento=parse_service_date(row[_DATE_FIELD_INDEX], competencia),
+            **dict(zip(names, row)),
+            **dict(zip(MATCH_KEY_FIELDS, match_keys(row[code_i], row[conv_i], row[cat_i], cnpj))),
+        )
+        for row in rows
+    ]
+
+
+def group_items_by_professional(doc: ParsedDocument) -> dict[tuple[str, str], list[ParsedItem]]:
+    """Agrupa os itens por (profissional_nome, especialidade), conforme o profissional da página."""
+    header = doc.header
+    page_prof = doc.page_professionals or {}
     groups: dict[tuple[str, str], list[ParsedItem]] = {}
     last_prof_key: tuple[str, str] | None = None
-    for it in items:
+    for it in doc.items:
         key = None
         if it.page and it.page in page_prof:
             prof, esp = page_prof[it.page]
@@ -800,6 +1632,53 @@ def import_hospital_pdf(pdf_path: str, file_field=None) -> list:
         else:
             key = last_prof_key or (header.profissional_nome, header.especialidade)
         groups.setdefault(key, []).append(it)
+    return groups
+
+
+def pages_by_professional(doc: ParsedDocument) -> dict[tuple[str, str], list[int]]:
+    """Páginas de cada profissional (mesma chave de group_items_by_professional)."""
+    header = doc.header
+    pages: dict[tuple[str, str], set[int]] = {}
+    for key, its in group_items_by_professional(doc).items():
+        pages.setdefault(key, set()).update(it.page for it in its if it.page)
+    for page, (prof, esp) in (doc.page_professionals or {}).items():
+        pages.setdefault((prof or header.profissional_nome, esp or header.especialidade), set()).add(page)
+    return {key: sorted(p) for key, p in pages.items()}
+
+
+def items_for_headers(doc: ParsedDocument, headers: list) -> dict[int, list[ParsedItem]]:
+    """Distribui os itens de um documento reparseado entre RemittanceHeader já existentes do
+    mesmo arquivo, pelo (profissional_nome, especialidade) de cada header. Se o documento
+    tem um único grupo e um único header, o header recebe todos os itens (importações sem
+    separação por profissional); headers sem correspondência ficam de fora.
+    """
+    groups = group_items_by_professional(doc)
+    result: dict[int, list[ParsedItem]] = {}
+    for hdr in headers:
+        key = (hdr.profissional_nome, hdr.especialidade)
+        if key in groups:
+            result[hdr.id] = groups[key]
+    if len(headers) == 1 and not result and len(groups) <= 1:
+        result[headers[0].id] = list(doc.items)
+    return result
+
+
+def import_parsed_document(doc: ParsedDocument, file_field=None, *, source_sha256: str = '', document=None) -> list:
+    """Persiste um documento já parseado criando um RemittanceHeader por profissional detectado.
+    Todos os headers apontam para o mesmo StoredDocument (document, ou file_field armazenado
+    uma vez); source_sha256 (hash do PDF de origem) permite reconhecer arquivos já importados.
+    Retorna a lista de headers criados.
+    """
+    from .models import RemittanceHeader, RemittanceItem
+    header, items = doc.header, doc.items
+    if document is None and file_field:
+        document = store_document(file_field, sha256=source_sha256)
+    if document is not None:
+        source_sha256 = document.sha256
+
+    # Agrupar itens pelo profissional detectado em cada página
+    groups = group_items_by_professional(doc)
+    page_groups = pages_by_professional(doc)
 
     headers_created: list[RemittanceHeader] = []
     for (prof_name, esp), its in groups.items():
@@ -811,29 +1690,13 @@ def import_hospital_pdf(pdf_path: str, file_field=None) -> list:
             previsao_pagamento=header.previsao_pagamento,
             profissional_nome=prof_name or header.profissional_nome,
             especialidade=esp or header.especialidade,
+            parse_report=doc.report.as_dict() if doc.report else None,
+            source_sha256=source_sha256,
+            document=document,
+            parser_version=PARSER_VERSION,
+            pages=page_groups.get((prof_name, esp), []),
         )
-        if file_field:
-            # anexar o arquivo também a este header para permitir reprocessamento individual
-            hdr.original_file.save(getattr(file_field, 'name', 'upload.pdf'), file_field, save=True)
-
-        RemittanceItem.objects.bulk_create([
-            RemittanceItem(
-                header=hdr,
-                atendimento=i.atendimento,
-                conta=i.conta,
-                paciente=i.paciente,
-                convenio=i.convenio,
-                categoria=i.categoria,
-                data=i.data,
-                codigo=i.codigo,
-                procedimento=i.procedimento,
-                funcao=i.funcao,
-                quantidade=i.quantidade,
-                valor_produzido=i.valor_produzido,
-                imposto=i.imposto,
-                valor_liquido=i.valor_liquido,
-            ) for i in its
-        ])
+        RemittanceItem.objects.bulk_create(build_remittance_items(hdr, its))
         headers_created.append(hdr)
 
     # Caso não tenha separado (p.ex. nenhum prof detectado), cria 1 com todos
@@ -846,171 +1709,1000 @@ def import_hospital_pdf(pdf_path: str, file_field=None) -> list:
             previsao_pagamento=header.previsao_pagamento,
             profissional_nome=header.profissional_nome,
             especialidade=header.especialidade,
+            parse_report=doc.report.as_dict() if doc.report else None,
+            source_sha256=source_sha256,
+            document=document,
+            parser_version=PARSER_VERSION,
         )
-        if file_field:
-            hdr.original_file.save(getattr(file_field, 'name', 'upload.pdf'), file_field, save=True)
-        RemittanceItem.objects.bulk_create([
-            RemittanceItem(
-                header=hdr,
-                atendimento=i.atendimento,
-                conta=i.conta,
-                paciente=i.paciente,
-                convenio=i.convenio,
-                categoria=i.categoria,
-                data=i.data,
-                codigo=i.codigo,
-                procedimento=i.procedimento,
-                funcao=i.funcao,
-                quantidade=i.quantidade,
-                valor_produzido=i.valor_produzido,
-                imposto=i.imposto,
-                valor_liquido=i.valor_liquido,
-            ) for i in items
-        ])
+        RemittanceItem.objects.bulk_create(build_remittance_items(hdr, items))
         headers_created.append(hdr)
 
     return headers_created
 
 
-def parse_pdf(pdf_path: Path) -> tuple[ParsedHeader, list[ParsedItem]]:
-    """High-level parse: extract header and items with fallbacks."""
-    df = extract_pdf_dataframe(pdf_path)
-    header = parse_header_from_words(pdf_path)
+def import_hospital_pdf(pdf_path: str, file_field=None, *, workers: int | None = None) -> list:
+    """Importa o PDF criando um RemittanceHeader por profissional detectado.
+    Retorna a lista de headers criados.
+    """
+    digest = file_sha256(pdf_path)
+    return import_parsed_document(
+        parse_document_cached(Path(pdf_path), workers=workers, sha256=digest),
+        file_field=file_field,
+        source_sha256=digest,
+    )
+
+
+def reprocess_header(hdr) -> list[ParsedItem]:
+    """Reparseia só as páginas do profissional do header (hdr.pages) e substitui apenas os
+    itens dele. Headers sem páginas registradas (importados antes disso) passam pelo parse do
+    arquivo inteiro e ficam com as páginas gravadas. ValueError se o profissional não for
+    encontrado no PDF.
+    """
+    from django.db import transaction
+    from .models import RemittanceHeader, RemittanceItem
 
-    items: list[ParsedItem] = []
-    if _tables_look_collapsed(df):
-        # Preferir modos baseados em palavras/linhas
-        items = parse_items_from_words(pdf_path)
-        if not items:
-            items = parse_items_from_text(pdf_path)
-        if not items:
-            items = parse_items_from_tables(df)
+    path = Path(hdr.source_file.path)
+    if hdr.pages:
+        with PdfLayout(path, pages=hdr.pages) as layout:
+            doc = parse_document(layout)
+        pages = list(hdr.pages)
     else:
-        items = parse_items_from_tables(df)
-        if not items:
-            items = parse_items_from_words(pdf_path)
-        if not items:
-            items = parse_items_from_text(pdf_path)
-
-    # Enriquecer datas faltantes cruzando com parsers alternativos (words/text)
-    def sign_key(it: ParsedItem) -> tuple:
-        # Chave de match robusta sem depender de paciente: codigo (se houver), procedimento, qtd e valores
-        proc = (it.procedimento or '').strip()[:80].lower()
-        cod = (it.codigo or '').strip().lower()
-        def rf(x):
+        doc = parse_document_cached(path, sha256=hdr.source_sha256)
+        pages = pages_by_professional(doc).get((hdr.profissional_nome, hdr.especialidade), [])
+    items = items_for_headers(doc, [hdr]).get(hdr.id)
+    if items is None:
+        raise ValueError(f'profissional "{hdr.profissional_nome}" não encontrado no PDF')
+
+    with transaction.atomic():
+        RemittanceItem.objects.filter(header=hdr).delete()
+        RemittanceItem.objects.bulk_create(build_remittance_items(hdr, items))
+        RemittanceHeader.objects.filter(id=hdr.id).update(
+            parser_version=PARSER_VERSION,
+            parse_report=doc.report.as_dict() if doc.report else None,
+            pages=pages,
+        )
+    return items
+
+
+def parse_pdf(pdf_path: Path | PdfLayout, *, workers: int | None = None,
+              use_profile: bool | None = None, backend: str | None = None,
+              report: ParseReport | None = None) -> tuple[ParsedHeader, list[ParsedItem]]:
+    """High-level parse: extract header and items with fallbacks.
+    Aceita um PdfLayout já aberto para compartilhar as extrações com outros passos.
+    workers > 1 extrai as páginas em paralelo (default: settings.RECONCILIATION_PARSE_WORKERS).
+    use_profile aplica/aprende o perfil de layout do hospital pelo CNPJ
+    (default: settings.RECONCILIATION_LAYOUT_PROFILES).
+    backend: 'pdfplumber' ou 'pdfium' para texto/palavras (default: settings.RECONCILIATION_PDF_BACKEND).
+    report: ParseReport preenchido com tempos por etapa e contadores deste parse.
+    """
+    if workers is None:
+        workers = int(_setting('RECONCILIATION_PARSE_WORKERS', 1) or 1)
+    if use_profile is None:
+        use_profile = bool(_setting('RECONCILIATION_LAYOUT_PROFILES', False))
+    token = _ACTIVE_REPORT.set(report) if report is not None else None
+    start = time.perf_counter()
+    try:
+        with open_layout(pdf_path, backend) as layout:
+            hint = None
+            if use_profile:
+                hint = load_layout_hint(parse_header_from_words(layout).cnpj)
+            # Com perfil de palavras/texto só as tabelas da primeira página são extraídas
+            if hint is None or hint.strategy == 'tables':
+                with _report_stage('prefetch'):
+                    layout.prefetch(workers)
+            header, items, learned = _parse_layout(layout, hint)
+            if use_profile:
+                if learned is not None:
+                    save_layout_hint(header.cnpj, learned)
+                elif hint is not None:
+                    _touch_layout_profile(header.cnpj)
+            if report is not None:
+                report.backend = layout.backend
+                report.pages = len(layout.page_numbers)
+                report.items = len(items)
+                report.undated_items = sum(1 for it in items if not (it.data or '').strip())
+            return header, items
+    finally:
+        if token is not None:
+            report.total_seconds = round(report.total_seconds + time.perf_counter() - start, 4)
+            _ACTIVE_REPORT.reset(token)
+
+
+class _StrategyResults:
+    """Saída de cada estratégia de parse ('tables', 'words', 'text'), calculada no máximo
+    uma vez por parse: a cadeia de fallback e o enriquecimento de datas compartilham o resultado.
+    """
+
+    def __init__(self, layout: PdfLayout, hint: LayoutHint | None = None):
+        self.layout = layout
+        self.hint = hint
+        self._df: pd.DataFrame | None = None
+        self._items: dict[str, list[ParsedItem]] = {}
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._df is None:
+            with _report_stage('extract_tables'):
+                self._df = extract_pdf_dataframe(self.layout)
+        return self._df
+
+    def get(self, strategy: str) -> list[ParsedItem]:
+        if strategy not in self._items:
+            df = self.df if strategy == 'tables' else None
+            with _report_stage(f'strategy_{strategy}'):
+                self._items[strategy] = self._run(strategy, df)
+        return self._items[strategy]
+
+    def _run(self, strategy: str, df: pd.DataFrame | None) -> list[ParsedItem]:
+        if strategy == 'tables':
+            return parse_items_from_tables(df)
+        if strategy == 'words':
+            return parse_items_from_words(self.layout, self.hint)
+        if strategy == 'text':
+            return parse_items_from_text(self.layout)
+        raise ValueError(f'estratégia desconhecida: {strategy}')
+
+
+
+def _parse_layout(layout: PdfLayout, hint: LayoutHint | None = None) -> tuple[ParsedHeader, list[ParsedItem], LayoutHint | None]:
+    """Parse sobre o layout. Com hint, aplica direto a estratégia do perfil; sem hint ou se o
+    cabeçalho não coincidir, faz a detecção completa e devolve o perfil aprendido.
+    Retorna (header, itens, perfil aprendido ou None se o hint foi aplicado).
+    """
+    report = _ACTIVE_REPORT.get()
+    with _report_stage('header'):
+        header = parse_header_from_words(layout)
+    results = _StrategyResults(layout, hint)
+
+    items = _parse_with_hint(results, hint) if hint is not None else None
+    learned = None
+    if items is not None and report is not None:
+        report.strategy = hint.strategy
+        report.profile_applied = True
+    if items is None:
+        if _tables_look_collapsed(results.df):
+            # Preferir modos baseados em palavras/linhas
+            order = ['words', 'text', 'tables']
+        else:
+            order = ['tables', 'words', 'text']
+        items = []
+        for strategy in order:
+            items = results.get(strategy)
+            if items:
+                if report is not None:
+                    report.strategy = strategy
+                learned = _learn_layout(results, strategy)
+                break
+
+    # Enriquecer datas faltantes cruzando com parsers alternativos (words/text), já memorizados
+    if any(not (it.data or '').strip() for it in items):
+        with _report_stage('date_signature'):
+            _report_count('dates_from_signature', _fill_dates_by_signature(items, [
+                lambda: results.get('words'),
+                lambda: results.get('text'),
+            ]))
+    # Último reforço: buscar linha no texto da página usando trio monetário (produzido, imposto, líquido)
+    if any(not (it.data or '').strip() for it in items):
+        with _report_stage('date_lines'):
             try:
-                return round(float(x), 2) if x is not None else None
+                page_lines: dict[int, list[str]] = {}
+                for pi in layout.page_numbers:
+                    tx = layout.text(pi)
+                    page_lines[pi] = [l for l in tx.splitlines() if l.strip()]
+                _report_count('dates_from_lines', _fill_dates_from_lines(items, page_lines))
             except Exception:
-                return None
-        q = rf(it.quantidade)
-        vp = rf(it.valor_produzido)
-        imp = rf(it.imposto)
-        liq = rf(it.valor_liquido if it.valor_liquido is not None else ((it.valor_produzido or 0) - (it.imposto or 0)))
-        return (cod, proc, q, vp, imp, liq)
-
-    missing = [it for it in items if not (it.data or '').strip()]
-    if missing:
-        # tentar via words
+                pass
+    return header, items, learned
+
+
+def _sign_key(it: ParsedItem) -> tuple:
+    # Chave de match robusta sem depender de paciente: codigo (se houver), procedimento, qtd e valores
+    proc = (it.procedimento or '').strip()[:80].lower()
+    cod = (it.codigo or '').strip().lower()
+    def rf(x):
         try:
-            words_items = parse_items_from_words(pdf_path)
+            return round(float(x), 2) if x is not None else None
         except Exception:
-            words_items = []
-        dates_by_sig: dict[tuple, str] = {}
-        for wi in words_items:
-            if wi.data:
-                dates_by_sig[sign_key(wi)] = wi.data
-        # fallback text
-        if not dates_by_sig:
-            try:
-                text_items = parse_items_from_text(pdf_path)
-            except Exception:
-                text_items = []
-            for ti in text_items:
-                if ti.data:
-                    dates_by_sig[sign_key(ti)] = ti.data
-
-        # preencher a partir de assinaturas
-        for it in items:
-            if not (it.data or '').strip():
-                d = dates_by_sig.get(sign_key(it))
-                if d:
-                    it.data = d
-    # Último reforço: buscar linha no texto da página usando trio monetário (produzido, imposto, líquido)
-    if any(not (it.data or '').strip() for it in items):
+            return None
+    q = rf(it.quantidade)
+    vp = rf(it.valor_produzido)
+    imp = rf(it.imposto)
+    liq = rf(it.valor_liquido if it.valor_liquido is not None else ((it.valor_produzido or 0) - (it.imposto or 0)))
+    return (cod, proc, q, vp, imp, liq)
+
+
+def _fill_dates_by_signature(items: list[ParsedItem], sources: Iterable) -> int:
+    """Preenche datas faltantes com itens de outras estratégias que tenham a mesma assinatura.
+    sources são callables avaliados em ordem até que algum forneça datas.
+    Retorna quantos itens receberam data.
+    """
+    dates_by_sig: dict[tuple, str] = {}
+    for source in sources:
         try:
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                page_lines: dict[int, list[str]] = {}
-                for pi, page in enumerate(pdf.pages, start=1):
-                    tx = page.extract_text() or ''
-                    page_lines[pi] = [l for l in tx.splitlines() if l.strip()]
+            candidates = source()
+        except Exception:
+            candidates = []
+        for ci in candidates:
+            if ci.data:
+                dates_by_sig[_sign_key(ci)] = ci.data
+        if dates_by_sig:
+            break
+
+    # preencher a partir de assinaturas
+    filled = 0
+    for it in items:
+        if not (it.data or '').strip():
+            d = dates_by_sig.get(_sign_key(it))
+            if d:
+                it.data = d
+                filled += 1
+    return filled
+
+
+# Valores monetários pt-BR com ou sem separador de milhar (ex.: 1.234,50 e 1234,50)
+_MONEY_ANY_RE = re.compile(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}")
+
+
+def _money_key(val: float | None) -> float | None:
+    if val is None:
+        return None
+    try:
+        return round(float(val), 2)
+    except Exception:
+        return None
+
+
+def _money_triple_index(lines: list[str]) -> dict[tuple[float, float, float], str]:
+    """Indexa as linhas de uma página pelo trio (produzido, imposto, líquido).
+
+    Cada linha é tokenizada uma vez; cada sequência de três valores consecutivos
+    aponta para a primeira linha que a contém.
+    """
+    index: dict[tuple[float, float, float], str] = {}
+    for ln in lines:
+        values = [round(float(t.replace('.', '').replace(',', '.')), 2) for t in _MONEY_ANY_RE.findall(ln)]
+        for i in range(len(values) - 2):
+            index.setdefault((values[i], values[i + 1], values[i + 2]), ln)
+    return index
+
+
+def _fill_dates_from_lines(items: list[ParsedItem], page_lines: dict[int, list[str]]) -> int:
+    """Data da linha da página que contém o trio monetário (produzido, imposto, líquido) do item.
+    Retorna quantos itens receberam data.
+    """
+    filled = 0
+    indexes: dict[int, dict[tuple[float, float, float], str]] = {}
+    for it in items:
+        if (it.data or '').strip():
+            continue
+        key = (
+            _money_key(it.valor_produzido),
+            _money_key(it.imposto),
+            _money_key(it.valor_liquido if it.valor_liquido is not None else ((it.valor_produzido or 0) - (it.imposto or 0))),
+        )
+        if None in key:
+            continue
+        page = getattr(it, 'page', 0) or 0
+        if page not in indexes:
+            indexes[page] = _money_triple_index(page_lines.get(page) or [])
+        found_line = indexes[page].get(key)
+        if found_line:
+            d = tokenize_line(found_line).date
+            if d:
+                it.data = d
+                filled += 1
+    return filled
+
+
+# ---------------------- Perfil de layout por hospital (CNPJ) ----------------------
+def _cnpj_key(cnpj: str | None) -> str:
+    return ''.join(ch for ch in (cnpj or '') if ch.isdigit())
+
+
+def _tables_still_collapsed(layout: PdfLayout) -> bool:
+    """Perfis de palavras/texto só valem enquanto as tabelas da primeira página continuam
+    achatadas (ou ausentes): um demonstrativo com grade do mesmo hospital volta às tabelas.
+    Página sem traços não tem tabela: dispensa o extract_tables."""
+    page_no = layout.page_numbers[0]
+    if not layout.has_rulings(page_no):
+        return True
+    df = pd.DataFrame(_page_table_rows(layout, page_no))
+    return df.empty or _tables_look_collapsed(df)
+
+
+def _parse_with_hint(results: _StrategyResults, hint: LayoutHint) -> list[ParsedItem] | None:
+    """Aplica somente a estratégia do perfil. None quando o cabeçalho da primeira página
+    não coincide com a impressão digital, quando um perfil de palavras/texto encontra
+    tabelas com grade (ou nada é extraído): cai na detecção completa."""
+    layout = results.layout
+    if hint.strategy in ('words', 'text') and not _tables_still_collapsed(layout):
+        return None
+    if hint.strategy == 'words':
+        lines = _cluster_lines(layout.words(1, **ITEM_WORDS_KW), y_tol=2.0)
+        if not any(_words_line_fingerprint(line) == hint.header_fingerprint for line in lines):
+            return None
+    elif hint.strategy == 'text':
+        if _text_header_fingerprint(layout.text(1)) != hint.header_fingerprint:
+            return None
+    elif hint.strategy == 'tables':
+        if hint.header_fingerprint not in _table_header_fingerprints(results.df):
+            return None
+    else:
+        return None
+    return results.get(hint.strategy) or None
+
+
+def _learn_layout(results: _StrategyResults, strategy: str) -> LayoutHint:
+    """Perfil a partir da detecção completa: cabeçalho da primeira página que o tiver."""
+    layout = results.layout
+    hint = LayoutHint(strategy=strategy)
+    if strategy == 'words':
+        for pi in layout.page_numbers:
+            lines = _cluster_lines(layout.words(pi, **ITEM_WORDS_KW), y_tol=2.0)
+            header_idx, boundaries = _find_words_header(lines, layout.width(pi))
+            if header_idx != -1 and boundaries:
+                hint.header_fingerprint = _words_line_fingerprint(lines[header_idx])
+                hint.column_bounds = [[left, right, key] for left, right, key in boundaries]
+                break
+    elif strategy == 'text':
+        for pi in layout.page_numbers:
+            hint.header_fingerprint = _text_header_fingerprint(layout.text(pi))
+            if hint.header_fingerprint:
+                break
+    elif strategy == 'tables':
+        fingerprints = _table_header_fingerprints(results.df)
+        hint.header_fingerprint = fingerprints[0] if fingerprints else ''
+    return hint
+
+
+def load_layout_hint(cnpj: str | None) -> LayoutHint | None:
+    """Perfil salvo para o CNPJ na versão atual do parser, se houver."""
+    from .models import LayoutProfile
+    key = _cnpj_key(cnpj)
+    if not key:
+        return None
+    profile = LayoutProfile.objects.filter(cnpj=key, parser_version=PARSER_VERSION).first()
+    if profile is None or not profile.header_fingerprint:
+        return None
+    return LayoutHint(
+        strategy=profile.strategy,
+        header_fingerprint=profile.header_fingerprint,
+        column_bounds=profile.column_bounds or [],
+    )
+
+
+def save_layout_hint(cnpj: str | None, hint: LayoutHint) -> None:
+    from .models import LayoutProfile
+    key = _cnpj_key(cnpj)
+    if not key or not hint.header_fingerprint:
+        return
+    LayoutProfile.objects.update_or_create(
+        cnpj=key,
+        defaults={
+            'parser_version': PARSER_VERSION,
+            'strategy': hint.strategy,
+            'header_fingerprint': hint.header_fingerprint,
+            'column_bounds': hint.column_bounds,
+        },
+    )
+
+
+def _touch_layout_profile(cnpj: str | None) -> None:
+    from django.db.models import F
+    from .models import LayoutProfile
+    LayoutProfile.objects.filter(cnpj=_cnpj_key(cnpj)).update(hits=F('hits') + 1)
+
+
+# ---------------------- Parse em streaming (página a página) ----------------------
+# Itens acumulados antes de cada bulk_create na importação em streaming
+STREAMING_BATCH_SIZE = 500
+
+
+def iter_parsed_items(pdf_path: Path | str, *, progress: Callable[[int, int], None] | None = None
+                      ) -> Iterator[tuple[tuple[str, str] | None, ParsedItem]]:
+    """Gera (profissional, item) página a página, sem materializar o documento inteiro.
+
+    Mantém entre páginas apenas o estado necessário (última data, profissional corrente
+    e o bloco de tabela aberto) e libera as extrações de cada página após processá-la,
+    de modo que a memória fica limitada pelo tamanho de uma página.
+    A escolha da estratégia (tabelas/palavras/texto) e o reforço de datas são feitos por página.
+    """
+    table_parser = _TableBlockParser()
+    last_date = ''
+    last_prof: tuple[str, str] | None = None
+    with PdfLayout(pdf_path) as layout:
+        layout.progress = progress
+        report = _ACTIVE_REPORT.get()
+        if report is not None:
+            report.backend = layout.backend
+        for pi in layout.page_numbers:
+            _report_count('pages')
+            prof = _professional_from_words(layout.words(pi, **HEADER_WORDS_KW))
+            if prof:
+                last_prof = prof
+
+            rows = _page_table_rows(layout, pi)
+            collapsed = _tables_look_collapsed(pd.DataFrame(rows))
+
+            def table_items() -> list[ParsedItem]:
+                out = []
+                for r in rows:
+                    it = table_parser.feed([_norm(r.get(f'c{j}', '')) for j in range(20)], pi)
+                    if it is not None:
+                        out.append(it)
+                return out
+
+            # resultados por estratégia da página, reaproveitados no enriquecimento de datas
+            page_results: dict[str, list[ParsedItem]] = {}
+
+            def words_items() -> list[ParsedItem]:
+                if 'words' not in page_results:
+                    page_results['words'] = _words_page_items(layout.words(pi, **ITEM_WORDS_KW), layout.width(pi), pi, carry_date=last_date)[0]
+                return page_results['words']
+
+            def text_items() -> list[ParsedItem]:
+                if 'text' not in page_results:
+                    page_results['text'] = _text_page_items(_page_column_text(layout, pi), pi, carry_date=last_date)[0]
+                return page_results['text']
+
+            chain = [words_items, text_items, table_items] if collapsed else [table_items, words_items, text_items]
+            items: list[ParsedItem] = []
+            for strategy in chain:
+                items = strategy()
+                if items:
+                    break
 
-            def fmt_ptbr(val: float | None) -> list[str]:
-                if val is None:
-                    return []
+            if any(not (it.data or '').strip() for it in items):
+                _fill_dates_by_signature(items, [words_items, text_items])
+            if any(not (it.data or '').strip() for it in items):
                 try:
-                    v = round(float(val), 2)
+                    _fill_dates_from_lines(items, {pi: [l for l in layout.text(pi).splitlines() if l.strip()]})
                 except Exception:
-                    return []
-                # '1234,50' e '1.234,50'
-                s = f"{v:,.2f}"  # '1,234.50'
-                s = s.replace(',', 'X').replace('.', ',').replace('X', '.')
-                no_thousand = s.replace('.', '') if '.' in s and s.count(',') == 1 else s
-                variants = {s}
-                variants.add(no_thousand)
-                return list(variants)
+                    pass
 
             for it in items:
-                if (it.data or '').strip():
-                    continue
-                lines = page_lines.get(getattr(it, 'page', 0) or 0) or []
-                vp_vars = fmt_ptbr(it.valor_produzido)
-                imp_vars = fmt_ptbr(it.imposto)
-                liq_vars = fmt_ptbr(it.valor_liquido if it.valor_liquido is not None else ((it.valor_produzido or 0) - (it.imposto or 0)))
-                if not (vp_vars and imp_vars and liq_vars):
-                    continue
-                found_line = None
-                for ln in lines:
-                    if any(v in ln for v in vp_vars) and any(v in ln for v in imp_vars) and any(v in ln for v in liq_vars):
-                        found_line = ln
-                        break
-                if found_line:
-                    d = _find_date(found_line)
-                    if d:
-                        it.data = d
-        except Exception:
-            pass
-    return header, items
+                if it.data:
+                    last_date = it.data
+                yield last_prof, it
+            layout.release(pi)
+
+
+def import_hospital_pdf_streaming(pdf_path: str, file_field=None, *, batch_size: int | None = None,
+                                  source_sha256: str = '', progress: Callable[[int, int], None] | None = None,
+                                  document=None, items: Iterable[tuple] | None = None) -> list:
+    """Variante de import_hospital_pdf para PDFs grandes: consome iter_parsed_items e grava
+    os itens em lotes de bulk_create, sem manter a lista completa em memória.
+    items: pares (profissional, item) já extraídos, p.ex. de spool_parsed_items (o parse
+    não roda dentro da transação); default: iter_parsed_items do arquivo.
+    Retorna a lista de headers criados (um por profissional detectado).
+    """
+    from django.db import transaction
+    from .models import RemittanceHeader, RemittanceItem
 
+    if document is None and file_field:
+        document = store_document(file_field, sha256=source_sha256)
+    if document is not None:
+        source_sha256 = document.sha256
+
+    batch_size = batch_size or int(_setting('RECONCILIATION_STREAMING_BATCH_SIZE', STREAMING_BATCH_SIZE))
+    header = parse_header_from_words(Path(pdf_path))
+    headers: dict[tuple[str, str], RemittanceHeader] = {}
+
+    def header_for(key: tuple[str, str]):
+        if key not in headers:
+            hdr = RemittanceHeader.objects.create(
+                repasse_numero=header.repasse_numero,
+                terceiro_nome=header.terceiro_nome,
+                competencia=header.competencia,
+                cnpj=header.cnpj,
+                previsao_pagamento=header.previsao_pagamento,
+                profissional_nome=key[0],
+                especialidade=key[1],
+                source_sha256=source_sha256,
+                document=document,
+                parser_version=PARSER_VERSION,
+            )
+            headers[key] = hdr
+        return headers[key]
+
+    report = ParseReport(strategy='streaming')
+    token = _ACTIVE_REPORT.set(report)
+    start = time.perf_counter()
+    page_sets: dict[tuple[str, str], set[int]] = {}
+    if items is None:
+        items = iter_parsed_items(pdf_path, progress=progress)
+    try:
+        with transaction.atomic():
+            page_sets = _stream_items(items, header, header_for, batch_size, report)
+            # Nenhum item/profissional: mantém o comportamento do import em lote (1 header vazio)
+            if not headers:
+                header_for((header.profissional_nome, header.especialidade))
+    finally:
+        report.total_seconds = round(time.perf_counter() - start, 4)
+        _ACTIVE_REPORT.reset(token)
+
+    report_data = report.as_dict()
+    for key, hdr in headers.items():
+        hdr.pages = sorted(page_sets.get(key, ()))
+        RemittanceHeader.objects.filter(id=hdr.id).update(parse_report=report_data, pages=hdr.pages)
+    _log_parse_report(Path(pdf_path).name, report)
+    return list(headers.values())
+
+
+def _stream_items(items: Iterable[tuple], header: ParsedHeader, header_for, batch_size: int,
+                  report: ParseReport) -> dict[tuple[str, str], set[int]]:
+    """Grava os pares (profissional, item) de iter_parsed_items em lotes de bulk_create;
+    retorna as páginas de cada profissional."""
+    from .models import RemittanceItem
+
+    # itens pendentes por profissional até completar um lote
+    pending: dict[tuple[str, str], list[ParsedItem]] = {}
+    pending_count = 0
+    page_sets: dict[tuple[str, str], set[int]] = {}
+
+    def flush() -> None:
+        objs = []
+        for key, batch in pending.items():
+            objs.extend(build_remittance_items(header_for(key), batch))
+            batch.clear()
+        RemittanceItem.objects.bulk_create(objs)
+
+    with report.stage('stream'):
+        for prof, i in items:
+            report.items += 1
+            if not (i.data or '').strip():
+                report.undated_items += 1
+            prof_name, esp = prof or ('', '')
+            key = (prof_name or header.profissional_nome, esp or header.especialidade)
+            if i.page:
+                page_sets.setdefault(key, set()).add(i.page)
+            if key not in pending:
+                header_for(key)
+                pending[key] = []
+            pending[key].append(i)
+            pending_count += 1
+            if pending_count >= batch_size:
+                flush()
+                pending_count = 0
+        if pending_count:
+            flush()
+    return page_sets
+
+
+@contextmanager
+def spool_parsed_items(pdf_path: Path | str, *, progress: Callable[[int, int], None] | None = None
+                       ) -> Iterator[Iterator[tuple]]:
+    """Faz todo o parse em streaming (iter_parsed_items) para um arquivo temporário e entrega
+    um iterador que relê os pares (profissional, item) na ordem. Separa o parse longo da
+    transação de gravação sem manter os itens em memória.
+    """
+    with tempfile.TemporaryFile() as spool:
+        for pair in iter_parsed_items(pdf_path, progress=progress):
+            pickle.dump(pair, spool, pickle.HIGHEST_PROTOCOL)
+        spool.seek(0)
 
-# ---------------------- Reconciliation helper ----------------------
-def _norm_code(s: str | None) -> str:
-    if not s:
-        return ""
-    t = str(s)
-    digits = ''.join(ch for ch in t if ch.isdigit())
-    return digits or t.strip()
+        def replay() -> Iterator[tuple]:
+            while True:
+                try:
+                    yield pickle.load(spool)
+                except EOFError:
+                    return
+
+        yield replay()
+
+
+# ---------------------- Cache de parse por conteúdo ----------------------
+# Incrementar sempre que uma mudança no parser alterar o resultado: entradas de
+# versões anteriores deixam de ser usadas e são descartadas na próxima gravação.
+PARSER_VERSION = '5'
+
+
+def file_sha256(pdf_path: Path | str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
 
+# ---------------------- Armazenamento dos PDFs por conteúdo ----------------------
+DOCUMENT_CHUNK_SIZE = 1024 * 1024
+
+
+def stored_document_name(sha256: str) -> str:
+    """Caminho (relativo a MEDIA_ROOT) do PDF com esse hash: documents/ab/abcd....pdf."""
+    return f'documents/{sha256[:2]}/{sha256}.pdf'
+
+
+def _iter_chunks(source, chunk_size: int = DOCUMENT_CHUNK_SIZE) -> Iterator[bytes]:
+    if hasattr(source, 'chunks'):
+        # UploadedFile/File do Django (chunks() já volta ao início do arquivo)
+        yield from source.chunks(chunk_size)
+        return
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    yield from iter(lambda: source.read(chunk_size), b'')
+
+
+def store_document(source, *, name: str = '', sha256: str = ''):
+    """Armazena o PDF uma única vez, nomeado pelo SHA-256 do conteúdo, e retorna o StoredDocument
+    (o já existente, se o mesmo conteúdo foi enviado antes).
+
+    source pode ser um caminho, um arquivo aberto ou um UploadedFile. O conteúdo é lido uma vez:
+    cada chunk vai para um arquivo temporário já no diretório final enquanto o hash é calculado,
+    e ao fim o arquivo é renomeado para o nome do hash (ou descartado, se já existia). Com
+    sha256 informado e o documento já armazenado, nada é lido. Requer storage em disco local.
+    """
+    from django.core.files.storage import default_storage
+    from .models import StoredDocument
+
+    if sha256:
+        existing = StoredDocument.objects.filter(sha256=sha256).first()
+        if existing is not None:
+            return existing
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as fh:
+            return store_document(fh, name=name or Path(source).name)
+
+    name = Path(name or getattr(source, 'name', '') or 'upload.pdf').name
+    tmp_dir = Path(default_storage.path('documents/tmp'))
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in _iter_chunks(source):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = h.hexdigest()
+        doc = StoredDocument.objects.filter(sha256=digest).first()
+        if doc is None:
+            rel = stored_document_name(digest)
+            final = Path(default_storage.path(rel))
+            final.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, _setting('FILE_UPLOAD_PERMISSIONS', None) or 0o644)
+            # rename no mesmo sistema de arquivos: o arquivo final nunca fica pela metade
+            os.replace(tmp_path, final)
+            doc, _ = StoredDocument.objects.get_or_create(
+                sha256=digest, defaults={'file': rel, 'size': size, 'original_name': name[:256]},
+            )
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return doc
+
+
+def discard_unused_document(document) -> bool:
+    """Apaga o documento (registro e arquivo) se nenhum header ou ImportJob o referencia."""
+    if document is None or document.headers.exists() or document.import_jobs.exists():
+        return False
+    document.file.delete(save=False)
+    document.delete()
+    return True
+
+
+def _serialize_parse(doc: ParsedDocument) -> dict:
+    """Forma compacta: cabeçalho e itens como listas posicionais."""
+    return {
+        'header': list(astuple(doc.header)),
+        'fields': _ITEM_FIELDS,
+        'items': [list(astuple(it)) for it in doc.items],
+        'pages': {str(k): list(v) for k, v in doc.page_professionals.items()},
+        'report': doc.report.as_dict() if doc.report else None,
+    }
+
+
+def _deserialize_parse(payload: dict) -> ParsedDocument:
+    header = ParsedHeader(*payload['header'])
+    names = payload['fields']
+    items = [ParsedItem(**dict(zip(names, row))) for row in payload['items']]
+    pages = {int(k): (v[0], v[1]) for k, v in (payload.get('pages') or {}).items()}
+    # relatório do parse original, marcado como servido pelo cache
+    report = ParseReport(**{**payload['report'], 'cached': True}) if payload.get('report') else None
+    return ParsedDocument(header=header, items=items, page_professionals=pages, report=report)
+
+
+def _parse_file_timed(pdf_path: str, backend: str) -> tuple[ParsedDocument, float]:
+    """Parse puro (sem ORM) de um arquivo nos processos do pool: funciona também sob spawn,
+    em que o Django não está configurado. Cache e perfis de layout ficam no processo principal."""
+    start = time.perf_counter()
+    doc = parse_document(Path(pdf_path), workers=1, backend=backend, use_profile=False)
+    return doc, time.perf_counter() - start
+
+
+def parse_documents(paths: Iterable[Path | str], *, workers: int = 1, mp_context=None
+                    ) -> Iterator[tuple[Path, ParsedDocument | None, float, Exception | None]]:
+    """Parse (com cache) de vários PDFs, em paralelo quando workers > 1.
+
+    Gera (arquivo, documento, segundos, erro) na ordem de conclusão; uma falha num arquivo
+    vem como erro na tupla e não interrompe os demais. Usado pelas importações em lote.
+    paths pode ser um dict arquivo -> SHA-256 já calculado (os arquivos não são relidos para o hash).
+    Em paralelo, o processo principal consulta o cache antes de despachar cada arquivo e grava
+    os resultados; os filhos (mp_context: contexto do multiprocessing, p.ex. spawn) só fazem o parse.
+    """
+    digests = {Path(p): d for p, d in paths.items()} if isinstance(paths, dict) else {}
+    paths = [Path(p) for p in paths]
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            try:
+                start = time.perf_counter()
+                doc = parse_document_cached(path, workers=1, sha256=digests.get(path, ''))
+                yield path, doc, time.perf_counter() - start, None
+            except Exception as exc:
+                yield path, None, 0.0, exc
+        return
+
+    backend = _setting('RECONCILIATION_PDF_BACKEND', 'pdfplumber')
+    version = _cache_version(backend)
+    pending: dict[Path, str] = {}
+    for path in paths:
+        try:
+            start = time.perf_counter()
+            digest = digests.get(path) or file_sha256(path)
+            doc = _load_cached_parse(digest, version)
+        except Exception as exc:
+            yield path, None, 0.0, exc
+            continue
+        if doc is not None:
+            yield path, doc, time.perf_counter() - start, None
+        else:
+            pending[path] = digest
+    if not pending:
+        return
+
+    from django.db import connections
+    # os filhos não usam o banco; um fork não deve herdar a conexão aberta
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=mp_context) as pool:
+        futures = {pool.submit(_parse_file_timed, str(p), backend): p for p in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                doc, secs = future.result()
+                _store_cached_parse(pending[path], version, doc)
+                yield path, doc, secs, None
+            except Exception as exc:
+                yield path, None, 0.0, exc
+
+
+def _cache_version(backend: str | None = None) -> str:
+    """Versão gravada no cache: PARSER_VERSION, com sufixo quando o texto vem do pdfium."""
+    backend = backend or _setting('RECONCILIATION_PDF_BACKEND', 'pdfplumber')
+    return PARSER_VERSION if backend == 'pdfplumber' else f'{PARSER_VERSION}+{backend}'
+
+
+def _evict_parse_cache() -> None:
+    """Remove entradas de outras versões do parser e aplica o limite LRU (quantidade e bytes)."""
+    from .models import ParseCacheEntry
+    ParseCacheEntry.objects.exclude(parser_version__in=[_cache_version(b) for b in PDF_BACKENDS]).delete()
+    max_entries = int(_setting('RECONCILIATION_PARSE_CACHE_MAX_ENTRIES', 500) or 0)
+    max_bytes = int(_setting('RECONCILIATION_PARSE_CACHE_MAX_BYTES', 200 * 1024 * 1024) or 0)
+    keep_ids: list[int] = []
+    total = 0
+    for entry_id, size in ParseCacheEntry.objects.order_by('-last_used_at').values_list('id', 'size_bytes'):
+        if (max_entries and len(keep_ids) >= max_entries) or (max_bytes and total + size > max_bytes and keep_ids):
+            break
+        keep_ids.append(entry_id)
+        total += size
+    ParseCacheEntry.objects.exclude(id__in=keep_ids).delete()
+
+
+def _load_cached_parse(digest: str, version: str) -> ParsedDocument | None:
+    """Documento do cache para o hash/versão (marcando o uso), ou None."""
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import ParseCacheEntry
+
+    entry = ParseCacheEntry.objects.filter(sha256=digest, parser_version=version).first()
+    if entry is None:
+        return None
+    ParseCacheEntry.objects.filter(id=entry.id).update(last_used_at=timezone.now(), hits=F('hits') + 1)
+    return _deserialize_parse(entry.payload)
+
+
+def _store_cached_parse(digest: str, version: str, doc: ParsedDocument) -> None:
+    from django.utils import timezone
+    from .models import ParseCacheEntry
+
+    payload = _serialize_parse(doc)
+    ParseCacheEntry.objects.update_or_create(
+        sha256=digest,
+        parser_version=version,
+        defaults={
+            'payload': payload,
+            'size_bytes': len(json.dumps(payload, separators=(',', ':'))),
+            'last_used_at': timezone.now(),
+        },
+    )
+    _evict_parse_cache()
+
+
+def parse_document_cached(pdf_path: Path | PdfLayout, *, workers: int | None = None, backend: str | None = None,
+                          sha256: str = '') -> ParsedDocument:
+    """parse_document com cache persistente (ParseCacheEntry) pelo SHA-256 do arquivo + PARSER_VERSION.
+    Reenvios do mesmo PDF e reprocessamentos em lote não reabrem o documento.
+    sha256: hash já calculado pelo chamador (evita reler o arquivo).
+    """
+    path = pdf_path.path if isinstance(pdf_path, PdfLayout) else Path(pdf_path)
+    digest = sha256 or file_sha256(path)
+    if isinstance(pdf_path, PdfLayout):
+        backend = pdf_path.backend
+    version = _cache_version(backend)
+    doc = _load_cached_parse(digest, version)
+    if doc is None:
+        doc = parse_document(pdf_path, workers=workers, backend=backend)
+        _store_cached_parse(digest, version, doc)
+    return doc
+
+
+def parse_pdf_cached(pdf_path: Path | PdfLayout, *, workers: int | None = None,
+                     backend: str | None = None) -> tuple[ParsedHeader, list[ParsedItem]]:
+    """Equivalente a parse_pdf, servido pelo cache de parse_document_cached."""
+    doc = parse_document_cached(pdf_path, workers=workers, backend=backend)
+    return doc.header, doc.items
+
+
+# ---------------------- Importação em segundo plano (ImportJob) ----------------------
+# Intervalo mínimo (s) entre gravações de progresso de um job
+IMPORT_JOB_PROGRESS_INTERVAL = 0.5
+
+
+def enqueue_import_job(document, *, original_name: str = '', pages_total: int = 0):
+    """Cria o ImportJob na fila (processado por run_import_worker) para um PDF já armazenado."""
+    from .models import ImportJob
+
+    return ImportJob.objects.create(
+        document=document,
+        original_name=(original_name or document.original_name)[:256],
+        source_sha256=document.sha256,
+        pages_total=pages_total,
+    )
+
+
+# Tentativas por job quando RECONCILIATION_IMPORT_MAX_ATTEMPTS não está definido
+IMPORT_JOB_MAX_ATTEMPTS = 3
+
+
+class ImportJobLost(Exception):
+    """A reserva do job se perdeu (devolvido à fila, talvez já com outro worker): desiste sem gravar nada."""
+
+
+def claim_import_job(worker: str = ''):
+    """Reserva o job mais antigo da fila. Usa SELECT ... FOR UPDATE SKIP LOCKED onde o banco
+    suporta; a troca de estado condicional (queued -> running) garante que só um worker
+    fique com o job também no SQLite. Cada reserva recebe um claim_token novo, conferido
+    por run_import_job antes de gravar o resultado. Retorna None se a fila estiver vazia.
+    """
+    from django.db import connection, transaction
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import ImportJob
+
+    with transaction.atomic():
+        qs = ImportJob.objects.filter(state=ImportJob.QUEUED).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        job_id = qs.values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(id=job_id, state=ImportJob.QUEUED).update(
+            state=ImportJob.RUNNING, started_at=now, updated_at=now, worker=worker[:128],
+            attempts=F('attempts') + 1, error='', claim_token=uuid.uuid4().hex,
+        )
+    return ImportJob.objects.get(id=job_id) if claimed else None
+
+
+def requeue_stale_import_jobs(older_than_seconds: int, max_attempts: int | None = None) -> int:
+    """Devolve à fila jobs 'running' sem progresso há mais de older_than_seconds (worker interrompido).
+    Os que já somam max_attempts reservas (default: settings.RECONCILIATION_IMPORT_MAX_ATTEMPTS)
+    são marcados como falhos em vez de voltar à fila. Retorna quantos voltaram à fila.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from .models import ImportJob
+
+    if max_attempts is None:
+        max_attempts = int(_setting('RECONCILIATION_IMPORT_MAX_ATTEMPTS', IMPORT_JOB_MAX_ATTEMPTS) or 0)
+    now = timezone.now()
+    stale = ImportJob.objects.filter(state=ImportJob.RUNNING, updated_at__lt=now - timedelta(seconds=older_than_seconds))
+    if max_attempts:
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            state=ImportJob.FAILED, claim_token='', finished_at=now, updated_at=now,
+            error=f'Interrompido em {max_attempts} tentativa(s); não será reprocessado.',
+        )
+        if failed:
+            logger.warning('%s import job(s) parados esgotaram %s tentativas', failed, max_attempts)
+    return stale.update(state=ImportJob.QUEUED, worker='', claim_token='', updated_at=now)
+
+
+def run_import_job(job):
+    """Executa um ImportJob já reservado: parse (com progresso por página) e importação.
+    O resultado (headers criados ou erro) fica gravado no próprio job. O parse roda fora de
+    transação (o progresso fica visível e o job não fica travado); só a gravação, na mesma
+    transação da conclusão, confere que o job ainda tem o claim_token desta reserva: se foi
+    devolvido à fila e reservado por outro worker, desiste.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import ImportJob
+
+    # todas as gravações no job valem só enquanto a reserva for deste worker
+    owned = ImportJob.objects.filter(id=job.id, state=ImportJob.RUNNING, claim_token=job.claim_token)
+    last_write = 0.0
+
+    def progress(done: int, total: int) -> None:
+        nonlocal last_write
+        now = time.monotonic()
+        if done < total and now - last_write < IMPORT_JOB_PROGRESS_INTERVAL:
+            return
+        last_write = now
+        owned.update(pages_done=done, pages_total=total, updated_at=timezone.now())
+
+    try:
+        document = job.document
+        path = Path(document.file.path)
+        with PdfLayout(path) as layout:
+            total = layout.page_count
+            owned.update(pages_total=total, updated_at=timezone.now())
+            streaming_min = int(_setting('RECONCILIATION_STREAMING_MIN_PAGES', 0) or 0)
+            doc = None
+            if not (streaming_min and total >= streaming_min):
+                layout.progress = progress
+                doc = parse_document_cached(layout, sha256=document.sha256)
+        # PDFs grandes: parse em streaming para um arquivo temporário, relido na gravação
+        spool = spool_parsed_items(path, progress=progress) if doc is None else nullcontext()
+        with spool as items:
+            with transaction.atomic():
+                # UPDATE condicional: trava a linha do job até o commit, então nenhum requeue/claim intercala
+                if not owned.update(updated_at=timezone.now()):
+                    raise ImportJobLost(job.id)
+                if doc is None:
+                    hdrs = import_hospital_pdf_streaming(str(path), document=document, items=items)
+                else:
+                    hdrs = import_parsed_document(doc, document=document)
+                owned.update(
+                    state=ImportJob.DONE, pages_done=total, pages_total=total, header_ids=[h.id for h in hdrs],
+                    finished_at=timezone.now(), updated_at=timezone.now(),
+                )
+    except ImportJobLost:
+        logger.warning('import job %s: reserva perdida (devolvido à fila); resultado descartado', job.id)
+    except Exception as exc:
+        logger.exception('import job %s failed', job.id)
+        owned.update(
+            state=ImportJob.FAILED, error=f'{type(exc).__name__}: {exc}',
+            finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+    job.refresh_from_db()
+    return job
+
+
+# ---------------------- Reconciliation helper ----------------------
 def reconcile_item_with_catalog(rem_item, *, catalog=None, tolerance_abs: float = 0.01, use_convenio: bool = True) -> dict:
     """Compare a RemittanceItem with latest matching ProcedurePrice.
     Returns dict with: has_price, expected, paid, diff, diff_pct, ok, price_id, catalog_id.
     """
     from .models import ProcedurePrice, PriceCatalog
 
-    code = _norm_code(getattr(rem_item, 'codigo', ''))
-    convenio = (getattr(rem_item, 'convenio', '') or '') if use_convenio else ''
-    hospital_cnpj = ''.join(ch for ch in str(getattr(getattr(rem_item, 'header', None), 'cnpj', '')).strip() if ch.isdigit())
-    categoria = getattr(rem_item, 'categoria', '') or ''
+    code, convenio, categoria, hospital_cnpj = match_keys(
+        getattr(rem_item, 'codigo', ''),
+        getattr(rem_item, 'convenio', ''),
+        getattr(rem_item, 'categoria', ''),
+        getattr(getattr(rem_item, 'header', None), 'cnpj', ''),
+    )
     qty = float(getattr(rem_item, 'quantidade', 1) or 1)
     paid = float(getattr(rem_item, 'valor_produzido', 0) or 0)
 
-    price_qs = ProcedurePrice.objects.filter(codigo=code)
+    # filtros nas colunas normalizadas (índice de ProcedurePrice)
+    price_qs = ProcedurePrice.objects.filter(codigo_norm=code)
     if use_convenio:
-        price_qs = price_qs.filter(convenio=convenio)
+        price_qs = price_qs.filter(convenio_norm=convenio)
     if hospital_cnpj:
-        price_qs = price_qs.filter(hospital_cnpj=hospital_cnpj)
+        price_qs = price_qs.filter(hospital_cnpj_norm=hospital_cnpj)
     if categoria:
-        price_qs = price_qs.filter(categoria=categoria)
+        price_qs = price_qs.filter(categoria_norm=categoria)
     if catalog is not None:
         if isinstance(catalog, PriceCatalog):
             price_qs = price_qs.filter(catalog=catalog)
@@ -1043,3 +2735,151 @@ def reconcile_item_with_catalog(rem_item, *, catalog=None, tolerance_abs: float
         'price_id': price.id,
         'catalog_id': price.catalog_id,
     }
+
+
+# ---------------------- Conciliação em SQL (itens x catálogo) ----------------------
+# Diferença (valor produzido - esperado) acima disso, em valor absoluto, marca o item como 'diferenca'
+RECONCILIATION_TOLERANCE = Decimal('0.01')
+
+_CENTS = Decimal('0.01')
+_ONE = Decimal('1.00')
+
+# Um único SELECT: cada item faz LEFT JOIN com os preços do catálogo pelas chaves normalizadas
+# (busca no índice catalog/codigo_norm/convenio_norm/categoria_norm de ProcedurePrice) e o
+# ROW_NUMBER por item fica com o menor preço; esperado, diferença e status saem por linha e
+# as funções de janela sobre o conjunto inteiro trazem os totais do resumo em cada linha.
+# Quantidade nula ou zero vale 1 (como o cálculo item a item: quantidade or 1).
+# Window functions: SQLite >= 3.25 e PostgreSQL.
+_RECONCILE_SQL = """
+WITH candidates AS (
+    SELECT i.id, i.header_id, i.atendimento, i.data, i.paciente, i.convenio, i.categoria,
+           i.categoria_norm, i.codigo, i.quantidade,
+           COALESCE(i.valor_produzido, 0) AS produzido,
+           p.id AS price_id,
+           p.preco_referencia AS ref_unit,
+           ROW_NUMBER() OVER (PARTITION BY i.id ORDER BY p.preco_referencia, p.id) AS rn
+    FROM {item_table} i
+    LEFT JOIN {price_table} p
+      ON p.catalog_id = %s
+     AND i.codigo_norm <> ''
+     AND p.codigo_norm = i.codigo_norm
+     AND p.convenio_norm = i.convenio_norm
+     AND p.categoria_norm = i.categoria_norm
+    WHERE i.header_id IN ({header_filter})
+),
+matched AS (
+    SELECT c.*,
+           ROUND(c.ref_unit * COALESCE(NULLIF(c.quantidade, 0), 1), 4) AS ref_total,
+           ROUND(c.produzido - c.ref_unit * COALESCE(NULLIF(c.quantidade, 0), 1), 4) AS diff_total
+    FROM candidates c
+    WHERE c.rn = 1
+),
+classified AS (
+    SELECT m.*,
+           CASE
+               WHEN m.price_id IS NULL THEN 'sem-preco'
+               WHEN ABS(m.diff_total) > %s THEN 'diferenca'
+               ELSE 'ok'
+           END AS status
+    FROM matched m
+)
+SELECT c.id, c.header_id, c.atendimento, c.data, c.paciente, c.convenio, c.categoria, c.categoria_norm,
+       c.codigo, c.quantidade, c.produzido, c.price_id, c.ref_unit, c.ref_total, c.diff_total, c.status,
+       COUNT(*) OVER () AS total,
+       SUM(CASE WHEN c.price_id IS NOT NULL THEN 1 ELSE 0 END) OVER () AS matched_count,
+       SUM(CASE WHEN c.status = 'diferenca' THEN 1 ELSE 0 END) OVER () AS diff_count,
+       SUM(CASE WHEN c.status = 'diferenca' THEN ABS(c.diff_total) ELSE 0 END) OVER () AS diff_value_abs,
+       SUM(CASE WHEN c.price_id IS NULL THEN c.produzido ELSE 0 END) OVER () AS missing_produced
+FROM classified c
+ORDER BY c.header_id, c.id
+"""
+
+@dataclass
+class ReconciliationResult:
+    """Linhas e resumo da conciliação de um conjunto de headers contra um catálogo."""
+    catalog: object
+    rows: list[dict] = field(default_factory=list)
+    summary: dict = field(default_factory=dict)
+
+
+@lru_cache(maxsize=65536)
+def _sql_decimal(value, exp: Decimal) -> Decimal | None:
+    # SQLite devolve REAL/INTEGER; PostgreSQL, Decimal: normaliza tudo para Decimal com a escala esperada.
+    # Cache: preços e quantidades se repetem muito entre os itens.
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(exp)
+
+
+def reconcile_headers(headers, *, catalog=None, tolerance: Decimal = RECONCILIATION_TOLERANCE) -> ReconciliationResult:
+    """Concilia os itens dos headers com o catálogo (padrão: o mais recente) numa única consulta SQL,
+    casando pelas chaves normalizadas (codigo_norm, convenio_norm, categoria_norm) com o menor preço
+    de cada chave. headers: QuerySet de RemittanceHeader (vira subconsulta) ou lista de IDs.
+    Retorna ReconciliationResult; ValueError se não houver catálogo.
+    """
+    from django.db import connection
+    from .models import PriceCatalog, ProcedurePrice, RemittanceItem
+
+    if catalog is None:
+        catalog = PriceCatalog.objects.order_by('-id').first()
+    elif not isinstance(catalog, PriceCatalog):
+        catalog = PriceCatalog.objects.filter(id=catalog).first()
+    if catalog is None:
+        raise ValueError('Catálogo de preços não encontrado')
+
+    if hasattr(headers, 'query'):
+        header_sql, header_params = headers.order_by().values('id').query.sql_with_params()
+    else:
+        ids = [int(h) for h in headers]
+        if not ids:
+            return ReconciliationResult(catalog=catalog, summary=_reconcile_summary(catalog, None))
+        header_sql, header_params = ', '.join(['%s'] * len(ids)), ids
+
+    sql = _RECONCILE_SQL.format(
+        price_table=connection.ops.quote_name(ProcedurePrice._meta.db_table),
+        item_table=connection.ops.quote_name(RemittanceItem._meta.db_table),
+        header_filter=header_sql,
+    )
+    # tolerância como float: no SQLite um Decimal vira texto e a comparação numérica falharia
+    params = [catalog.id, *header_params, float(tolerance)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        records = cursor.fetchall()
+
+    rows = []
+    for (_id, _header_id, atendimento, data, paciente, convenio, categoria, categoria_norm, codigo, qty,
+         produzido, price_id, ref_unit, ref_total, diff_total, status, *_totals) in records:
+        matched = price_id is not None
+        # valores em 2 casas; quantidade nula ou zero conta (e aparece) como 1
+        rows.append({
+            'atendimento': atendimento or '',
+            'data': data or '',
+            'paciente': paciente or '',
+            'convenio': convenio or '',
+            'categoria': categoria_norm or (categoria or ''),
+            'codigo': codigo or '',
+            'qtd': str(_sql_decimal(qty or _ONE, _CENTS)),
+            'produzido': str(_sql_decimal(produzido, _CENTS)),
+            'price_id': price_id,
+            'ref_unit': str(_sql_decimal(ref_unit, _CENTS)) if matched else None,
+            'ref_total': str(_sql_decimal(ref_total, _CENTS)) if matched else None,
+            'diff_total': str(_sql_decimal(diff_total, _CENTS)) if matched else None,
+            'status': status,
+        })
+    summary_record = dict(zip(columns, records[0])) if records else None
+    return ReconciliationResult(catalog=catalog, rows=rows, summary=_reconcile_summary(catalog, summary_record))
+
+
+def _reconcile_summary(catalog, record: dict | None) -> dict:
+    """Resumo a partir das colunas de janela (iguais em todas as linhas) do primeiro registro."""
+    record = record or {}
+    return {
+        'total': int(record.get('total') or 0),
+        'matched': int(record.get('matched_count') or 0),
+        'diff': int(record.get('diff_count') or 0),
+        'missing': int(record.get('total') or 0) - int(record.get('matched_count') or 0),
+        'catalog': str(catalog),
+        'diff_value_abs': str(_sql_decimal(record.get('diff_value_abs') or 0, _CENTS)),
+        'missing_produced': str(_sql_decimal(record.get('missing_produced') or 0, _CENTS)),
+    }
@@ -0,0 +1,227 @@
+"""Gerador de demonstrativos de repasse sintéticos (PDF) para benchmark e regressão do parser.
+
+O PDF é escrito diretamente (Helvetica/WinAnsi, conteúdo com FlateDecode), sem depender de
+bibliotecas de geração. O layout imita o demonstrativo hospitalar: cabeçalho do repasse em
+todas as páginas, linha "NOME Especialidade: X" na primeira página de cada profissional,
+tabela de itens com 13 colunas e rodapé "Total Geral". No modo ``ruled`` a tabela recebe
+linhas de grade (o pdfplumber detecta as tabelas); sem grade as colunas ficam só alinhadas.
+No modo ``flow`` cada linha é um texto corrido com os campos separados por dois espaços, sob
+um cabeçalho compacto (rótulos unidos por '/'): só o parser de texto lê esse layout.
+"""
+from __future__ import annotations
+
+import random
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Paisagem A4 em pontos. Nos textos de exemplo toda palavra começa antes do ponto médio até a
+# coluna seguinte (Helvetica 8): é por esse ponto que o modo palavras separa as colunas.
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+
+COLUMNS = [
+    'Atendimento', 'Conta', 'Paciente', 'Convênio', 'Categoria', 'Data', 'Código',
+    'Procedimento', 'Função', 'Qtd', 'Produzido', 'Imposto', 'Líquido',
+]
+COLUMN_X = [20, 80, 135, 260, 330, 395, 445, 500, 650, 700, 730, 780, 825]
+
+ROW_HEIGHT = 12
+FONT_SIZE = 8
+
+CONVENIOS = ['UNIMED', 'BRADESCO', 'SULAMERICA', 'AMIL', 'SUS']
+CATEGORIAS = ['Enfermaria', 'Apartamento', 'Ambulatorio']
+FUNCOES = ['Cirurgiao', 'Anestesista', '1o Auxiliar', 'Clinico']
+PROCEDIMENTOS = [
+    ('10101012', 'CONSULTA EM CONSULTORIO'),
+    ('31005497', 'COLECISTECTOMIA'),
+    ('40304361', 'HEMOGRAMA COMPLETO'),
+    ('30715016', 'ARTRODESE DA COLUNA'),
+    ('20104049', 'VISITA HOSPITALAR'),
+]
+ESPECIALIDADES = ['Cardiologia', 'Ortopedia', 'Anestesiologia', 'Cirurgia Geral', 'Pediatria']
+
+
+@dataclass
+class StatementSpec:
+    """Parâmetros de um demonstrativo sintético."""
+    pages: int = 4
+    professionals: int = 2
+    rows_per_page: int = 25
+    # True: tabela com grade; False: colunas só alinhadas (tabelas "colapsadas" no pdfplumber)
+    ruled: bool = False
+    # True: linhas corridas sem alinhamento de colunas (ignora ruled)
+    flow: bool = False
+    # fração de linhas sem data (o parser repete a última data do bloco) e sem código
+    missing_dates: float = 0.0
+    missing_codes: float = 0.0
+    seed: int = 1
+    repasse_numero: str = '1539'
+    competencia: str = '08/2025'
+    cnpj: str = '12.345.678/0001-90'
+
+
+@dataclass
+class SyntheticStatement:
+    """PDF gerado e as linhas escritas, página a página."""
+    path: Path
+    spec: StatementSpec
+    rows: list[dict] = field(default_factory=list)
+
+
+def _brl(value: float) -> str:
+    s = f"{value:,.2f}"
+    return s.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class _PageCanvas:
+    """Acumula os operadores de conteúdo de uma página."""
+
+    def __init__(self):
+        self.ops: list[bytes] = []
+
+    def text(self, x: float, y: float, value: str, size: int = FONT_SIZE) -> None:
+        if value:
+            self.ops.append(b'BT /F1 %d Tf %.2f %.2f Td ' % (size, x, y) + _pdf_string(value) + b' Tj ET')
+
+    def line(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        self.ops.append(b'%.2f %.2f m %.2f %.2f l S' % (x1, y1, x2, y2))
+
+    def content(self) -> bytes:
+        return b'0.3 w\n' + b'\n'.join(self.ops)
+
+
+def _write_pdf(path: Path, pages: list[bytes]) -> None:
+    """Grava um PDF mínimo (catálogo, árvore de páginas, fonte Helvetica e um stream por página)."""
+    objects: list[bytes] = []
+    n_pages = len(pages)
+    page_ids = [4 + 2 * i for i in range(n_pages)]
+    objects.append(b'<< /Type /Catalog /Pages 2 0 R >>')
+    kids = b' '.join(b'%d 0 R' % pid for pid in page_ids)
+    objects.append(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, n_pages))
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    for pid, content in zip(page_ids, pages):
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT, pid + 1)
+        )
+        data = zlib.compress(content)
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream')
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % num + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for off in offsets:
+        out += b'%010d 00000 n \n' % off
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def generate_statement(path: Path | str, spec: StatementSpec | None = None) -> SyntheticStatement:
+    """Escreve o demonstrativo descrito por ``spec`` em ``path`` (determinístico pelo seed)."""
+    spec = spec or StatementSpec()
+    path = Path(path)
+    rnd = random.Random(spec.seed)
+    result = SyntheticStatement(path=path, spec=spec)
+    professionals = max(1, min(spec.professionals, spec.pages))
+    per_prof = -(-spec.pages // professionals)
+    month, year = spec.competencia.split('/')
+
+    pages: list[bytes] = []
+    for p in range(spec.pages):
+        canvas = _PageCanvas()
+        prof_idx = p // per_prof
+        y = PAGE_HEIGHT - 30
+        canvas.text(20, y, (
+            f"REPASSE: {spec.repasse_numero} TERCEIRO: CLINICA EXEMPLO LTDA COMPETÊNCIA: {spec.competencia} "
+            f"CNPJ: {spec.cnpj} Previsão: 10/{int(month) % 12 + 1:02d}"
+        ))
+        y -= 14
+        if p % per_prof == 0:
+            esp = ESPECIALIDADES[prof_idx % len(ESPECIALIDADES)]
+            canvas.text(20, y, f"DR FULANO {chr(65 + prof_idx % 26)} SILVA Especialidade: {esp}")
+        y -= 18
+        table_top = y + 10
+        if spec.flow:
+            canvas.text(20, y, '/'.join(COLUMNS))
+        else:
+            for x, col in zip(COLUMN_X, COLUMNS):
+                canvas.text(x, y, col)
+        y -= 14
+
+        for r in range(spec.rows_per_page):
+            codigo, procedimento = rnd.choice(PROCEDIMENTOS)
+            produzido = rnd.choice([120.0, 85.5, 1234.56, 300.0, 45.9]) + rnd.randint(0, 50)
+            imposto = round(produzido * 0.1, 2)
+            liquido = round(produzido - imposto, 2)
+            # a primeira linha de cada página sempre traz a data (o parser repete a última no bloco)
+            has_date = r == 0 or rnd.random() >= spec.missing_dates
+            has_code = rnd.random() >= spec.missing_codes
+            row = {
+                'atendimento': str(100000 + p * 100 + r),
+                'conta': str(200000 + p * 100 + r),
+                'paciente': f"PACIENTE {p}-{r}",
+                'convenio': rnd.choice(CONVENIOS),
+                'categoria': rnd.choice(CATEGORIAS),
+                'data': f"{rnd.randint(1, 28):02d}/{month}/{year}" if has_date else '',
+                'codigo': codigo if has_code else '',
+                'procedimento': procedimento,
+                'funcao': rnd.choice(FUNCOES),
+                'quantidade': '1',
+                'valor_produzido': _brl(produzido),
+                'imposto': _brl(imposto),
+                'valor_liquido': _brl(liquido),
+                'page': p,
+            }
+            result.rows.append(row)
+            values = [row[k] for k in (
+                'atendimento', 'conta', 'paciente', 'convenio', 'categoria', 'data', 'codigo',
+                'procedimento', 'funcao', 'quantidade', 'valor_produzido', 'imposto', 'valor_liquido',
+            )]
+            if spec.flow:
+                canvas.text(20, y, '  '.join(v for v in values if v))
+            else:
+                for x, v in zip(COLUMN_X, values):
+                    canvas.text(x, y, v)
+            y -= ROW_HEIGHT
+
+        if spec.ruled and not spec.flow:
+            bottom = y + 8
+            for x in COLUMN_X + [PAGE_WIDTH - 10]:
+                canvas.line(x - 2, table_top, x - 2, bottom)
+            row_y = table_top
+            while row_y >= bottom:
+                canvas.line(COLUMN_X[0] - 2, row_y, PAGE_WIDTH - 12, row_y)
+                row_y -= ROW_HEIGHT
+        canvas.text(20, y - 10, 'Total Geral 999,99')
+        pages.append(canvas.content())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_pdf(path, pages)
+    return result
+
+
+# Corpus versionado em reconciliation/benchmarks/corpus (golden.json guarda a saída esperada do parse)
+CORPUS_DIR = Path(__file__).resolve().parent / 'benchmarks' / 'corpus'
+GOLDEN_CORPUS: dict[str, StatementSpec] = {
+    'collapsed.pdf': StatementSpec(pages=4, professionals=2, ruled=False, seed=1),
+    'ruled.pdf': StatementSpec(pages=4, professionals=2, ruled=True, seed=2),
+    'gaps.pdf': StatementSpec(pages=3, professionals=2, ruled=True, missing_dates=0.4, missing_codes=0.1, seed=4),
+    'gaps_collapsed.pdf': StatementSpec(pages=3, professionals=1, ruled=False, missing_dates=0.4, missing_codes=0.1, seed=5),
+    'flow.pdf': StatementSpec(pages=2, professionals=1, flow=True, missing_dates=0.3, seed=6),
+}
+
+
+def generate_corpus(target: Path | str | None = None) -> list[SyntheticStatement]:
+    """(Re)gera os PDFs do corpus de referência."""
+    target = Path(target) if target else CORPUS_DIR
+    return [generate_statement(target / name, spec) for name, spec in GOLDEN_CORPUS.items()]
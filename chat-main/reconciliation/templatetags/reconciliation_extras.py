@@ -1,6 +1,6 @@
 from django import template
 from decimal import Decimal, InvalidOperation
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 register = template.Library()
 
@@ -76,9 +76,9 @@ def _parse_br_date(s: str):
 
 
 @register.filter(name='is_older_than_days')
-def is_older_than_days(date_str, days=60):
-    """Return True if the given BR date string is older than N days from today."""
-    d = _parse_br_date(date_str)
+def is_older_than_days(value, days=60):
+    """Return True if the given date (or BR date string) is older than N days from today."""
+    d = value if isinstance(value, date) else _parse_br_date(value)
     if not d:
         return False
     try:
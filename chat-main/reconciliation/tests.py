@@ -0,0 +1,336 @@
+import multiprocessing
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import (
+    ImportJob,
+    LayoutProfile,
+    ParseCacheEntry,
+    PriceCatalog,
+    ProcedurePrice,
+    RemittanceHeader,
+    RemittanceItem,
+)
+from . import services
+from .services import (
+    HEADER_MATCHER,
+    ParsedDocument,
+    ParsedHeader,
+    ParseReport,
+    PARSER_VERSION,
+    PdfLayout,
+    _norm_match,
+    _score_header_words,
+    _serialize_parse,
+    claim_import_job,
+    detect_professionals_by_page,
+    enqueue_import_job,
+    extract_pdf_dataframe,
+    file_sha256,
+    parse_document_cached,
+    parse_documents,
+    parse_items_from_tables,
+    parse_items_from_text,
+    parse_items_from_words,
+    parse_pdf,
+    reconcile_headers,
+    requeue_stale_import_jobs,
+    run_import_job,
+    store_document,
+)
+from .synthetic import CORPUS_DIR
+
+
+class LayoutProfileTests(TestCase):
+    def parse(self, name, backend=None):
+        report = ParseReport()
+        _, items = parse_pdf(CORPUS_DIR / name, use_profile=True, backend=backend, report=report)
+        return report, items
+
+    def test_words_profile_not_applied_to_ruled_statement(self):
+        # collapsed.pdf e ruled.pdf são do mesmo CNPJ
+        report, _ = self.parse('collapsed.pdf')
+        self.assertEqual(report.strategy, 'words')
+        self.assertEqual(LayoutProfile.objects.get().strategy, 'words')
+
+        report, items = self.parse('ruled.pdf')
+        self.assertFalse(report.profile_applied)
+        self.assertEqual(report.strategy, 'tables')
+        self.assertTrue(items)
+        self.assertEqual(LayoutProfile.objects.get().strategy, 'tables')
+
+    def test_words_profile_skips_tables_on_pages_without_rulings(self):
+        self.parse('collapsed.pdf', backend='pdfium')
+        report, items = self.parse('collapsed.pdf', backend='pdfium')
+        self.assertTrue(report.profile_applied)
+        self.assertTrue(items)
+
+        report, _ = self.parse('ruled.pdf', backend='pdfium')
+        self.assertFalse(report.profile_applied)
+        self.assertEqual(report.strategy, 'tables')
+
+    def test_rulings_probe_matches_between_backends(self):
+        for backend in ('pdfplumber', 'pdfium'):
+            for name, ruled in (('collapsed.pdf', False), ('flow.pdf', False), ('ruled.pdf', True)):
+                with self.subTest(backend=backend, name=name), PdfLayout(CORPUS_DIR / name, backend=backend) as layout:
+                    self.assertEqual(layout.has_rulings(1), ruled)
+
+
+@override_settings(RECONCILIATION_PDF_BACKEND='pdfplumber')
+class ParseCacheTests(TestCase):
+    def test_entry_from_previous_parser_version_is_ignored(self):
+        path = CORPUS_DIR / 'ruled.pdf'
+        stale_version = str(int(PARSER_VERSION) - 1)
+        stale = ParsedDocument(header=ParsedHeader(repasse_numero='STALE'), items=[])
+        ParseCacheEntry.objects.create(
+            sha256=file_sha256(path), parser_version=stale_version, payload=_serialize_parse(stale),
+        )
+
+        doc = parse_document_cached(path, workers=1)
+
+        self.assertNotEqual(doc.header.repasse_numero, 'STALE')
+        self.assertTrue(doc.items)
+        self.assertFalse(doc.report.cached)
+        self.assertEqual(
+            list(ParseCacheEntry.objects.values_list('parser_version', flat=True)), [PARSER_VERSION],
+        )
+
+    def test_parallel_parse_under_spawn(self):
+        # sob spawn os filhos não têm o Django configurado: o cache fica no processo principal
+        paths = [CORPUS_DIR / 'ruled.pdf', CORPUS_DIR / 'flow.pdf']
+        spawn = multiprocessing.get_context('spawn')
+
+        results = {p: (doc, err) for p, doc, _, err in parse_documents(paths, workers=2, mp_context=spawn)}
+        self.assertEqual(set(results), set(paths))
+        for doc, err in results.values():
+            self.assertIsNone(err)
+            self.assertTrue(doc.items)
+            self.assertFalse(doc.report.cached)
+        self.assertEqual(ParseCacheEntry.objects.count(), 2)
+
+        again = list(parse_documents(paths, workers=2, mp_context=spawn))
+        self.assertTrue(all(doc.report.cached for _, doc, _, _ in again))
+        self.assertEqual(
+            [len(doc.items) for _, doc, _, _ in sorted(again)],
+            [len(results[p][0].items) for p in sorted(paths)],
+        )
+
+
+class HeaderMatcherTests(TestCase):
+    # títulos reais em que mais de um campo casa
+    AMBIGUOUS = {
+        'Dt.Atendimento': 'data',
+        'Data Atendimento': 'data',
+        'Cód. Procedimento': 'codigo',
+        'Cód.Procedimento': 'codigo',
+        'Total Líquido': 'valor_liquido',
+        'Valor Produzido': 'valor_produzido',
+        'Nome do Paciente': 'paciente',
+        'Descrição do Serviço': 'procedimento',
+        'Atendimento': 'atendimento',
+    }
+
+    def test_ambiguous_headers(self):
+        for title, key in self.AMBIGUOUS.items():
+            with self.subTest(title=title):
+                self.assertEqual(HEADER_MATCHER.best_key(_norm_match(title)), key)
+
+    def test_words_header_columns(self):
+        titles = ['Atendimento', 'Dt.Atendimento', 'Cód.Procedimento', 'Descrição', 'Qtd', 'Líquido']
+        words = [{'text': t, 'x0': 50.0 * i} for i, t in enumerate(titles)]
+        score, col_hits = _score_header_words(words)
+        self.assertEqual(score, len(titles))
+        self.assertEqual(
+            [col_hits[x] for x in sorted(col_hits)],
+            ['atendimento', 'data', 'codigo', 'procedimento', 'quantidade', 'valor_liquido'],
+        )
+
+
+class PdfBackendTests(TestCase):
+    def parse(self, path, backend):
+        with PdfLayout(path, backend=backend) as layout:
+            header, items = parse_pdf(layout, workers=1, use_profile=False)
+            # o pdfium volta silenciosamente ao pdfplumber se falhar
+            self.assertEqual(layout.backend, backend)
+            return {
+                'header': header,
+                'items': items,
+                'words': parse_items_from_words(layout),
+                'text': parse_items_from_text(layout),
+                'professionals': detect_professionals_by_page(layout),
+            }
+
+    def test_backends_agree_on_corpus(self):
+        for path in sorted(CORPUS_DIR.glob('*.pdf')):
+            plumber = self.parse(path, 'pdfplumber')
+            pdfium = self.parse(path, 'pdfium')
+            self.assertTrue(plumber['items'], path.name)
+            for key, value in plumber.items():
+                with self.subTest(pdf=path.name, output=key):
+                    self.assertEqual(pdfium[key], value)
+
+
+class TextStrategyTests(TestCase):
+    def test_flow_statement_is_parsed_only_by_text(self):
+        with PdfLayout(CORPUS_DIR / 'flow.pdf', backend='pdfplumber') as layout:
+            self.assertEqual(parse_items_from_tables(extract_pdf_dataframe(layout)), [])
+            self.assertEqual(parse_items_from_words(layout), [])
+            items = parse_items_from_text(layout)
+        self.assertEqual(len(items), 50)
+        self.assertEqual((items[0].atendimento, items[0].conta), ('100000', '200000'))
+        self.assertTrue(all(it.data and it.valor_liquido is not None for it in items))
+
+    def test_text_strategy_splits_columns_from_word_gaps(self):
+        # o extract_text junta as colunas com um espaço só; o parser de texto precisa de dois
+        with PdfLayout(CORPUS_DIR / 'collapsed.pdf', backend='pdfplumber') as layout:
+            text_items = parse_items_from_text(layout)
+            words_items = parse_items_from_words(layout)
+        self.assertEqual(len(text_items), 100)
+        key = lambda it: (it.atendimento, it.data, it.valor_liquido)
+        self.assertEqual([key(it) for it in text_items], [key(it) for it in words_items])
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media, RECONCILIATION_STREAMING_MIN_PAGES=0))
+        self.document = store_document(CORPUS_DIR / 'ruled.pdf')
+
+    def make_stale(self, job, attempts):
+        ImportJob.objects.filter(id=job.id).update(
+            state=ImportJob.RUNNING, attempts=attempts, updated_at=timezone.now() - timedelta(hours=1),
+        )
+
+    def test_stale_job_fails_after_max_attempts(self):
+        retry = enqueue_import_job(self.document)
+        exhausted = enqueue_import_job(self.document)
+        self.make_stale(retry, 1)
+        self.make_stale(exhausted, 3)
+
+        self.assertEqual(requeue_stale_import_jobs(60, max_attempts=3), 1)
+
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retry.state, ImportJob.QUEUED)
+        self.assertEqual(exhausted.state, ImportJob.FAILED)
+        self.assertTrue(exhausted.error)
+
+    def test_worker_that_lost_its_claim_does_not_import(self):
+        enqueue_import_job(self.document)
+        stale_claim = claim_import_job('w1')
+        self.make_stale(stale_claim, 1)
+        requeue_stale_import_jobs(60)
+        current = claim_import_job('w2')
+        self.assertNotEqual(current.claim_token, stale_claim.claim_token)
+
+        job = run_import_job(stale_claim)
+
+        self.assertEqual(job.state, ImportJob.RUNNING)
+        self.assertEqual(job.claim_token, current.claim_token)
+        self.assertFalse(RemittanceHeader.objects.exists())
+
+        job = run_import_job(current)
+        self.assertEqual(job.state, ImportJob.DONE)
+        self.assertEqual(sorted(job.header_ids), sorted(RemittanceHeader.objects.values_list('id', flat=True)))
+
+    def run_streaming(self, job, on_item=None):
+        # registra a profundidade de transações enquanto o parse em streaming produz itens
+        depths = []
+        parse = services.iter_parsed_items
+
+        def spy(*args, **kwargs):
+            for pair in parse(*args, **kwargs):
+                depths.append(len(connection.atomic_blocks))
+                if on_item is not None:
+                    on_item()
+                yield pair
+
+        with mock.patch.object(services, 'iter_parsed_items', spy), \
+                override_settings(RECONCILIATION_STREAMING_MIN_PAGES=1):
+            return run_import_job(job), depths
+
+    def test_streaming_parse_runs_outside_the_transaction(self):
+        enqueue_import_job(self.document)
+        outer = len(connection.atomic_blocks)
+
+        job, depths = self.run_streaming(claim_import_job('w1'))
+
+        self.assertEqual(job.state, ImportJob.DONE)
+        self.assertEqual(set(depths), {outer})
+        self.assertEqual(RemittanceItem.objects.count(), len(depths))
+
+    def test_claim_lost_during_streaming_parse_discards_the_result(self):
+        enqueue_import_job(self.document)
+        job = claim_import_job('w1')
+
+        def requeue():
+            if not ImportJob.objects.filter(worker='w2').exists():
+                self.make_stale(job, 1)
+                requeue_stale_import_jobs(60)
+                claim_import_job('w2')
+
+        job, _ = self.run_streaming(job, on_item=requeue)
+
+        self.assertEqual(job.worker, 'w2')
+        self.assertEqual(job.state, ImportJob.RUNNING)
+        self.assertFalse(RemittanceHeader.objects.exists())
+
+
+class ReconcileHeadersTests(TestCase):
+    def setUp(self):
+        catalog = PriceCatalog.objects.create(name='Tabela')
+        for preco in ('120.00', '100.00'):
+            ProcedurePrice.objects.create(
+                catalog=catalog, codigo='10101012', convenio='UNIMED', categoria='ENF',
+                preco_referencia=Decimal(preco),
+            )
+        self.header = RemittanceHeader.objects.create(competencia='08/2025')
+
+    def add_item(self, quantidade, produzido, codigo='10101012'):
+        RemittanceItem.objects.create(
+            header=self.header, codigo=codigo, convenio='Unimed', categoria='Enfermaria',
+            quantidade=quantidade, valor_produzido=produzido,
+        )
+
+    def test_zero_or_missing_quantity_counts_as_one(self):
+        # mesmos valores do cálculo item a item: quantidade or 1
+        self.add_item(Decimal('0'), Decimal('100.00'))
+        self.add_item(None, Decimal('150.00'))
+        self.add_item(Decimal('2'), Decimal('200.00'))
+        self.add_item(Decimal('1'), Decimal('80.00'), codigo='99999999')
+
+        result = reconcile_headers([self.header.id])
+
+        self.assertEqual(
+            [(r['qtd'], r['ref_unit'], r['ref_total'], r['diff_total'], r['status']) for r in result.rows],
+            [
+                ('1.00', '100.00', '100.00', '0.00', 'ok'),
+                ('1.00', '100.00', '100.00', '50.00', 'diferenca'),
+                ('2.00', '100.00', '200.00', '0.00', 'ok'),
+                ('1.00', None, None, None, 'sem-preco'),
+            ],
+        )
+        summary = result.summary
+        self.assertEqual((summary['total'], summary['matched'], summary['diff'], summary['missing']), (4, 3, 1, 1))
+        self.assertEqual(summary['diff_value_abs'], '50.00')
+        self.assertEqual(summary['missing_produced'], '80.00')
+
+    def test_item_without_code_is_not_matched(self):
+        # codigo_norm vazio não é chave: não casa com preço também sem código
+        ProcedurePrice.objects.create(
+            catalog=PriceCatalog.objects.get(), codigo='', convenio='UNIMED', categoria='ENF',
+            preco_referencia=Decimal('10.00'),
+        )
+        self.add_item(Decimal('1'), Decimal('10.00'), codigo='')
+
+        result = reconcile_headers([self.header.id])
+
+        self.assertEqual([r['status'] for r in result.rows], ['sem-preco'])
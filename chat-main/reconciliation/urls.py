@@ -9,6 +9,7 @@ urlpatterns = [
     path('consolidated/', views.consolidated_dashboard, name='consolidated_dashboard'),
     path('advanced-search/', views.advanced_search, name='advanced_search'),
     path('upload/', views.upload_remittance, name='upload_remittance'),
+    path('upload/jobs/<int:id>/', views.import_job_status, name='import_job_status'),
     path('detail/<int:id>/', views.remittance_detail, name='remittance_detail'),
     path('detail/<int:id>/reprocess/', views.reprocess_remittance, name='reprocess_remittance'),
     path('detail/<int:id>/qa/', views.qa_remittance, name='qa_remittance'),
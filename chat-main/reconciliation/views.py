@@ -1,4 +1,5 @@
 from django.utils.http import urlencode
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, render
 from django.http import JsonResponse
@@ -8,28 +9,24 @@ from decimal import Decimal
 from django.db.models import Sum
 
 from .forms import RemittanceUploadForm, ProcedurePriceForm, AdvancedSearchForm
-from .models import RemittanceHeader, ProcedurePrice, PriceCatalog
+from .models import ImportJob, RemittanceHeader, ProcedurePrice, PriceCatalog
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.contrib import messages
-from django.db import transaction
-from .services import import_hospital_pdf, parse_pdf
+from .services import (
+    PdfLayout,
+    discard_unused_document,
+    enqueue_import_job,
+    import_hospital_pdf_streaming,
+    import_parsed_document,
+    parse_document_cached,
+    peek_header,
+    reconcile_headers,
+    reprocess_header,
+    store_document,
+)
 from chatbot.views import call_gemini_api
 
-def _norm_digits(s: str) -> str:
-    return ''.join(ch for ch in str(s or '') if ch.isdigit())
-
-def _norm_text(s: str) -> str:
-    return ' '.join(str(s or '').strip().split()).lower()
-
-def _norm_categoria(s: str) -> str:
-    txt = (s or '').strip().upper()
-    if 'ENF' in txt:
-        return 'Enfermaria'
-    if 'APT' in txt:
-        return 'Apartamento'
-    # Title-case default to improve matching
-    return (s or '').strip()
 
 @login_required
 def reconcile_prices(request):
@@ -48,96 +45,19 @@ def reconcile_prices(request):
         ids = [int(x) for x in ids_csv.split(',') if x.strip()]
     except ValueError:
         return JsonResponse({'error': 'IDs inválidos'}, status=400)
-    headers = list(RemittanceHeader.objects.filter(id__in=ids).prefetch_related('items'))
-    if not headers:
+    headers = RemittanceHeader.objects.filter(id__in=ids)
+    if not headers.exists():
         return JsonResponse({'error': 'Nenhum demonstrativo encontrado'}, status=404)
 
-    latest_catalog = PriceCatalog.objects.order_by('-id').first()
-    if not latest_catalog:
+    # Join itens x menor preço do catálogo mais recente, status e resumo numa única consulta SQL
+    try:
+        result = reconcile_headers(headers)
+    except ValueError:
         return JsonResponse({'error': 'Catálogo de preços não encontrado'}, status=404)
 
-    # Build price lookup dictionary: key = (codigo_digits, convenio_norm, categoria_norm)
-    price_map = {}
-    for pr in ProcedurePrice.objects.filter(catalog=latest_catalog).only('id', 'codigo', 'convenio', 'categoria', 'preco_referencia'):
-        key = (_norm_digits(pr.codigo), _norm_text(pr.convenio), _norm_categoria(pr.categoria))
-        # store tuple (price_id, ref_value); keep the lowest reference price if duplicates
-        current = price_map.get(key)
-        if current is None:
-            price_map[key] = (pr.id, pr.preco_referencia)
-        else:
-            _, curr_ref = current
-            if pr.preco_referencia is not None and (curr_ref is None or pr.preco_referencia < curr_ref):
-                price_map[key] = (pr.id, pr.preco_referencia)
+    return JsonResponse({'summary': result.summary, 'rows': result.rows})
 
-    rows = []
-    zero = Decimal('0.00')
-    total = 0
-    matched = 0
-    diff = 0
-    missing = 0
-    diff_value_abs_total = Decimal('0.00')
-    missing_produced_total = Decimal('0.00')
-    for h in headers:
-        for it in h.items.all():
-            total += 1
-            codigo = _norm_digits(it.codigo)
-            convenio = _norm_text(it.convenio)
-            categoria = _norm_categoria(it.categoria)
-            qty = it.quantidade or Decimal('1')
-            produzido = it.valor_produzido or zero
-            ref_entry = price_map.get((codigo, convenio, categoria))
-            price_id = None
-            ref = None
-            if ref_entry is not None:
-                price_id, ref = ref_entry
-            status = 'sem-preco'
-            ref_total = None
-            diff_total = None
-            if ref is not None:
-                matched += 1
-                ref_total = (ref or zero) * (qty or Decimal('1'))
-                diff_total = (produzido or zero) - ref_total
-                # Consider diferença relevante quando valor absoluto > 0.01
-                if diff_total.copy_abs() > Decimal('0.01'):
-                    status = 'diferenca'
-                    diff += 1
-                    diff_value_abs_total += diff_total.copy_abs()
-                else:
-                    status = 'ok'
-            else:
-                missing += 1
-                # acumula produzido dos itens sem preço
-                if produzido is not None:
-                    missing_produced_total += (produzido or zero)
-
-            rows.append({
-                'atendimento': it.atendimento or '',
-                'data': it.data or '',
-                'paciente': it.paciente or '',
-                'convenio': it.convenio or '',
-                'categoria': categoria or (it.categoria or ''),
-                'codigo': it.codigo or '',
-                'qtd': str(qty) if qty is not None else '',
-                'produzido': str(produzido or zero),
-                'price_id': price_id,
-                'ref_unit': str(ref) if ref is not None else None,
-                'ref_total': str(ref_total) if ref_total is not None else None,
-                'diff_total': str(diff_total) if diff_total is not None else None,
-                'status': status,
-            })
 
-    return JsonResponse({
-        'summary': {
-            'total': total,
-            'matched': matched,
-            'diff': diff,
-            'missing': missing,
-            'catalog': str(latest_catalog),
-            'diff_value_abs': str(diff_value_abs_total),
-            'missing_produced': str(missing_produced_total),
-        },
-        'rows': rows,
-    })
 def consolidated_dashboard(request):
     """Render the consolidated dashboard for given RemittanceHeader IDs (from query param 'ids')."""
     ids_csv = request.GET.get('ids', '').strip()
@@ -346,8 +266,13 @@ from .models import RemittanceHeader, ProcedurePrice, PriceCatalog
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.contrib import messages
-from django.db import transaction
-from .services import import_hospital_pdf, parse_pdf
+from .services import (
+    PdfLayout,
+    import_hospital_pdf_streaming,
+    import_parsed_document,
+    parse_document_cached,
+    peek_header,
+)
 from chatbot.views import call_gemini_api
 
 
@@ -357,23 +282,13 @@ def upload_remittance(request):
         form = RemittanceUploadForm(request.POST, request.FILES)
         if form.is_valid():
             f = form.cleaned_data['pdf']
-            # Garantir caminho físico mesmo para InMemoryUploadedFile
-            import os
-            import tempfile
-            created_temp = False
-            if hasattr(f, 'temporary_file_path'):
-                tmp_path = f.temporary_file_path()
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                    for chunk in f.chunks():
-                        tmp.write(chunk)
-                    tmp_path = tmp.name
-                    created_temp = True
+            # Grava o PDF uma vez no armazenamento por conteúdo (hash calculado durante a cópia);
+            # o arquivo final serve para o parse e é compartilhado por todos os headers criados
+            stored = store_document(f)
             try:
-                # Primeiro, extrair o header para verificar o número de repasse
-                from .services import parse_pdf
-                pdfp = Path(tmp_path)
-                header, _ = parse_pdf(pdfp)
+                # Checagem de duplicidade só com a faixa do cabeçalho, antes de qualquer extração de tabela
+                pdfp = Path(stored.file.path)
+                header = peek_header(pdfp)
                 
                 # Validar se o número de repasse já existe no sistema
                 if header.repasse_numero:
@@ -389,8 +304,24 @@ def upload_remittance(request):
                         )
                         return redirect('upload_remittance')
                 
-                # Se não existe duplicação, proceder com a importação
-                hdrs = import_hospital_pdf(tmp_path, file_field=f)
+                # Se não existe duplicação, proceder com a importação (parse único)
+                if getattr(settings, 'RECONCILIATION_ASYNC_IMPORT', False):
+                    # Upload assíncrono: enfileira o documento já gravado e a página acompanha o job.
+                    # Reenvio do mesmo PDF enquanto o job anterior roda reaproveita esse job.
+                    job = ImportJob.objects.filter(
+                        source_sha256=stored.sha256, state__in=[ImportJob.QUEUED, ImportJob.RUNNING]
+                    ).first() or enqueue_import_job(stored, original_name=f.name)
+                    return redirect(f"{reverse('upload_remittance')}?{urlencode({'job': job.id})}")
+                streaming_min = getattr(settings, 'RECONCILIATION_STREAMING_MIN_PAGES', 0)
+                if streaming_min:
+                    with PdfLayout(pdfp) as layout:
+                        page_count = layout.page_count
+                if streaming_min and page_count >= streaming_min:
+                    # PDFs grandes: parse página a página com gravação em lotes
+                    hdrs = import_hospital_pdf_streaming(str(pdfp), document=stored)
+                else:
+                    doc = parse_document_cached(pdfp, sha256=stored.sha256)
+                    hdrs = import_parsed_document(doc, document=stored)
                 # Se vários headers, informar na UI
                 if not hdrs:
                     messages.error(request, 'Nenhum item detectado no PDF enviado.')
@@ -587,15 +518,47 @@ def upload_remittance(request):
                     })
                 hdr = hdrs[0]
             finally:
-                if created_temp:
-                    try:
-                        os.remove(tmp_path)
-                    except OSError:
-                        pass
+                # upload recusado ou com falha: não deixa o PDF órfão no armazenamento
+                discard_unused_document(stored)
             return redirect(reverse('remittance_detail', args=[hdr.id]))
     else:
         form = RemittanceUploadForm()
-    return render(request, 'reconciliation/upload.html', {'form': form})
+    job = None
+    job_id = request.GET.get('job', '')
+    if job_id.isdigit():
+        job = ImportJob.objects.filter(id=int(job_id)).first()
+    return render(request, 'reconciliation/upload.html', {'form': form, 'job': job})
+
+
+def _import_job_payload(job: ImportJob) -> dict:
+    """Estado do ImportJob para a página de upload (redirect_url quando concluído)."""
+    percent = int(job.pages_done * 100 / job.pages_total) if job.pages_total else 0
+    redirect_url = None
+    if job.state == ImportJob.DONE and job.header_ids:
+        if len(job.header_ids) > 1:
+            redirect_url = f"{reverse('consolidated_dashboard')}?{urlencode({'ids': ','.join(str(i) for i in job.header_ids)})}"
+        else:
+            redirect_url = reverse('remittance_detail', args=[job.header_ids[0]])
+    return {
+        'id': job.id,
+        'state': job.state,
+        'state_label': job.get_state_display(),
+        'file': job.original_name,
+        'pages_done': job.pages_done,
+        'pages_total': job.pages_total,
+        'percent': 100 if job.state == ImportJob.DONE else percent,
+        'header_ids': job.header_ids,
+        'error': job.error,
+        'redirect_url': redirect_url,
+    }
+
+
+@login_required
+def import_job_status(request, id: int):
+    job = ImportJob.objects.filter(id=id).first()
+    if job is None:
+        return JsonResponse({'error': 'Importação não encontrada'}, status=404)
+    return JsonResponse(_import_job_payload(job))
 
 
 @login_required
@@ -712,32 +675,12 @@ def remittance_detail(request, id: int):
 @login_required
 def reprocess_remittance(request, id: int):
     hdr = RemittanceHeader.objects.get(id=id)
-    if not hdr.original_file:
+    if not hdr.source_file:
         messages.error(request, 'Arquivo original não disponível para reprocessamento.')
         return redirect(reverse('remittance_detail', args=[hdr.id]))
     try:
-        header_parsed, items = parse_pdf(Path(hdr.original_file.path))
-        with transaction.atomic():
-            hdr.items.all().delete()
-            from .models import RemittanceItem
-            RemittanceItem.objects.bulk_create([
-                RemittanceItem(
-                    header=hdr,
-                    atendimento=i.atendimento,
-                    conta=i.conta,
-                    paciente=i.paciente,
-                    convenio=i.convenio,
-                    categoria=i.categoria,
-                    data=i.data,
-                    codigo=i.codigo,
-                    procedimento=i.procedimento,
-                    funcao=i.funcao,
-                    quantidade=i.quantidade,
-                    valor_produzido=i.valor_produzido,
-                    imposto=i.imposto,
-                    valor_liquido=i.valor_liquido,
-                ) for i in items
-            ])
+        # Só as páginas deste profissional; os demais headers do mesmo PDF não mudam
+        items = reprocess_header(hdr)
         messages.success(request, f'Reprocessamento concluído. Itens importados: {len(items)}')
     except Exception as e:
         messages.error(request, f'Falha ao reprocessar: {e}')
@@ -1109,11 +1052,15 @@ def advanced_search(request):
         if has_item_filters:
             qs = qs.filter(item_filters).distinct()
         
-        # Filtros de data
+        # Filtros de data: um único filter para que início e fim valham para o mesmo item
+        # (um join só, varredura de faixa no índice de data_atendimento)
+        date_filters = {}
         if data.get('data_inicio'):
-            qs = qs.filter(items__data__gte=data['data_inicio']).distinct()
+            date_filters['items__data_atendimento__gte'] = data['data_inicio']
         if data.get('data_fim'):
-            qs = qs.filter(items__data__lte=data['data_fim']).distinct()
+            date_filters['items__data_atendimento__lte'] = data['data_fim']
+        if date_filters:
+            qs = qs.filter(**date_filters).distinct()
         
         # Filtros de valor
         if data.get('valor_min'):